@@ -1,14 +1,23 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
 from pymongo import MongoClient
+from pymongo.errors import PyMongoError
 from werkzeug.security import generate_password_hash, check_password_hash
+import request_timing  # before routes, so every MongoClient gets its listener
+import metrics  # (same for the connection pool listener)
+import profiler
 from routes import all_blueprints
 import os
 from dotenv import load_dotenv
-import markdown as md
 from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from email_utils import send_mail
+from markdown_utils import render_markdown
+import repo_mirror
+import jobs
+import query_log
+import course_utils
+import dashboard
 from bson.objectid import ObjectId
 
 load_dotenv()
@@ -32,14 +41,24 @@ submissions_collection = db["submissions"]
 from models.assignment import AssignmentModel
 from models.submission import SubmissionModel
 from models.content import ContentModel
+from models.pagination import backfill_summaries
 
 # Create model instances
-assignment_model = AssignmentModel(assignments_collection)
-submission_model = SubmissionModel(submissions_collection)
-content_model = ContentModel(content_collection)
+assignment_model = AssignmentModel(query_log.watch(assignments_collection))
+submission_model = SubmissionModel(query_log.watch(submissions_collection))
+content_model = ContentModel(query_log.watch(content_collection))
+try:
+    assignment_model.ensure_indexes()
+    content_model.ensure_indexes()
+    backfill_summaries(assignments_collection)
+    backfill_summaries(content_collection)
+    course_utils.ensure_indexes()
+except PyMongoError as e:
+    print(f"[mongo] could not create indexes: {e}")
 
 
 # ───────────────────────── 24-hour reminder job ──────────────────────────
+@metrics.track_job("due_reminder")
 def due_soon_job() -> None:
     """Send one reminder e-mail for every assignment due in <24 h."""
     print("[scheduler] due_soon_job fired")  # confirm execution
@@ -67,7 +86,9 @@ def due_soon_job() -> None:
             "Please submit before the deadline."
         )
 
-        for stu in users.find({"identity": "student", "email": {"$ne": None}}):
+        # Only the assignment's course (every student if it has none)
+        students = users.find(course_utils.student_filter(a.get("course_id")))
+        for stu in students:
             try:
                 send_mail(stu["email"], subject, body)
             except Exception as e:
@@ -79,6 +100,26 @@ def due_soon_job() -> None:
         print("[reminder] sent for:", a["title"])
 
 
+# ─────────────────────── repository mirror sync job ───────────────────────
+@metrics.track_job("mirror_sync")
+def mirror_sync_job() -> None:
+    """Fetch every linked repository into its local mirror."""
+    accounts = github_accounts.find(
+        {"repo": {"$nin": [None, ""]}}, {"repo": 1, "access_token": 1}
+    )
+    synced = repo_mirror.sync_mirrors(accounts)
+    print(f"[mirror] synced {synced} repositories")
+
+
+# ───────────────────── expired background job cleanup ─────────────────────
+@metrics.track_job("job_cleanup")
+def job_cleanup_job() -> None:
+    """Delete finished jobs (and their files) once they expire."""
+    removed = jobs.cleanup_jobs()
+    if removed:
+        print(f"[jobs] removed {removed} expired jobs")
+
+
 # ─────────────────── scheduler: run now + every hour ───────────────────
 scheduler = BackgroundScheduler(timezone="UTC", daemon=True)
 scheduler.add_job(
@@ -87,20 +128,34 @@ scheduler.add_job(
     next_run_time=datetime.now(timezone.utc),  # run immediately on startup
     id="due_reminder",
 )
+if repo_mirror.mirror is not None:
+    scheduler.add_job(
+        mirror_sync_job,
+        trigger=IntervalTrigger(seconds=repo_mirror.REPO_MIRROR_INTERVAL),
+        next_run_time=datetime.now(timezone.utc),
+        id="mirror_sync",
+    )
+scheduler.add_job(
+    job_cleanup_job,
+    trigger=IntervalTrigger(minutes=10),
+    id="job_cleanup",
+)
 scheduler.start()
 print("[scheduler] started")
+jobs.start_workers()
 # ─────────────────────────────────────────────────────────────────────────
 
 
 for bp in all_blueprints:
     app.register_blueprint(bp)
+profiler.init_app(app)  # first, so the other hooks are profiled too
+request_timing.init_app(app)
+metrics.init_app(app)
 
 
 @app.template_filter("markdown")
 def markdown_filter(text):
-    if text:
-        return md.markdown(text, extensions=["fenced_code", "tables"])
-    return ""
+    return render_markdown(text)
 
 
 @app.template_filter("datetime_format")
@@ -139,6 +194,7 @@ def home():
         else:
             return redirect(url_for("login"))  # Redirect if user_doc is None
 
+        assignments = content_items = student_dashboard = None
         # Get assignments based on user identity
         if identity == "teacher":
             assignments = assignment_model.get_teacher_assignments(user_id)
@@ -151,38 +207,8 @@ def home():
                 assignment["submission_count"] = len(submissions)
 
         else:  # Student
-            assignments = assignment_model.get_all_assignments()
-            content_items = content_model.get_all_content()
-
-            # Get all submissions for this student
-            submissions = submission_model.get_student_submissions(user_id)
-
-            # Create a dictionary with assignment ID as key and submission object as value
-            submission_dict = {}
-            for sub in submissions:
-                submission_dict[sub["assignment_id"]] = sub
-
-            # Process date format and calculate remaining days for assignments
-            now = datetime.now()
-            for assignment in assignments:
-                if isinstance(assignment.get("due_date"), str):
-                    try:
-                        due_date = datetime.fromisoformat(
-                            assignment["due_date"].replace("Z", "+00:00")
-                        )
-                        time_diff = due_date - now
-                        assignment["remaining_days"] = time_diff.days
-                        # Add hours, minutes, seconds for precision
-                        assignment["remaining_hours"] = time_diff.seconds // 3600
-                        assignment["remaining_minutes"] = (
-                            time_diff.seconds % 3600
-                        ) // 60
-                        assignment["remaining_seconds"] = time_diff.seconds % 60
-                        assignment["overdue"] = time_diff.total_seconds() < 0
-                    except ValueError:
-                        assignment["remaining_days"] = 7  # Default value
-                else:
-                    assignment["remaining_days"] = 7  # Default value
+            # One read of the precomputed snapshot instead of the lists
+            student_dashboard = dashboard.get(user_id)
 
         return render_template(
             "home.html",
@@ -192,7 +218,7 @@ def home():
             github_info=github_info,
             assignments=assignments,
             content_items=content_items,
-            submissions=submission_dict if identity == "student" else None,
+            dashboard=student_dashboard,
         )
     return redirect(url_for("login"))
 
@@ -305,6 +331,7 @@ def delete_student(username):
         return "User not found or not a student", 404
     # Delete the student and their GitHub account
     delete_student_and_github(username)
+    dashboard.invalidate(str(student["_id"]))
     return redirect(url_for("all_students"))
 
 
@@ -0,0 +1,181 @@
+# archive_utils.py
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import github_async
+import metrics
+import repo_mirror
+from github_utils import PRIORITY_LOW, github_priority
+from repo_mirror import MirrorError
+
+ARCHIVE_CACHE_DIR = os.getenv(
+    "ARCHIVE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "darkspace-archives")
+)
+ARCHIVE_CACHE_MAX_BYTES = int(os.getenv("ARCHIVE_CACHE_MAX_BYTES", 1024**3))
+
+# Files downloaded (and held in memory) at once while packing a ZIP
+ARCHIVE_FETCH_BATCH = github_async.GITHUB_CONCURRENCY * 4
+
+ZIP_SUFFIX = ".zip"
+FILE_SUFFIX = ".file"
+
+
+def archive_key(owner: str, repo: str, path: str, sha: str) -> str:
+    """Cache key for the download of `path` as of commit `sha`."""
+    raw = f"{owner}/{repo}:{path or ''}@{sha}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def download_etag(path: str, sha: str) -> str:
+    """Strong ETag for a download: the commit SHA plus the selected path."""
+    path_hash = hashlib.sha256((path or "").encode("utf-8")).hexdigest()[:16]
+    return f"{sha}-{path_hash}"
+
+
+def find_cached_archive(owner: str, repo: str, path: str, sha: str) -> str | None:
+    """Return the cached ZIP or raw file for this path/commit, if it exists."""
+    key = archive_key(owner, repo, path, sha)
+    for suffix in (ZIP_SUFFIX, FILE_SUFFIX):
+        cached = os.path.join(ARCHIVE_CACHE_DIR, key + suffix)
+        if os.path.exists(cached):
+            try:
+                # Bump mtime so pruning evicts least recently used downloads
+                os.utime(cached)
+            except OSError:
+                pass
+            return cached
+    return None
+
+
+def _zip_path(base_path, item_path):
+    """Where a file goes in the ZIP: the selected folder is the top level."""
+    if base_path and item_path.startswith(base_path):
+        rel_path = item_path[len(base_path) :].lstrip("/")
+        return os.path.join(base_path.split("/")[-1], rel_path)
+    return item_path
+
+
+def build_archive(owner: str, repo: str, token: str, path: str, sha: str) -> str:
+    """Download `path` into the cache and return the cached file's location.
+
+    A single file is stored as-is, a directory is packed into a ZIP. Files are
+    written to a temporary name and renamed, so readers never see partial data.
+    Builds are bulk work, so their GitHub calls run at low priority and are
+    shed first when the token's quota runs low. Mirrored repos are packed
+    locally with `git archive` and cost no API calls at all.
+    """
+    os.makedirs(ARCHIVE_CACHE_DIR, exist_ok=True)
+    key = archive_key(owner, repo, path, sha)
+    mirror = repo_mirror.mirror_for(owner, repo, token)
+    if mirror is not None:
+        try:
+            return _build_mirror_archive(mirror, f"{owner}/{repo}", path, key)
+        except MirrorError as e:
+            print(f"[mirror] archive of {owner}/{repo}:{path or '/'} failed: {e}")
+    with github_priority(PRIORITY_LOW):
+        return _build_archive(owner, repo, token, path, sha, key)
+
+
+def _contents_url(owner, repo, item_path):
+    return f"https://api.github.com/repos/{owner}/{repo}/contents/{item_path}"
+
+
+def _build_archive(owner, repo, token, path, sha, key):
+    # Everything is read at `sha`, the commit the cache key and ETag name, and
+    # anything that can't be read fails the build: a partial archive would be
+    # served as complete until the next commit.
+    client = github_async.client
+    items = github_async.run(
+        client.walk(owner, repo, token, path, ref=sha, strict=True)
+    )
+
+    def fetch(batch):
+        urls = [_contents_url(owner, repo, item["path"]) for item in batch]
+        return github_async.run(client.fetch_files(urls, token, sha))
+
+    def write(out):
+        single = len(items) == 1 and items[0]["type"] == "file"
+        if single and items[0]["path"] == (path or "").strip("/"):
+            out.write(fetch(items)[0])
+            return FILE_SUFFIX
+
+        files = [item for item in items if item["type"] == "file"]
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            # Download in batches so a big repo is never held in memory whole
+            for i in range(0, len(files), ARCHIVE_FETCH_BATCH):
+                batch = files[i : i + ARCHIVE_FETCH_BATCH]
+                for item, data in zip(batch, fetch(batch)):
+                    zf.writestr(_zip_path(path, item["path"]), data)
+        return ZIP_SUFFIX
+
+    return _store_archive(key, write)
+
+
+def _build_mirror_archive(mirror, full_name, path, key):
+    def write(out):
+        return ZIP_SUFFIX if mirror.write_archive(full_name, path, out) else FILE_SUFFIX
+
+    return _store_archive(key, write)
+
+
+def _store_archive(key, write):
+    """Run write(out) into a temp file and move it into the cache.
+
+    write returns the suffix (ZIP or raw file) the result is stored under.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=ARCHIVE_CACHE_DIR, prefix=key, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            suffix = write(out)
+        final_path = os.path.join(ARCHIVE_CACHE_DIR, key + suffix)
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    prune_archive_cache()
+    return final_path
+
+
+def get_or_build_archive(owner: str, repo: str, token: str, path: str, sha: str) -> str:
+    """Return the cached download for path@sha, building it on a miss."""
+    cached = find_cached_archive(owner, repo, path, sha)
+    metrics.cache_lookup("archive", cached is not None)
+    return cached or build_archive(owner, repo, token, path, sha)
+
+
+def prune_archive_cache(max_bytes: int | None = None) -> int:
+    """Evict least recently used downloads until the cache fits; returns bytes freed."""
+    if max_bytes is None:
+        max_bytes = ARCHIVE_CACHE_MAX_BYTES
+    try:
+        names = os.listdir(ARCHIVE_CACHE_DIR)
+    except FileNotFoundError:
+        return 0
+
+    entries = []
+    for name in names:
+        if not name.endswith((ZIP_SUFFIX, FILE_SUFFIX)):
+            continue
+        full = os.path.join(ARCHIVE_CACHE_DIR, name)
+        try:
+            st = os.stat(full)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, full))
+
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, full in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(full)
+        except FileNotFoundError:
+            pass
+        total -= size
+        freed += size
+    return freed
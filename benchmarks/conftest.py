@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Rendering needs the app but not a database: fail Mongo calls fast and
+# keep background workers off
+os.environ.setdefault(
+    "MONGO_URI", "mongodb://localhost:27017/bench?serverSelectionTimeoutMS=200"
+)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["JOB_WORKERS"] = "0"
+
+ROWS = [10, 100, 1000]
+
+
+@pytest.fixture(scope="session")
+def flask_app():
+    from app import app, scheduler
+
+    # The reminder job would otherwise keep hitting the (absent) database
+    scheduler.pause()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture(params=ROWS, ids=lambda n: f"{n}rows")
+def rows(request):
+    return request.param
@@ -0,0 +1,205 @@
+# benchmarks/fake_github.py
+import base64
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+RATE_LIMIT = 5000
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class SyntheticRepo:
+    """A deterministic repository: `dirs` folders per level, `files` files per folder.
+
+    Every linked repository on the fake server has this same layout, e.g.
+    hw1/README.md, hw1/src/main1.py, ... with `file_size` bytes per file.
+    """
+
+    def __init__(self, dirs=3, files=5, depth=2, file_size=2048):
+        self.files = {}
+        self.dirs = {"": []}
+        self._build("", dirs, files, depth, file_size)
+        self.commit = _sha(b"commit" + "".join(sorted(self.files)).encode())
+        self.tree_sha = _sha(b"tree" + self.commit.encode())
+
+    def _build(self, prefix, dirs, files, depth, file_size):
+        for i in range(files):
+            name = "README.md" if i == 0 else f"main{i}.py"
+            path = f"{prefix}{name}"
+            line = f"# {path}\n" if name.endswith(".md") else f"print({i})  # {path}\n"
+            body = (line * (file_size // len(line) + 1))[:file_size]
+            self.files[path] = body.encode("utf-8")
+            self.dirs[prefix.rstrip("/")].append(path)
+        if depth == 0:
+            return
+        for i in range(dirs):
+            name = f"hw{i + 1}" if not prefix else f"src{i + 1}"
+            path = f"{prefix}{name}"
+            self.dirs[prefix.rstrip("/")].append(path)
+            self.dirs[path] = []
+            self._build(f"{path}/", dirs, files, depth - 1, file_size)
+
+    def item(self, base_url, full_name, path, with_content=False):
+        name = path.rsplit("/", 1)[-1]
+        api = f"{base_url}/repos/{full_name}/contents/{path}"
+        if path in self.dirs:
+            return {
+                "name": name,
+                "path": path,
+                "type": "dir",
+                "size": 0,
+                "sha": _sha(path.encode()),
+                "url": api,
+                "download_url": None,
+            }
+        data = self.files[path]
+        item = {
+            "name": name,
+            "path": path,
+            "type": "file",
+            "size": len(data),
+            "sha": _sha(b"blob %d\0" % len(data) + data),
+            "url": api,
+            "download_url": f"{base_url}/raw/{full_name}/{path}",
+        }
+        if with_content:
+            item["encoding"] = "base64"
+            item["content"] = base64.b64encode(data).decode("ascii")
+        return item
+
+    def zipball(self, full_name):
+        out = io.BytesIO()
+        prefix = full_name.replace("/", "-") + "-" + self.commit[:7]
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path, data in sorted(self.files.items()):
+                zf.writestr(f"{prefix}/{path}", data)
+        return out.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(RATE_LIMIT - 1))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _raw(self, data):
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if not match:
+            return self._send(200, data, "application/octet-stream")
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+        if start >= len(data):
+            return self._send(
+                416, b"", headers={"Content-Range": f"bytes */{len(data)}"}
+            )
+        return self._send(
+            206,
+            data[start : end + 1],
+            "application/octet-stream",
+            {"Content-Range": f"bytes {start}-{end}/{len(data)}"},
+        )
+
+    def do_GET(self):
+        server = self.server
+        server.count(self.path)
+        if server.latency:
+            time.sleep(server.latency)
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        repo = server.repo
+
+        match = re.fullmatch(r"/raw/([^/]+/[^/]+)/(.+)", url.path)
+        if match:
+            data = repo.files.get(unquote(match.group(2)))
+            return self._raw(data) if data is not None else self._send(404, {})
+
+        match = re.fullmatch(r"/repos/([^/]+/[^/]+)/(contents|commits|git/trees|zipball)(?:/(.*))?", url.path)
+        if not match:
+            if url.path == "/user":
+                return self._send(200, {"login": "bench"})
+            return self._send(404, {"message": "Not Found"})
+
+        full_name, kind, rest = match.group(1), match.group(2), unquote(match.group(3) or "")
+        if kind == "commits":
+            return self._send(200, [{"sha": repo.commit}])
+        if kind == "git/trees":
+            entries = [
+                {"path": p, "mode": "040000", "type": "tree", "sha": _sha(p.encode())}
+                for p in repo.dirs
+                if p
+            ] + [
+                {"path": p, "mode": "100644", "type": "blob", "size": len(d), "sha": _sha(d)}
+                for p, d in repo.files.items()
+            ]
+            return self._send(200, {"sha": repo.tree_sha, "truncated": False, "tree": entries})
+        if kind == "zipball":
+            return self._send(200, repo.zipball(full_name), "application/zip")
+
+        path = rest.strip("/")
+        base = server.url
+        if path in repo.dirs:
+            listing = [repo.item(base, full_name, p) for p in repo.dirs[path]]
+            return self._send(200, listing)
+        if path in repo.files:
+            if "raw" in self.headers.get("Accept", ""):
+                return self._raw(repo.files[path])
+            return self._send(200, repo.item(base, full_name, path, with_content=True))
+        return self._send(404, {"message": "Not Found"})
+
+
+class FakeGitHub(ThreadingHTTPServer):
+    """The parts of the GitHub REST API the app calls, served from a SyntheticRepo."""
+
+    daemon_threads = True
+
+    def __init__(self, repo=None, latency_ms=0, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.repo = repo or SyntheticRepo()
+        self.latency = latency_ms / 1000
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        kind = path.split("?")[0].split("/")
+        key = kind[1] if kind[1] == "raw" else "/".join(kind[4:5]) or kind[1]
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,332 @@
+# benchmarks/loadtest.py
+"""Drive realistic student/teacher traffic at the app and report latency per route.
+
+Everything the app talks to is replaced by a local stand-in: a fake GitHub
+API serving a synthetic repository, mongomock (or a throwaway mongod via
+--mongo-uri) and an SMTP sink. Run from the repository root:
+
+    python -m benchmarks.loadtest --students 20 --duration 30
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import smtplib
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import requests
+
+from benchmarks.fake_github import FakeGitHub, SyntheticRepo
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.stats import format_table, summarize
+
+GITHUB_API = "https://api.github.com"
+PASSWORD = "bench"
+
+
+def use_mongomock():
+    """Point every MongoClient the app creates at one shared in-memory store."""
+    import mongomock
+    import pymongo
+
+    store = mongomock.store.ServerStore()
+    pymongo.MongoClient = functools.partial(mongomock.MongoClient, _store=store)
+
+
+def redirect_github(base_url):
+    """Send the app's GitHub API calls to the fake server instead."""
+    real_get = requests.get
+
+    def get(url, *args, **kwargs):
+        if url.startswith(GITHUB_API):
+            url = base_url + url[len(GITHUB_API) :]
+        return real_get(url, *args, **kwargs)
+
+    requests.get = get
+
+
+def redirect_smtp(address):
+    """Deliver the app's mail to the sink (plain SMTP instead of SMTPS)."""
+    smtplib.SMTP_SSL = lambda host, port, context=None, **kwargs: smtplib.SMTP(*address)
+
+
+def load_app():
+    os.environ.setdefault("SECRET_KEY", "loadtest")
+    os.environ.setdefault("Email_password", "loadtest")
+    os.environ["JOB_WORKERS"] = "0"
+    import app as app_module
+    import github_async
+
+    # The requests transport is the one redirect_github() can see
+    github_async.httpx = None
+    app_module.app.config["SESSION_COOKIE_SECURE"] = False
+    return app_module
+
+
+def seed(app_module, args, repo):
+    """Create a teacher, students, assignments, content, submissions and chats."""
+    from werkzeug.security import generate_password_hash
+
+    from routes.chatRoute import chat_model
+
+    password = generate_password_hash(PASSWORD)
+    folders = [path for path in repo.dirs if path and "/" not in path]
+    teacher = app_module.users.insert_one(
+        {"username": "teacher", "password": password, "identity": "teacher",
+         "email": "teacher@bench.local"}
+    ).inserted_id
+    app_module.github_accounts.insert_one(
+        {"username": "teacher", "repo": "bench/course", "access_token": "tok-teacher",
+         "repo_url": "https://github.com/bench/course"}
+    )
+
+    due = (datetime.now() + timedelta(days=7)).isoformat(timespec="seconds")
+    assignments = [
+        app_module.assignment_model.create_assignment(
+            teacher_id=str(teacher),
+            title=f"Homework {i + 1}",
+            description="Synthetic assignment " * 20,
+            due_date=due,
+            github_repo_url=f"https://github.com/bench/course/tree/main/{folders[i % len(folders)]}",
+            github_repo_path=folders[i % len(folders)],
+        )
+        for i in range(args.assignments)
+    ]
+    contents = [
+        app_module.content_model.create_content(
+            teacher_id=str(teacher),
+            title=f"Lecture {i + 1}",
+            description="Synthetic course material",
+            github_repo_url=f"https://github.com/bench/course/tree/main/{folders[i % len(folders)]}",
+            github_repo_path=folders[i % len(folders)],
+        )
+        for i in range(args.contents)
+    ]
+
+    students = []
+    for n in range(args.students):
+        username = f"student{n}"
+        student = app_module.users.insert_one(
+            {"username": username, "password": password, "identity": "student",
+             "email": f"{username}@bench.local"}
+        ).inserted_id
+        app_module.github_accounts.insert_one(
+            {"username": username, "repo": f"bench/{username}", "access_token": f"tok-{n}"}
+        )
+        for assignment_id in assignments[::2]:
+            app_module.submission_model.create_submission(
+                student_id=str(student),
+                assignment_id=assignment_id,
+                github_link=f"https://github.com/bench/{username}/blob/main/README.md",
+                readme_content="# Submission\n\n" + "Some text. " * 200,
+            )
+        for m in range(args.messages):
+            sender, receiver = (username, "teacher") if m % 2 else ("teacher", username)
+            chat_model.send_message(sender, receiver, f"Message {m}")
+        students.append(username)
+    return {"assignments": assignments, "contents": contents, "students": students}
+
+
+def student_mix(data, repo):
+    files = [p for p in repo.files if "/" in p]
+
+    def preview(session, base):
+        aid = random.choice(data["assignments"])
+        return session.get(f"{base}/assignments/{aid}/preview/{random.choice(files).split('/', 1)[1]}")
+
+    return [
+        ("home", 25, lambda s, b: s.get(f"{b}/")),
+        ("assignments", 10, lambda s, b: s.get(f"{b}/assignments")),
+        ("view_assignment", 20, lambda s, b: s.get(f"{b}/assignments/{random.choice(data['assignments'])}")),
+        ("browse", 10, lambda s, b: s.get(f"{b}/assignments/{random.choice(data['assignments'])}/browse")),
+        ("preview", 10, preview),
+        ("download", 5, lambda s, b: s.get(f"{b}/assignments/{random.choice(data['assignments'])}/download")),
+        ("content_download", 5, lambda s, b: s.get(f"{b}/content/{random.choice(data['contents'])}/download")),
+        ("chat", 10, lambda s, b: s.get(f"{b}/chat/with/teacher")),
+        ("chat_send", 5, lambda s, b: s.post(f"{b}/chat/with/teacher", data={"message": "hi"}, allow_redirects=False)),
+        # Mails a receipt from inside the request
+        ("submit", 2, lambda s, b: s.post(
+            f"{b}/assignments/{random.choice(data['assignments'])}/submit-markdown",
+            data={"markdown_path": "README.md"}, allow_redirects=False)),
+    ]
+
+
+def teacher_mix(data, repo):
+    return [
+        ("home", 30, lambda s, b: s.get(f"{b}/")),
+        ("view_assignment", 30, lambda s, b: s.get(f"{b}/assignments/{random.choice(data['assignments'])}")),
+        ("chat_index", 15, lambda s, b: s.get(f"{b}/chat/")),
+        ("chat", 15, lambda s, b: s.get(f"{b}/chat/with/{random.choice(data['students'])}")),
+        ("download", 10, lambda s, b: s.get(f"{b}/assignments/{random.choice(data['assignments'])}/download")),
+        # Queues the announcement mail to every student as a background job
+        ("create_assignment", 2, lambda s, b: s.post(f"{b}/assignments/create", data={
+            "title": "Pop quiz", "description": "Synthetic", "due_date": "2030-01-01",
+            "due_time": "12:00", "github_repo_path": "hw1"}, allow_redirects=False)),
+    ]
+
+
+class VirtualUser(threading.Thread):
+    """Logs in once, then picks weighted actions from its mix until the deadline."""
+
+    def __init__(self, base_url, username, mix, deadline):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.username = username
+        self.mix = mix
+        self.deadline = deadline
+        # Per-thread tallies, merged after the run
+        self.results = {}
+        self.errors = {}
+
+    def run(self):
+        session = requests.Session()
+        session.post(
+            f"{self.base_url}/login",
+            data={"username": self.username, "password": PASSWORD},
+            allow_redirects=False,
+        )
+        names = [name for name, _, _ in self.mix]
+        weights = [weight for _, weight, _ in self.mix]
+        actions = {name: action for name, _, action in self.mix}
+        role = "teacher" if self.username == "teacher" else "student"
+        while time.monotonic() < self.deadline:
+            name = random.choices(names, weights)[0]
+            key = f"{role}:{name}"
+            started = time.perf_counter()
+            try:
+                response = actions[name](session, self.base_url)
+                response.content  # read the whole body, like a browser would
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            self.results.setdefault(key, []).append(elapsed)
+            if not ok:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def run(args):
+    repo = SyntheticRepo(args.repo_dirs, args.repo_files, args.repo_depth, args.file_size)
+    github = FakeGitHub(repo, latency_ms=args.github_latency_ms).start()
+    sink = SMTPSink().start()
+
+    if args.mongo_uri:
+        database = urlsplit(args.mongo_uri).path.strip("/")
+        if "bench" not in database:
+            sys.exit("--mongo-uri must name a throwaway database containing 'bench'")
+        os.environ["MONGO_URI"] = args.mongo_uri
+    else:
+        use_mongomock()
+    redirect_github(github.url)
+    redirect_smtp(sink.address)
+
+    app_module = load_app()
+    if args.mongo_uri:
+        app_module.client.drop_database(app_module.db.name)
+    data = seed(app_module, args, repo)
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    # One job worker, so queued mail reaches the sink during the run
+    app_module.jobs.start_workers(1)
+    server = make_server(
+        "127.0.0.1", 0, app_module.app, threaded=True, request_handler=QuietHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    deadline = time.monotonic() + args.duration
+    users = [
+        VirtualUser(base_url, "teacher", teacher_mix(data, repo), deadline)
+        for _ in range(args.teachers)
+    ]
+    users += [
+        VirtualUser(
+            base_url,
+            data["students"][i % len(data["students"])],
+            student_mix(data, repo),
+            deadline,
+        )
+        for i in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    duration = time.monotonic() - started
+    server.shutdown()
+
+    results, errors = {}, {}
+    for user in users:
+        for key, values in user.results.items():
+            results.setdefault(key, []).extend(values)
+        for key, count in user.errors.items():
+            errors[key] = errors.get(key, 0) + count
+
+    rows = []
+    for key in sorted(results):
+        row = summarize(results[key], duration)
+        row.update(route=key, errors=errors.get(key, 0))
+        rows.append(row)
+    everything = summarize([v for values in results.values() for v in values], duration)
+    everything.update(route="all", errors=sum(errors.values()))
+    rows.append(everything)
+
+    print(
+        f"{len(users)} virtual users for {duration:.1f}s; "
+        f"{args.students} students, {args.assignments} assignments, "
+        f"{len(repo.files)} files per repository"
+    )
+    print(format_table(rows, [
+        ("route", "route", "{}"),
+        ("count", "requests", "{}"),
+        ("rps", "req/s", "{:.1f}"),
+        ("p50", "p50 ms", "{:.1f}"),
+        ("p95", "p95 ms", "{:.1f}"),
+        ("p99", "p99 ms", "{:.1f}"),
+        ("max", "max ms", "{:.1f}"),
+        ("errors", "errors", "{}"),
+    ]))
+    print(f"GitHub calls: {dict(sorted(github.requests.items()))}; mails sent: {sink.messages}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"duration": duration, "routes": rows,
+                       "github_calls": github.requests, "mails": sink.messages}, f, indent=2)
+    github.stop()
+    sink.stop()
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=20, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=10, help="student virtual users")
+    parser.add_argument("--teachers", type=int, default=1, help="teacher virtual users")
+    parser.add_argument("--students", type=int, default=50, help="student accounts to seed")
+    parser.add_argument("--assignments", type=int, default=10)
+    parser.add_argument("--contents", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=10, help="chat messages per student")
+    parser.add_argument("--repo-dirs", type=int, default=3, help="folders per level")
+    parser.add_argument("--repo-files", type=int, default=5, help="files per folder")
+    parser.add_argument("--repo-depth", type=int, default=2, help="folder nesting")
+    parser.add_argument("--file-size", type=int, default=2048, help="bytes per file")
+    parser.add_argument("--github-latency-ms", type=float, default=50,
+                        help="added to every fake GitHub response")
+    parser.add_argument("--mongo-uri", help="use this mongod instead of mongomock")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
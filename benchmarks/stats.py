@@ -0,0 +1,42 @@
+# benchmarks/stats.py
+import math
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, duration):
+    """count, req/s and p50/p95/p99/max (milliseconds) for one route's latencies."""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "rps": len(values) / duration if duration else 0.0,
+        "p50": percentile(values, 50) * 1000,
+        "p95": percentile(values, 95) * 1000,
+        "p99": percentile(values, 99) * 1000,
+        "max": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def format_table(rows, columns):
+    """Plain-text table; rows are dicts, columns (key, title, format) tuples."""
+    cells = [[title for _, title, _ in columns]]
+    for row in rows:
+        cells.append([fmt.format(row[key]) for key, _, fmt in columns])
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    lines = []
+    for n, line in enumerate(cells):
+        lines.append(
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(line, widths))
+            )
+        )
+        if n == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return "\n".join(lines)
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import deadline
+
+pytest.importorskip("pytest_benchmark")
+
+NOW = datetime(2025, 5, 1, 12, 0)
+BATCHES = [10, 100, 1000, 10000]
+
+
+def assignments(n):
+    return [
+        {"_id": i, "due_date": (NOW + timedelta(minutes=37 * (i - n // 2))).isoformat()}
+        for i in range(n)
+    ]
+
+
+def legacy_loop(items):
+    # The per-assignment block the routes ran before deadline.annotate()
+    now = datetime.now()
+    for assignment in items:
+        if isinstance(assignment.get("due_date"), str):
+            try:
+                due_date = datetime.fromisoformat(
+                    assignment["due_date"].replace("Z", "+00:00")
+                )
+                time_diff = due_date - now
+                assignment["remaining_days"] = time_diff.days
+                assignment["remaining_hours"] = time_diff.seconds // 3600
+                assignment["remaining_minutes"] = (time_diff.seconds % 3600) // 60
+                assignment["remaining_seconds"] = time_diff.seconds % 60
+                assignment["overdue"] = time_diff.total_seconds() < 0
+            except ValueError:
+                assignment["remaining_days"] = 7
+        else:
+            assignment["remaining_days"] = 7
+    return items
+
+
+@pytest.mark.parametrize("batch", BATCHES)
+def test_legacy_loop(benchmark, batch):
+    items = assignments(batch)
+    assert len(benchmark(legacy_loop, items)) == batch
+
+
+@pytest.mark.parametrize("batch", BATCHES)
+def test_annotate(benchmark, monkeypatch, batch):
+    monkeypatch.setattr(deadline, "numpy", None)
+    items = assignments(batch)
+    assert len(benchmark(deadline.annotate, items)) == batch
+
+
+@pytest.mark.parametrize("batch", BATCHES)
+def test_annotate_numpy(benchmark, monkeypatch, batch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(deadline, "VECTOR_MIN_BATCH", 0)
+    items = assignments(batch)
+    assert len(benchmark(deadline.annotate, items)) == batch
+
+
+@pytest.mark.parametrize("batch", BATCHES)
+def test_countdowns_only(benchmark, batch):
+    # Without writing the fields back, e.g. the dashboard buckets
+    dues = [a["due_date"] for a in assignments(batch)]
+    assert len(benchmark(deadline.countdowns, dues)) == batch
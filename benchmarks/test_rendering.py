@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson.objectid import ObjectId
+from flask import render_template, session
+
+pytest.importorskip("pytest_benchmark")
+
+NOW = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def iso(i):
+    return (NOW + timedelta(hours=i)).isoformat()
+
+
+def assignments(n):
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Homework {i}",
+            "description": "Read chapter and answer the questions. " * 5,
+            "summary": "Read chapter and answer the questions. " * 3,
+            "due_date": iso(i),
+            "github_repo_url": f"https://github.com/course/repo/tree/main/hw{i}",
+            "github_repo_path": f"hw{i}",
+            "remaining_days": i % 7,
+            "remaining_hours": i % 24,
+            "remaining_minutes": i % 60,
+            "remaining_seconds": i % 60,
+            "overdue": i % 5 == 0,
+            "submission_count": i % 30,
+        }
+        for i in range(n)
+    ]
+
+
+def submissions(n):
+    return [
+        {
+            "_id": ObjectId(),
+            "student_username": f"student{i}",
+            "submitted_at": NOW - timedelta(minutes=i),
+            "github_link": f"https://github.com/student{i}/hw/blob/main/README.md",
+            "status": "graded" if i % 2 else "submitted",
+            "grade": 80 + i % 20 if i % 2 else None,
+            "feedback": "Good work" if i % 2 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def student_dashboard(n):
+    import dashboard
+
+    statuses = ("pending", "pending", "submitted", "graded")
+    items = {
+        str(a["_id"]): {
+            "title": a["title"],
+            "due_date": a["due_date"],
+            "status": statuses[i % 4],
+            "grade": 90 if i % 4 == 3 else None,
+        }
+        for i, a in enumerate(assignments(n))
+    }
+    return dashboard.buckets(items, NOW)
+
+
+def messages(n):
+    return [
+        {
+            "sender": "teacher" if i % 2 else "student0",
+            "receiver": "student0" if i % 2 else "teacher",
+            "content": f"Message number {i} about the homework",
+            "timestamp": iso(i),
+        }
+        for i in range(n)
+    ]
+
+
+def render(app, template, username="teacher", identity="teacher", **context):
+    with app.test_request_context("/"):
+        session["username"] = username
+        session["identity"] = identity
+        return render_template(template, username=username, identity=identity, **context)
+
+
+# ── filters ──────────────────────────────────────────────────────────────
+def test_markdown_filter(benchmark, flask_app, rows):
+    text = "\n\n".join(
+        f"## Section {i}\n\nSome *emphasis*, `code` and a [link](https://example.com/{i}).\n\n"
+        f"```python\nprint({i})\n```"
+        for i in range(rows)
+    )
+    markdown = flask_app.jinja_env.filters["markdown"]
+    html = benchmark(markdown, text)
+    assert "Section" in str(html)
+
+
+def test_datetime_format_filter(benchmark, flask_app, rows):
+    values = [iso(i) for i in range(rows)]
+    datetime_format = flask_app.jinja_env.filters["datetime_format"]
+    result = benchmark(lambda: [datetime_format(v) for v in values])
+    assert len(result) == rows
+
+
+def test_chat_time_format_filter(benchmark, flask_app, rows):
+    values = [iso(i) for i in range(rows)]
+    chat_time_format = flask_app.jinja_env.filters["chat_time_format"]
+    result = benchmark(lambda: [chat_time_format(v) for v in values])
+    assert len(result) == rows
+
+
+# ── pages ────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("identity", ["student", "teacher"])
+def test_home(benchmark, flask_app, rows, identity):
+    context = dict(
+        user={"username": "u", "email": "u@example.com"},
+        github_info={"github_login": "u", "repo": "u/repo", "repo_url": "https://github.com/u/repo"},
+        assignments=assignments(rows),
+        content_items=[],
+        dashboard=student_dashboard(rows) if identity == "student" else None,
+    )
+    html = benchmark(render, flask_app, "home.html", "u", identity, **context)
+    assert "u@example.com" in html
+
+
+def test_student_assignments(benchmark, flask_app, rows):
+    items = assignments(rows)
+    submitted = {str(a["_id"]): {"status": "submitted"} for a in items[::2]}
+    html = benchmark(
+        render,
+        flask_app,
+        "student_assignments.html",
+        "student0",
+        "student",
+        assignments=items,
+        submissions=submitted,
+        datetime=datetime,
+        abs=abs,
+    )
+    assert "Homework" in html
+
+
+def test_teacher_assignment_detail(benchmark, flask_app, rows):
+    assignment = assignments(1)[0]
+    html = benchmark(
+        render,
+        flask_app,
+        "teacher_assignment_detail.html",
+        assignment=assignment,
+        submissions=submissions(rows),
+    )
+    assert f"Student Submissions ({rows})" in html
+
+
+def test_chat(benchmark, flask_app, rows):
+    html = benchmark(
+        render,
+        flask_app,
+        "chat.html",
+        contacts=[f"student{i}" for i in range(rows)],
+        all_contacts={"student": [f"student{i}" for i in range(rows)], "teacher": []},
+        selected="student0",
+        messages=messages(rows),
+    )
+    assert "Message number" in html
@@ -0,0 +1,60 @@
+# course_utils.py
+import os
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from models.course import CourseModel
+from models.enrollment import EnrollmentModel
+
+load_dotenv()
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+course_model = CourseModel(db["courses"])
+enrollment_model = EnrollmentModel(db["enrollments"])
+
+
+def course_scope(course_ids) -> dict:
+    """Filter for assignments/content visible in the given courses.
+
+    Items posted without a course (before courses existed, or to "all
+    students") stay visible to everyone.
+    """
+    return {"course_id": {"$in": list(course_ids) + [None]}}
+
+
+def visible_to_student(item, student_id) -> bool:
+    """Whether a student may open an assignment/content item.
+
+    The single-item form of course_scope: the item was posted without a
+    course or to a course the student is enrolled in.
+    """
+    course_id = item.get("course_id")
+    return course_id is None or enrollment_model.is_enrolled(course_id, student_id)
+
+
+def student_filter(course_id=None) -> dict:
+    """Users to notify about an item of a course (every student if None)."""
+    query = {"identity": "student", "email": {"$ne": None}}
+    if course_id:
+        student_ids = enrollment_model.get_course_student_ids(course_id)
+        query["_id"] = {"$in": [ObjectId(student_id) for student_id in student_ids]}
+    return query
+
+
+def teacher_course(course_id, teacher_id):
+    """The course if it exists and is taught by teacher_id, else None."""
+    if not course_id or not ObjectId.is_valid(course_id):
+        return None
+    course = course_model.get_course(course_id)
+    if not course or course["teacher_id"] != teacher_id:
+        return None
+    return course
+
+
+def ensure_indexes():
+    course_model.ensure_indexes()
+    enrollment_model.ensure_indexes()
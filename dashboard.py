@@ -0,0 +1,186 @@
+# dashboard.py
+import os
+import time
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+import deadline
+from course_utils import course_scope, enrollment_model
+
+load_dotenv()
+
+# Snapshots are rebuilt from scratch after this long, as a backstop for
+# updates that never reached them (e.g. an edit made straight in Mongo)
+DASHBOARD_MAX_AGE = int(os.getenv("DASHBOARD_MAX_AGE", 3600))
+
+BUCKETS = ("upcoming", "overdue", "submitted", "graded")
+# Rebuilds retried when an incremental update lands while one is computed
+BUILD_ATTEMPTS = 3
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+dashboards = db["dashboards"]
+assignments_collection = db["assignments"]
+submissions_collection = db["submissions"]
+
+
+def _entry(assignment) -> dict:
+    return {
+        "title": assignment.get("title"),
+        "due_date": assignment.get("due_date"),
+        "status": "pending",  # then "submitted" or "graded"
+        "grade": None,
+    }
+
+
+def build(student_id) -> dict:
+    """Compute a student's snapshot from scratch and store it.
+
+    Each assignment the student can see is one entry under "items", keyed by
+    its id, so single entries can be updated in place. Every write gives the
+    snapshot a new "version", and a rebuild only replaces the version it
+    started from, so updates made while it ran are never overwritten.
+    """
+    for _ in range(BUILD_ATTEMPTS):
+        current = dashboards.find_one({"_id": student_id}, {"version": 1})
+        snapshot = _compute(student_id)
+        if _store(snapshot, current):
+            break
+    else:
+        print(f"[dashboard] snapshot of {student_id} kept changing, not stored")
+    return snapshot
+
+
+def _compute(student_id):
+    scope = course_scope(enrollment_model.get_student_course_ids(student_id))
+    items = {
+        str(a["_id"]): _entry(a)
+        for a in assignments_collection.find(scope, {"title": 1, "due_date": 1})
+    }
+    for sub in submissions_collection.find(
+        {"student_id": student_id}, {"assignment_id": 1, "status": 1, "grade": 1}
+    ):
+        if sub["assignment_id"] in items:
+            items[sub["assignment_id"]].update(
+                status=sub.get("status") or "submitted", grade=sub.get("grade")
+            )
+
+    return {
+        "_id": student_id,
+        "items": items,
+        "built_at": time.time(),
+        "version": ObjectId(),
+    }
+
+
+def _store(snapshot, current) -> bool:
+    """Write a snapshot unless the stored one changed since `current` was read."""
+    if current is None:
+        try:
+            dashboards.insert_one(snapshot)
+            return True
+        except DuplicateKeyError:  # another rebuild got there first
+            return False
+    result = dashboards.replace_one(
+        {"_id": snapshot["_id"], "version": current.get("version")}, snapshot
+    )
+    return result.matched_count == 1
+
+
+def buckets(items, now=None) -> dict:
+    """Split snapshot entries into upcoming/overdue/submitted/graded lists.
+
+    Each entry gets its Countdown, computed for the whole snapshot at once.
+    """
+    entries = [dict(entry, assignment_id=aid) for aid, entry in items.items()]
+    timers = deadline.countdowns([entry.get("due_date") for entry in entries], now)
+    result = {name: [] for name in BUCKETS}
+    for item, countdown in zip(entries, timers):
+        item["countdown"] = countdown
+        if item["status"] == "graded":
+            result["graded"].append(item)
+        elif item["status"] != "pending":
+            result["submitted"].append(item)
+        elif countdown.overdue:
+            result["overdue"].append(item)
+        else:
+            result["upcoming"].append(item)
+
+    def by_due(item):
+        return item.get("due_date") or ""
+
+    # Soonest first, with undated assignments after the dated ones
+    result["upcoming"].sort(key=lambda item: (not item.get("due_date"), by_due(item)))
+    for name in ("overdue", "submitted", "graded"):
+        result[name].sort(key=by_due, reverse=True)
+    return result
+
+
+def get(student_id, now=None) -> dict:
+    """The student's dashboard buckets: one read, or a rebuild when missing or old."""
+    snapshot = dashboards.find_one({"_id": student_id})
+    stale = snapshot and time.time() - snapshot.get("built_at", 0) > DASHBOARD_MAX_AGE
+    if snapshot is None or stale:
+        snapshot = build(student_id)
+    return buckets(snapshot["items"], now)
+
+
+# ── incremental updates ──────────────────────────────────────────────────
+# Students without a snapshot yet are skipped; theirs is built on first view.
+
+
+def _apply(what, operation):
+    try:
+        operation()
+    except PyMongoError as e:
+        print(f"[dashboard] {what} not applied: {e}")
+
+
+def assignment_added(assignment_id, title, due_date, course_id=None):
+    """Add a new assignment to every snapshot of a student who can see it."""
+    audience = {}
+    if course_id:
+        audience = {"_id": {"$in": enrollment_model.get_course_student_ids(course_id)}}
+    entry = _entry({"title": title, "due_date": due_date})
+    update = {"$set": {f"items.{assignment_id}": entry, "version": ObjectId()}}
+    _apply("new assignment", lambda: dashboards.update_many(audience, update))
+
+
+def assignment_removed(assignment_id):
+    _apply(
+        "assignment removal",
+        lambda: dashboards.update_many(
+            {f"items.{assignment_id}": {"$exists": True}},
+            {
+                "$unset": {f"items.{assignment_id}": ""},
+                "$set": {"version": ObjectId()},
+            },
+        ),
+    )
+
+
+def submission_recorded(student_id, assignment_id, status="submitted", grade=None):
+    """Mark an assignment submitted (or graded) in the student's snapshot.
+
+    The grade is only written when one is given: a resubmission keeps the
+    stored grade, just like the submission document does.
+    """
+    fields = {f"items.{assignment_id}.status": status, "version": ObjectId()}
+    if grade is not None:
+        fields[f"items.{assignment_id}.grade"] = grade
+    _apply(
+        "submission",
+        lambda: dashboards.update_one(
+            {"_id": student_id, f"items.{assignment_id}": {"$exists": True}},
+            {"$set": fields},
+        ),
+    )
+
+
+def invalidate(student_id):
+    """Drop a snapshot whose set of assignments changed (e.g. a new course)."""
+    _apply("invalidation", lambda: dashboards.delete_one({"_id": student_id}))
@@ -0,0 +1,125 @@
+# deadline.py
+from datetime import datetime
+from typing import NamedTuple
+
+try:
+    import numpy
+except ImportError:  # every batch takes the plain loop
+    numpy = None
+
+# Batches at least this long are parsed and split as NumPy arrays when it is
+# installed; below that the array setup costs more than it saves
+VECTOR_MIN_BATCH = 50
+# Shown for assignments without a usable due date
+DEFAULT_DAYS = 7
+
+SECOND_US = 1_000_000
+DAY_US = 86_400 * SECOND_US
+
+
+class Countdown(NamedTuple):
+    """Time left until a due date, split the way the templates show it."""
+
+    remaining_days: int = DEFAULT_DAYS
+    remaining_hours: int = 0
+    remaining_minutes: int = 0
+    remaining_seconds: int = 0
+    overdue: bool = False
+
+
+UNKNOWN = Countdown()
+
+
+def parse_due(value):
+    """A due date as a datetime, or None if it is missing or not ISO 8601."""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _loop_rows(due_dates, now):
+    # Naive due dates are local time, as entered; aware ones compare exactly
+    naive_now = now.astimezone().replace(tzinfo=None) if now.tzinfo else now
+    aware_now = None
+    rows = []
+    for value in due_dates:
+        due = parse_due(value)
+        if due is None:
+            rows.append(None)
+            continue
+        if due.tzinfo:
+            aware_now = aware_now or now.astimezone()
+            left = due - aware_now
+        else:
+            left = due - naive_now
+        days, seconds = left.days, left.seconds
+        rows.append(
+            (days, seconds // 3600, seconds % 3600 // 60, seconds % 60, days < 0)
+        )
+    return rows
+
+
+def _vector_rows(due_dates, now):
+    """Rows for a batch of naive ISO strings, or None if the loop must do it."""
+    try:
+        joined = "".join(due_dates)
+    except TypeError:  # missing dates or datetimes
+        return None
+    # NumPy would silently shift dates with a UTC offset to UTC. A naive date
+    # has exactly two dashes, so anything else goes through the loop.
+    if "Z" in joined or "+" in joined or joined.count("-") != 2 * len(due_dates):
+        return None
+    try:
+        due = numpy.array(due_dates, dtype="datetime64[us]")
+    except ValueError:
+        return None
+
+    naive_now = now.astimezone().replace(tzinfo=None) if now.tzinfo else now
+    us = (due - numpy.datetime64(naive_now, "us")).astype(numpy.int64)
+    days, rest = numpy.divmod(us, DAY_US)
+    seconds = rest // SECOND_US
+    return list(
+        zip(
+            days.tolist(),
+            (seconds // 3600).tolist(),
+            (seconds % 3600 // 60).tolist(),
+            (seconds % 60).tolist(),
+            (us < 0).tolist(),
+        )
+    )
+
+
+def _rows(due_dates, now):
+    due_dates = list(due_dates)
+    now = now or datetime.now()
+    if numpy is not None and len(due_dates) >= VECTOR_MIN_BATCH:
+        rows = _vector_rows(due_dates, now)
+        if rows is not None:
+            return rows
+    return _loop_rows(due_dates, now)
+
+
+def countdowns(due_dates, now=None) -> list:
+    """A Countdown per due date, all measured from the same `now`."""
+    return [
+        UNKNOWN if row is None else Countdown._make(row)
+        for row in _rows(due_dates, now)
+    ]
+
+
+def annotate(assignments, now=None):
+    """Add the countdown fields to each assignment dict; returns the list."""
+    rows = _rows([a.get("due_date") for a in assignments], now)
+    for assignment, row in zip(assignments, rows):
+        days, hours, minutes, seconds, overdue = row or UNKNOWN
+        assignment["remaining_days"] = days
+        assignment["remaining_hours"] = hours
+        assignment["remaining_minutes"] = minutes
+        assignment["remaining_seconds"] = seconds
+        assignment["overdue"] = overdue
+    return assignments
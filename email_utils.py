@@ -2,21 +2,91 @@
 import os, smtplib, ssl
 from email.message import EmailMessage
 
+import jobs
+import request_timing
+
 FROM_EMAIL = "13601583609@163.com"
 SMTP_SERVER = "smtp.163.com"
 SMTP_PORT = 465
 SMTP_LOGIN = "13601583609@163.com"
 SMTP_PASS = os.getenv("Email_password")  # keep secret in .env
 
+BULK_MAIL_JOB = "bulk_mail"
 
-def send_mail(to_addr: str, subject: str, body: str) -> None:
+
+def _message(to_addr: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
     msg["From"] = FROM_EMAIL
     msg["To"] = to_addr
     msg["Subject"] = subject
     msg.set_content(body)
+    return msg
+
+
+def send_mail(to_addr: str, subject: str, body: str) -> None:
+    msg = _message(to_addr, subject, body)
 
     ctx = ssl.create_default_context()
-    with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=ctx) as smtp:
-        smtp.login(SMTP_LOGIN, SMTP_PASS)
-        smtp.send_message(msg)
+    with request_timing.timed("smtp"):
+        with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=ctx) as smtp:
+            smtp.login(SMTP_LOGIN, SMTP_PASS)
+            smtp.send_message(msg)
+
+
+def queue_bulk_mail(recipients, subject: str, body: str, owner=None) -> str:
+    """Send the same mail to many addresses from a background job."""
+    return jobs.enqueue(
+        BULK_MAIL_JOB,
+        owner,
+        {"recipients": list(recipients), "subject": subject, "body": body},
+    )
+
+
+def _connect():
+    ctx = ssl.create_default_context()
+    smtp = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=ctx)
+    smtp.login(SMTP_LOGIN, SMTP_PASS)
+    return smtp
+
+
+def _disconnect(smtp):
+    if smtp is None:
+        return
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+@jobs.handler(BULK_MAIL_JOB)
+def _send_bulk_mail(job):
+    recipients = job.params["recipients"]
+    failed = 0
+    # One SMTP session for the whole batch instead of a login per message;
+    # a message that fails on a broken session is retried once on a new one
+    smtp = None
+    try:
+        for i, to_addr in enumerate(recipients, 1):
+            msg = _message(to_addr, job.params["subject"], job.params["body"])
+            for attempt in (1, 2):
+                try:
+                    if smtp is None:
+                        smtp = _connect()
+                    smtp.send_message(msg)
+                    break
+                except smtplib.SMTPRecipientsRefused as e:
+                    failed += 1
+                    print(f"Mail to {to_addr} failed: {e}")
+                    break
+                except (smtplib.SMTPException, OSError) as e:
+                    # Disconnects, timeouts, data errors: start a fresh session
+                    _disconnect(smtp)
+                    smtp = None
+                    if attempt == 2:
+                        failed += 1
+                        print(f"Mail to {to_addr} failed: {e}")
+            job.progress(i, len(recipients))
+    finally:
+        _disconnect(smtp)
+    if failed:
+        print(f"[mail] {failed} of {len(recipients)} messages could not be sent")
@@ -0,0 +1,243 @@
+# github_async.py
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+
+import requests
+
+import github_utils
+import repo_cache
+import repo_mirror
+import request_timing
+from github_utils import RateLimitExceeded, current_priority
+from repo_cache import KIND_CONTENTS
+from repo_mirror import MirrorError
+
+try:
+    import httpx
+except ImportError:  # requests in worker threads is the fallback transport
+    httpx = None
+
+# Upper bound on GitHub requests one worker has in flight at once
+GITHUB_CONCURRENCY = int(os.getenv("GITHUB_CONCURRENCY", 8))
+GITHUB_TIMEOUT_SECONDS = 30
+# How long sync code waits for a whole fan-out (e.g. walking a big repo)
+GITHUB_RUN_TIMEOUT_SECONDS = int(os.getenv("GITHUB_RUN_TIMEOUT", 300))
+
+
+class LoopThread:
+    """An asyncio event loop on a daemon thread, shared by all Flask threads.
+
+    Sync code hands it coroutines with run(); the caller's context variables
+    (e.g. the GitHub priority) carry over into the coroutine.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="github-async", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro, timeout=GITHUB_RUN_TIMEOUT_SECONDS):
+        """Run a coroutine on the shared loop and wait for its result.
+
+        Raises concurrent.futures.TimeoutError after `timeout` seconds and
+        cancels the coroutine, so a stuck call never holds a thread forever.
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("LoopThread.run() called from the loop itself")
+
+        context = contextvars.copy_context()
+        result = concurrent.futures.Future()
+        tasks = []
+
+        def relay(task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        def start():
+            if result.set_running_or_notify_cancel():
+                task = loop.create_task(coro, context=context)
+                task.add_done_callback(relay)
+                tasks.append(task)
+            else:
+                coro.close()
+
+        loop.call_soon_threadsafe(start)
+        try:
+            return result.result(timeout)
+        except concurrent.futures.TimeoutError:
+            loop.call_soon_threadsafe(lambda: [task.cancel() for task in tasks])
+            raise
+
+
+class AsyncGitHub:
+    """GitHub client for fanning out many calls at once.
+
+    Calls go through the same rate-limit governor, repo cache and mirror as
+    the sync helpers in githubRoute, and at most `concurrency` are in flight.
+    Uses httpx when it is installed, otherwise requests on worker threads.
+    """
+
+    def __init__(self, concurrency=GITHUB_CONCURRENCY):
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._http = None
+
+    def _client(self):
+        if self._http is None:
+            limits = httpx.Limits(max_connections=self.concurrency)
+            self._http = httpx.AsyncClient(
+                limits=limits, timeout=GITHUB_TIMEOUT_SECONDS, follow_redirects=True
+            )
+        return self._http
+
+    async def get(self, url, token=None, headers=None, **kwargs):
+        """GET a GitHub URL; raises RateLimitExceeded like github_get."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        headers = dict(headers or {})
+        if token:
+            headers.setdefault("Authorization", f"token {token}")
+
+        async with self._semaphore:
+            # acquire() may sleep out a short backoff, so keep it off the loop
+            await asyncio.to_thread(
+                github_utils.governor.acquire, token, current_priority()
+            )
+            with request_timing.timed("github"):
+                if httpx is not None:
+                    response = await self._client().get(url, headers=headers, **kwargs)
+                else:
+                    kwargs.setdefault("timeout", GITHUB_TIMEOUT_SECONDS)
+                    response = await asyncio.to_thread(
+                        requests.get, url, headers=headers, **kwargs
+                    )
+
+        retry_after = github_utils.governor.record(token, response)
+        if retry_after is not None:
+            raise RateLimitExceeded(retry_after)
+        return response
+
+    async def get_repo_contents(self, owner, repo, token, path="", ref=None):
+        """Async counterpart of githubRoute.get_repo_contents.
+
+        With `ref` the listing is read at that commit, straight from GitHub.
+        """
+        full_name = f"{owner}/{repo}"
+        if ref is None:
+            mirror = repo_mirror.mirror_for(owner, repo, token)
+            if mirror is not None:
+                try:
+                    return await asyncio.to_thread(mirror.contents, full_name, path)
+                except MirrorError as e:
+                    print(f"[mirror] {full_name}: {e}")
+
+            cached = await asyncio.to_thread(
+                repo_cache.github_cache.get, KIND_CONTENTS, full_name, path, token
+            )
+            if cached is not None:
+                return cached
+
+        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+        headers = {"Accept": "application/vnd.github+json"}
+        params = {"ref": ref} if ref else None
+        response = await self.get(url, token, headers=headers, params=params)
+        if response.status_code != 200:
+            raise Exception(f"GitHub API error: {response.text}")
+
+        contents = response.json()
+        if ref is None:
+            await asyncio.to_thread(
+                repo_cache.github_cache.put,
+                KIND_CONTENTS,
+                full_name,
+                path,
+                token,
+                contents,
+            )
+        return contents
+
+    async def expand(self, owner, repo, token, items, ref=None, strict=False):
+        """Every item below a listing, one directory level at a time.
+
+        Each level's directories are listed concurrently. A directory that
+        can't be listed is skipped, or raises when `strict`; running out of
+        quota always aborts the walk.
+        """
+        found = list(items)
+        dirs = [item["path"] for item in items if item["type"] == "dir"]
+        while dirs:
+            listings = await asyncio.gather(
+                *(self.get_repo_contents(owner, repo, token, d, ref) for d in dirs),
+                return_exceptions=True,
+            )
+            next_dirs = []
+            for listing in listings:
+                if isinstance(listing, RateLimitExceeded):
+                    raise listing
+                if isinstance(listing, Exception):
+                    if strict:
+                        raise listing
+                    print(f"Error fetching repository contents: {listing}")
+                    continue
+                if not isinstance(listing, list):
+                    listing = [listing]
+                found.extend(listing)
+                next_dirs.extend(i["path"] for i in listing if i["type"] == "dir")
+            dirs = next_dirs
+        return found
+
+    async def walk(self, owner, repo, token, path="", ref=None, strict=False):
+        """Every file and directory under path (a file path yields just that file)."""
+        contents = await self.get_repo_contents(owner, repo, token, path, ref)
+        if not isinstance(contents, list):
+            return [contents]
+        return await self.expand(owner, repo, token, contents, ref, strict)
+
+    async def fetch_file(self, url, token, ref=None):
+        """Raw bytes of a contents API URL at `ref`; raises if GitHub won't serve it."""
+        headers = {"Accept": "application/vnd.github.v3.raw"}
+        params = {"ref": ref} if ref else None
+        response = await self.get(url, token, headers=headers, params=params)
+        if response.status_code != 200:
+            raise Exception(f"GitHub API error: {response.status_code} for {url}")
+        return response.content
+
+    async def fetch_files(self, urls, token, ref=None):
+        """Bytes of every URL, in order; raises the first failure once all are done."""
+        results = await asyncio.gather(
+            *(self.fetch_file(url, token, ref) for url in urls), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+
+loop_thread = LoopThread()
+client = AsyncGitHub()
+
+
+def run(coro, timeout=GITHUB_RUN_TIMEOUT_SECONDS):
+    """Run a coroutine from sync code (e.g. a Flask view) on the shared loop."""
+    return loop_thread.run(coro, timeout)
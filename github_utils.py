@@ -0,0 +1,325 @@
+# github_utils.py
+import contextvars
+import hashlib
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import metrics
+import request_timing
+
+load_dotenv()
+
+PRIORITY_HIGH = "high"  # interactive page loads
+PRIORITY_LOW = "low"  # archive builds and other bulk work that can be retried
+
+# Low priority calls are shed once a token has this few requests left
+GITHUB_LOW_PRIORITY_RESERVE = int(os.getenv("GITHUB_LOW_PRIORITY_RESERVE", 500))
+# Longest an interactive request waits out a backoff before giving up
+GITHUB_MAX_WAIT_SECONDS = float(os.getenv("GITHUB_MAX_WAIT_SECONDS", 5))
+
+# Workers re-read shared quota at most this often per token
+STATE_REFRESH_SECONDS = 1.0
+# Far from the limit workers don't need to coordinate, so quota is only
+# published to Mongo once it drops below this
+SHARE_BELOW_REMAINING = GITHUB_LOW_PRIORITY_RESERVE * 2
+
+# Secondary limits without Retry-After: wait a minute, doubling on repeats
+SECONDARY_BACKOFF_SECONDS = 60
+SECONDARY_BACKOFF_MAX_SECONDS = 15 * 60
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+rate_limits = db["github_rate_limits"]
+
+_priority = contextvars.ContextVar("github_priority", default=PRIORITY_HIGH)
+
+
+class RateLimitExceeded(Exception):
+    """GitHub quota for a token is exhausted or the call was shed."""
+
+    def __init__(self, retry_after, message=None):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            message or f"GitHub rate limit reached, retry in {self.retry_after}s"
+        )
+
+
+@contextmanager
+def github_priority(priority):
+    """Run the enclosed GitHub calls at the given priority."""
+    reset_token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(reset_token)
+
+
+def current_priority():
+    """Priority that GitHub calls made here would run at."""
+    return _priority.get()
+
+
+def token_key(token) -> str:
+    """Identify a token in shared state without storing the token itself."""
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_secondary_limit(response) -> bool:
+    try:
+        return "secondary rate limit" in response.text.lower()
+    except Exception:
+        return False
+
+
+class RateLimitGovernor:
+    """Track GitHub quota per access token and gate calls against it.
+
+    State lives in-process and, when a collection is given, is shared with
+    other workers through Mongo: each worker publishes what GitHub reports
+    in X-RateLimit-* / Retry-After and merges what the others saw.
+    """
+
+    def __init__(self, collection=None, clock=time.time, sleep=time.sleep):
+        self.collection = collection
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._states = {}
+        self._synced = {}
+
+    def _state(self, key) -> dict:
+        now = self.clock()
+        with self._lock:
+            state = self._states.setdefault(key, {})
+            if self.collection is None or now - self._synced.get(key, 0) < STATE_REFRESH_SECONDS:
+                return state
+            self._synced[key] = now
+
+        try:
+            shared = self.collection.find_one({"_id": key})
+        except PyMongoError as e:
+            print(f"[github] shared rate limit state unavailable: {e}")
+            shared = None
+
+        if shared:
+            with self._lock:
+                _merge(state, shared)
+        return state
+
+    def acquire(self, token, priority=PRIORITY_HIGH):
+        """Wait for or refuse a call; raises RateLimitExceeded when shed."""
+        key = token_key(token)
+        while True:
+            state = self._state(key)
+            now = self.clock()
+            wait = 0
+
+            if state.get("blocked_until", 0) > now:
+                wait = state["blocked_until"] - now
+            elif state.get("remaining") is not None and state.get("reset_at", 0) > now:
+                until_reset = state["reset_at"] - now
+                if priority == PRIORITY_LOW and state["remaining"] <= GITHUB_LOW_PRIORITY_RESERVE:
+                    raise RateLimitExceeded(
+                        until_reset, "GitHub quota is reserved for interactive requests"
+                    )
+                if state["remaining"] <= 0:
+                    wait = until_reset
+
+            if wait <= 0:
+                with self._lock:
+                    if state.get("remaining") is not None:
+                        # Count this call now so concurrent threads see it
+                        state["remaining"] -= 1
+                return
+
+            if priority == PRIORITY_LOW or wait > GITHUB_MAX_WAIT_SECONDS:
+                raise RateLimitExceeded(wait)
+            self.sleep(wait)
+
+    def record(self, token, response):
+        """Update quota from a GitHub response.
+
+        Returns the seconds to back off if the response was rate limited,
+        otherwise None.
+        """
+        key = token_key(token)
+        headers = response.headers
+        now = self.clock()
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        reset_at = _int_header(headers, "X-RateLimit-Reset")
+        retry_after = _int_header(headers, "Retry-After")
+        metrics.observe_github(key, response, remaining)
+        state = self._state(key)
+
+        update = {}
+        if remaining is not None and reset_at is not None:
+            update["remaining"] = remaining
+            update["reset_at"] = reset_at
+
+        limited = response.status_code in (403, 429) and (
+            retry_after is not None or remaining == 0 or _is_secondary_limit(response)
+        )
+        if limited:
+            if retry_after is not None:
+                blocked_until = now + retry_after
+            elif remaining == 0 and reset_at:
+                blocked_until = reset_at
+            else:
+                strikes = state.get("strikes", 0) + 1
+                update["strikes"] = strikes
+                blocked_until = now + min(
+                    SECONDARY_BACKOFF_SECONDS * 2 ** (strikes - 1),
+                    SECONDARY_BACKOFF_MAX_SECONDS,
+                )
+            update["blocked_until"] = blocked_until
+        elif state.get("strikes") and response.status_code < 400:
+            update["strikes"] = 0
+
+        if not update:
+            return None
+
+        with self._lock:
+            state.update(update)
+
+        share = limited or "strikes" in update or (
+            remaining is not None and remaining < SHARE_BELOW_REMAINING
+        )
+        if share and self.collection is not None:
+            update["updated_at"] = now
+            try:
+                self.collection.update_one({"_id": key}, {"$set": update}, upsert=True)
+            except PyMongoError as e:
+                print(f"[github] could not share rate limit state: {e}")
+
+        return max(blocked_until - now, 0) if limited else None
+
+
+def _merge(state, shared):
+    """Fold another worker's view into ours, keeping the more cautious values."""
+    if shared.get("reset_at") is not None:
+        if shared["reset_at"] > state.get("reset_at", 0):
+            state["reset_at"] = shared["reset_at"]
+            state["remaining"] = shared.get("remaining")
+        elif shared["reset_at"] == state.get("reset_at") and shared.get("remaining") is not None:
+            state["remaining"] = min(state.get("remaining", shared["remaining"]), shared["remaining"])
+    if shared.get("blocked_until", 0) > state.get("blocked_until", 0):
+        state["blocked_until"] = shared["blocked_until"]
+    if "strikes" in shared:
+        state["strikes"] = max(state.get("strikes", 0), shared["strikes"])
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Let concurrent callers with the same key share one call and its outcome.
+
+    Nothing is cached: once the call finishes, the next caller with that key
+    starts a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+governor = RateLimitGovernor(rate_limits)
+inflight = SingleFlight()
+
+
+def _freeze(mapping):
+    return tuple(sorted((mapping or {}).items()))
+
+
+def github_get(url, token=None, headers=None, priority=None, **kwargs):
+    """GET a GitHub URL through the rate-limit governor.
+
+    Identical concurrent GETs from this worker share one upstream call
+    (streamed bodies can't be shared, so those always go out on their own).
+    Raises RateLimitExceeded when the call is shed or GitHub answers with a
+    primary/secondary rate limit; other statuses are left to the caller.
+    """
+    priority = priority or current_priority()
+    if kwargs.get("stream"):
+        return _governed_get(url, token, headers, priority, **kwargs)
+
+    key = (
+        url,
+        token_key(token),
+        priority,
+        _freeze(headers),
+        _freeze(kwargs.get("params")),
+        _freeze({k: v for k, v in kwargs.items() if k != "params"}),
+    )
+    return inflight.do(
+        key, lambda: _governed_get(url, token, headers, priority, **kwargs)
+    )
+
+
+def _governed_get(url, token, headers, priority, **kwargs):
+    governor.acquire(token, priority)
+
+    headers = dict(headers or {})
+    if token:
+        headers.setdefault("Authorization", f"token {token}")
+    with request_timing.timed("github"):
+        response = requests.get(url, headers=headers, **kwargs)
+
+    retry_after = governor.record(token, response)
+    if retry_after is not None:
+        response.close()
+        raise RateLimitExceeded(retry_after)
+    return response
@@ -0,0 +1,128 @@
+# http_utils.py
+import hashlib
+import mimetypes
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+
+from flask import Response, jsonify, make_response, request, stream_with_context
+
+STREAM_CHUNK_SIZE = 64 * 1024
+RAW_FILE_MAX_AGE = 300  # seconds a browser may reuse a streamed repo file
+
+# Pages are per-user and must be revalidated, but a matching ETag costs a 304
+PAGE_CACHE_CONTROL = "private, no-cache"
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+# Upstream headers that stay valid when the body is relayed byte for byte
+PASSTHROUGH_HEADERS = ("Content-Length", "Content-Range", "ETag", "Last-Modified")
+
+
+def content_disposition(disposition: str, filename: str) -> str:
+    """A Content-Disposition value that is valid for any file name.
+
+    Like Flask's send_file: an ASCII fallback in filename= (quotes escaped,
+    control characters dropped) plus the exact name as RFC 5987
+    filename*=UTF-8''... when it isn't plain ASCII.
+    """
+    filename = "".join(ch for ch in filename if ch.isprintable())
+    fallback = (
+        unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    )
+    fallback = fallback.replace("\\", "\\\\").replace('"', '\\"') or "download"
+    value = f'{disposition}; filename="{fallback}"'
+    if not filename.isascii():
+        value += f"; filename*=UTF-8''{quote(filename, safe='')}"
+    return value
+
+
+def relay_upstream(upstream, filename, as_attachment=False, max_age=RAW_FILE_MAX_AGE):
+    """Stream an upstream `requests` response to the client chunk by chunk.
+
+    The status (200, 206 or 416) and range headers are passed through, so the
+    browser can fetch large files progressively without the server holding
+    the whole body in memory.
+    """
+
+    def generate():
+        try:
+            for chunk in upstream.iter_content(STREAM_CHUNK_SIZE):
+                if chunk:
+                    yield chunk
+        finally:
+            upstream.close()
+
+    headers = {
+        name: upstream.headers[name]
+        for name in PASSTHROUGH_HEADERS
+        if name in upstream.headers
+    }
+    headers["Content-Type"] = (
+        mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    )
+    headers["Accept-Ranges"] = "bytes"
+    headers["Cache-Control"] = f"private, max-age={max_age}"
+    disposition = "attachment" if as_attachment else "inline"
+    headers["Content-Disposition"] = content_disposition(disposition, filename)
+
+    return Response(
+        stream_with_context(generate()),
+        status=upstream.status_code,
+        headers=headers,
+        direct_passthrough=True,
+    )
+
+
+@lru_cache(maxsize=None)
+def template_version(template_name: str) -> str:
+    """Short hash of a page template and base.html, so deploys change page ETags."""
+    digest = hashlib.sha256()
+    for name in (template_name, "base.html"):
+        try:
+            digest.update((TEMPLATE_DIR / name).read_bytes())
+        except FileNotFoundError:
+            digest.update(name.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def page_etag(template_name: str, *parts) -> str:
+    """Build a page validator from the template version and what the page shows."""
+    digest = hashlib.sha256(template_version(template_name).encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(str(part).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def not_modified(etag: str) -> Response | None:
+    """Return a 304 response if the client's If-None-Match matches, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return response
+
+
+def conditional_page(body, etag: str) -> Response:
+    """Wrap a rendered page with its ETag and private revalidation headers."""
+    response = make_response(body)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return response
+
+
+def rate_limited_response(exc, as_json=False) -> Response:
+    """503 with Retry-After for a GitHub call that hit (or was shed by) the rate limit."""
+    message = (
+        "GitHub is busy right now, please try again "
+        f"in {exc.retry_after} seconds."
+    )
+    if as_json:
+        response = jsonify({"error": message, "retry_after": exc.retry_after})
+    else:
+        response = make_response(message)
+    response.status_code = 503
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
@@ -0,0 +1,223 @@
+# jobs.py
+import importlib
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+from pymongo.errors import PyMongoError
+
+load_dotenv()
+
+# Worker threads started inside the web process (0 = only external workers)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1))
+JOB_ARTIFACT_DIR = os.getenv(
+    "JOB_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "darkspace-jobs")
+)
+# Finished jobs (and their files) are kept this long
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", 3600))
+# How often an idle worker checks the queue for jobs queued by other processes
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+# A running job that hasn't reported progress for this long lost its worker
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 1800))
+
+# Modules that register handlers; worker processes import them on start
+HANDLER_MODULES = ("submission_export", "email_utils")
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+jobs_collection = db["jobs"]
+
+_handlers = {}
+_wakeup = threading.Event()
+_workers = []
+
+
+def handler(kind):
+    """Register the function that runs jobs of a kind: @handler("kind")."""
+
+    def register(func):
+        _handlers[kind] = func
+        return func
+
+    return register
+
+
+class Job:
+    """What a handler gets: the job's parameters and ways to report back."""
+
+    def __init__(self, doc):
+        self.id = doc["_id"]
+        self.kind = doc["kind"]
+        self.owner = doc.get("owner")
+        self.params = doc.get("params") or {}
+        self.artifact = None
+
+    def progress(self, done, total=None):
+        fields = {"done": done, "updated_at": time.time()}
+        if total is not None:
+            fields["total"] = total
+        jobs_collection.update_one({"_id": self.id}, {"$set": fields})
+
+    def artifact_path(self, suffix=""):
+        """Where to write the job's result file; served once the job is done."""
+        os.makedirs(JOB_ARTIFACT_DIR, exist_ok=True)
+        self.artifact = os.path.join(JOB_ARTIFACT_DIR, f"{self.id}{suffix}")
+        return self.artifact
+
+
+def enqueue(kind, owner, params=None, download_name=None):
+    """Queue a job and return its id."""
+    now = time.time()
+    job_id = uuid.uuid4().hex
+    jobs_collection.insert_one(
+        {
+            "_id": job_id,
+            "kind": kind,
+            "owner": owner,
+            "params": params or {},
+            "state": STATE_QUEUED,
+            "done": 0,
+            "total": None,
+            "error": None,
+            "artifact": None,
+            "download_name": download_name,
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    _wakeup.set()
+    return job_id
+
+
+def get_job(job_id):
+    return jobs_collection.find_one({"_id": job_id})
+
+
+def claim():
+    """Atomically take the oldest queued job, or None."""
+    now = time.time()
+    return jobs_collection.find_one_and_update(
+        {"state": STATE_QUEUED},
+        {
+            "$set": {
+                "state": STATE_RUNNING,
+                "worker": f"{socket.gethostname()}:{os.getpid()}",
+                "started_at": now,
+                "updated_at": now,
+            }
+        },
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def run_job(doc):
+    """Run a claimed job and record how it ended."""
+    job = Job(doc)
+    func = _handlers.get(job.kind)
+    try:
+        if func is None:
+            raise Exception(f"No handler for job kind {job.kind!r}")
+        func(job)
+    except Exception as e:
+        print(f"[jobs] {job.kind} {job.id} failed: {e}")
+        if job.artifact and os.path.exists(job.artifact):
+            os.remove(job.artifact)
+        _finish(job.id, state=STATE_FAILED, error=str(e))
+    else:
+        _finish(job.id, state=STATE_DONE, artifact=job.artifact)
+
+
+def _finish(job_id, **fields):
+    now = time.time()
+    fields.update(finished_at=now, updated_at=now, expires_at=now + JOB_TTL_SECONDS)
+    jobs_collection.update_one({"_id": job_id}, {"$set": fields})
+
+
+def work(stop=None):
+    """Claim and run jobs until stop is set; sleeps while the queue is empty."""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            doc = claim()
+        except Exception as e:
+            print(f"[jobs] queue unavailable: {e}")
+            doc = None
+        if doc is None:
+            _wakeup.wait(JOB_POLL_SECONDS)
+            _wakeup.clear()
+            continue
+        run_job(doc)
+
+
+def start_workers(count=JOB_WORKERS):
+    """Start worker threads in this process."""
+    if count > 0:
+        try:
+            ensure_indexes()
+        except PyMongoError as e:
+            print(f"[jobs] could not create indexes: {e}")
+    for i in range(count - len(_workers)):
+        thread = threading.Thread(target=work, name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        _workers.append(thread)
+
+
+def cleanup_jobs(now=None):
+    """Delete expired jobs and their files; fail running jobs whose worker died."""
+    now = now or time.time()
+    jobs_collection.update_many(
+        {"state": STATE_RUNNING, "updated_at": {"$lt": now - JOB_STALE_SECONDS}},
+        {
+            "$set": {
+                "state": STATE_FAILED,
+                "error": "The worker running this job stopped",
+                "finished_at": now,
+                "expires_at": now + JOB_TTL_SECONDS,
+            }
+        },
+    )
+    expired = list(
+        jobs_collection.find({"expires_at": {"$lt": now}}, {"artifact": 1})
+    )
+    for doc in expired:
+        path = doc.get("artifact")
+        if path and os.path.exists(path):
+            os.remove(path)
+    if expired:
+        jobs_collection.delete_many({"_id": {"$in": [doc["_id"] for doc in expired]}})
+    return len(expired)
+
+
+def ensure_indexes():
+    jobs_collection.create_index([("state", ASCENDING), ("created_at", ASCENDING)])
+    jobs_collection.create_index("expires_at")
+
+
+def main():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    ensure_indexes()
+    print(f"[jobs] worker {os.getpid()} started with {sorted(_handlers)}")
+    try:
+        work()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    # Handlers register on the importable module, not on __main__
+    import jobs
+
+    jobs.main()
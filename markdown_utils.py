@@ -0,0 +1,110 @@
+# markdown_utils.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import markdown as md
+
+import metrics
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "codehilite"]
+MARKDOWN_EXTENSION_CONFIGS = {
+    # Pygments does the highlighting server-side; no language guessing so plain
+    # fences stay cheap and deterministic
+    "codehilite": {"css_class": "codehilite", "guess_lang": False},
+}
+
+RENDER_CACHE_MAX_BYTES = int(os.getenv("MARKDOWN_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+RENDER_CACHE_MAX_ENTRY_BYTES = int(
+    os.getenv("MARKDOWN_CACHE_MAX_ENTRY_BYTES", 1024 * 1024)
+)
+
+
+class RenderCache:
+    """LRU cache of rendered HTML keyed by content hash, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (html, size)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, html: str) -> None:
+        size = len(html.encode("utf-8"))
+        # Oversized documents are rendered but never cached
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old[1]
+            self._entries[key] = (html, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+render_cache = RenderCache(RENDER_CACHE_MAX_BYTES, RENDER_CACHE_MAX_ENTRY_BYTES)
+
+# Markdown instances are not thread-safe, so each thread keeps its own and
+# resets it between documents instead of rebuilding the extensions every call
+_local = threading.local()
+
+
+def _get_renderer(breaks: bool = False) -> md.Markdown:
+    name = "breaks_renderer" if breaks else "renderer"
+    renderer = getattr(_local, name, None)
+    if renderer is None:
+        extensions = MARKDOWN_EXTENSIONS + (["nl2br"] if breaks else [])
+        renderer = md.Markdown(
+            extensions=extensions,
+            extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+        )
+        setattr(_local, name, renderer)
+    return renderer
+
+
+def content_hash(text: str) -> str:
+    """Return the cache key for a markdown document."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render_markdown(text: str | None, breaks: bool = False) -> str:
+    """Render markdown to HTML, reusing cached output for identical content.
+
+    With breaks=True single newlines become <br>, as submission READMEs
+    were always shown (GitHub comment style).
+    """
+    if not text:
+        return ""
+
+    key = content_hash(text) + (":breaks" if breaks else "")
+    html = render_cache.get(key)
+    metrics.cache_lookup("markdown", html is not None)
+    if html is None:
+        html = _get_renderer(breaks).reset().convert(text)
+        render_cache.put(key, html)
+    return html
@@ -0,0 +1,282 @@
+# metrics.py
+import functools
+import hmac
+import os
+import time
+from datetime import timedelta
+
+from flask import Response, g, request
+from pymongo import monitoring
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # metrics are simply not collected without it
+    prometheus_client = None
+
+# Bearer token required to scrape /metrics; without one the endpoint is off,
+# since it exposes per-route traffic and queue depths
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Set (to an empty, writable directory) when running several worker
+# processes, e.g. under gunicorn; every process then writes its samples
+# there and /metrics adds them up
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+registry = None
+if prometheus_client is not None:
+    registry = CollectorRegistry()
+
+    REQUEST_SECONDS = Histogram(
+        "darkspace_request_duration_seconds",
+        "Time to produce a response, by endpoint.",
+        ["endpoint", "method", "status"],
+        registry=registry,
+    )
+    GITHUB_REQUESTS = Counter(
+        "darkspace_github_requests_total",
+        "GitHub API responses, by status code.",
+        ["status"],
+        registry=registry,
+    )
+    GITHUB_SECONDS = Histogram(
+        "darkspace_github_request_duration_seconds",
+        "Time until GitHub answered a request.",
+        registry=registry,
+    )
+    GITHUB_REMAINING = Gauge(
+        "darkspace_github_rate_limit_remaining",
+        "Requests left in the current rate-limit window, by token.",
+        ["token"],
+        multiprocess_mode="mostrecent",
+        registry=registry,
+    )
+    CACHE_LOOKUPS = Counter(
+        "darkspace_cache_lookups_total",
+        "Cache lookups, by cache and whether they hit.",
+        ["cache", "result"],
+        registry=registry,
+    )
+    SCHEDULER_JOB_SECONDS = Histogram(
+        "darkspace_scheduler_job_duration_seconds",
+        "Run time of scheduled jobs.",
+        ["job"],
+        buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, float("inf")),
+        registry=registry,
+    )
+    MONGO_CONNECTIONS = Gauge(
+        "darkspace_mongo_pool_connections",
+        "Open Mongo connections.",
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+    MONGO_CHECKED_OUT = Gauge(
+        "darkspace_mongo_pool_checked_out",
+        "Mongo connections currently in use.",
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+    MONGO_CHECKOUT_SECONDS = Histogram(
+        "darkspace_mongo_pool_checkout_seconds",
+        "Time spent waiting for a Mongo connection.",
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, float("inf")),
+        registry=registry,
+    )
+    MONGO_CHECKOUT_FAILURES = Counter(
+        "darkspace_mongo_pool_checkout_failures_total",
+        "Mongo connection check-outs that failed.",
+        ["reason"],
+        registry=registry,
+    )
+
+
+def observe_request(endpoint, method, status, seconds):
+    if registry is not None:
+        REQUEST_SECONDS.labels(endpoint, method, str(status)).observe(seconds)
+
+
+def observe_github(key, response, remaining):
+    """Count a GitHub response; key identifies the token (never the token itself)."""
+    if registry is None:
+        return
+    GITHUB_REQUESTS.labels(str(response.status_code)).inc()
+    elapsed = getattr(response, "elapsed", None)
+    if isinstance(elapsed, timedelta):
+        GITHUB_SECONDS.observe(elapsed.total_seconds())
+    if remaining is not None:
+        GITHUB_REMAINING.labels(key[:12]).set(remaining)
+
+
+def cache_lookup(cache, hit):
+    if registry is not None:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def track_job(name):
+    """Decorator recording how long a scheduled job runs."""
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if registry is not None:
+                    SCHEDULER_JOB_SECONDS.labels(name).observe(
+                        time.perf_counter() - started
+                    )
+
+        return wrapper
+
+    return decorate
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Keeps the Mongo pool gauges in step with pymongo's pool events."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        MONGO_CHECKED_OUT.inc()
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            MONGO_CHECKOUT_SECONDS.observe(duration)
+
+    def connection_checked_in(self, event):
+        MONGO_CHECKED_OUT.dec()
+
+
+if registry is not None:
+    # Like the timing listener, this must be registered before clients exist
+    monitoring.register(PoolMetricsListener())
+
+
+class JobQueueCollector:
+    """Background job backlog, read from the jobs collection at scrape time."""
+
+    def collect(self):
+        # Imported here: both open a MongoClient, which must not happen
+        # before the pool listener above is registered
+        import jobs
+        from email_utils import BULK_MAIL_JOB
+
+        queued = GaugeMetricFamily(
+            "darkspace_jobs", "Unfinished background jobs.", labels=["kind", "state"]
+        )
+        outbox = GaugeMetricFamily(
+            "darkspace_mail_outbox_messages", "Queued mail not sent yet."
+        )
+        pending = {"state": {"$in": [jobs.STATE_QUEUED, jobs.STATE_RUNNING]}}
+        for row in jobs.jobs_collection.aggregate(
+            [
+                {"$match": pending},
+                {"$group": {"_id": {"kind": "$kind", "state": "$state"}, "n": {"$sum": 1}}},
+            ]
+        ):
+            queued.add_metric([row["_id"]["kind"], row["_id"]["state"]], row["n"])
+
+        unsent = 0
+        for row in jobs.jobs_collection.aggregate(
+            [
+                {"$match": dict(pending, kind=BULK_MAIL_JOB)},
+                {
+                    "$group": {
+                        "_id": None,
+                        "n": {
+                            "$sum": {
+                                "$subtract": [
+                                    {"$size": {"$ifNull": ["$params.recipients", []]}},
+                                    {"$ifNull": ["$done", 0]},
+                                ]
+                            }
+                        },
+                    }
+                },
+            ]
+        ):
+            unsent = row["n"]
+        outbox.add_metric([], unsent)
+        return [queued, outbox]
+
+
+def render():
+    """The exposition text for every metric (all processes in multiprocess mode)."""
+    if MULTIPROC_DIR:
+        scraped = CollectorRegistry()
+        multiprocess.MultiProcessCollector(scraped, path=MULTIPROC_DIR)
+    else:
+        scraped = registry
+    queue = CollectorRegistry()
+    queue.register(JobQueueCollector())
+    try:
+        backlog = prometheus_client.generate_latest(queue)
+    except Exception as e:
+        print(f"[metrics] job backlog unavailable: {e}")
+        backlog = b""
+    return prometheus_client.generate_latest(scraped) + backlog
+
+
+def mark_process_dead(pid):
+    """Call from gunicorn's child_exit hook so live gauges drop exited workers."""
+    if registry is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+
+def _start():
+    g.metrics_started = time.perf_counter()
+
+
+def _finish(response):
+    started = g.get("metrics_started")
+    if started is not None:
+        # Unmatched URLs share one label so scanners can't blow up the series
+        endpoint = request.endpoint or "unmatched"
+        observe_request(
+            endpoint, request.method, response.status_code, time.perf_counter() - started
+        )
+    return response
+
+
+def metrics_view():
+    if registry is None:
+        return "prometheus_client is not installed", 404
+    if not METRICS_TOKEN:
+        return "Set METRICS_TOKEN to enable /metrics", 403
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}"):
+        return "Unauthorized", 401
+    return Response(render(), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """Record request latencies and serve /metrics."""
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
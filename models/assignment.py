@@ -2,6 +2,18 @@
 from pymongo.collection import Collection
 from bson.objectid import ObjectId
 from datetime import datetime
+from .pagination import PAGE_SIZE, keyset_page, summarize, summary_projection
+
+# Fields the assignment lists show
+LIST_FIELDS = (
+    "teacher_id",
+    "title",
+    "due_date",
+    "github_repo_url",
+    "github_repo_path",
+    "course_id",
+    "created_at",
+)
 
 
 class AssignmentModel:
@@ -16,15 +28,18 @@ class AssignmentModel:
         due_date: str,
         github_repo_url: str = None,
         github_repo_path: str = None,
+        course_id: str = None,
     ) -> str:
         """Create a new assignment"""
         assignment = {
             "teacher_id": teacher_id,
             "title": title,
             "description": description,
+            "summary": summarize(description),
             "due_date": due_date,
             "github_repo_url": github_repo_url,
             "github_repo_path": github_repo_path,  # Added new field for repository path
+            "course_id": course_id,  # None: visible to every student
             "created_at": datetime.now(),
             "reminder_sent": False,
         }
@@ -45,8 +60,29 @@ class AssignmentModel:
         """Find all assignments"""
         return list(self.collection.find().sort("created_at", -1))
 
+    def get_assignments_page(
+        self,
+        scope: dict = None,
+        after: str = None,
+        before: str = None,
+        limit: int = PAGE_SIZE,
+    ) -> dict:
+        """One page of assignments matching scope (default all), newest first"""
+        return keyset_page(
+            self.collection,
+            scope or {},
+            summary_projection(LIST_FIELDS),
+            after,
+            before,
+            limit,
+        )
+
     def update_assignment(self, assignment_id: str, update_data: dict) -> bool:
         """Update assignment information"""
+        if "description" in update_data:
+            update_data = dict(
+                update_data, summary=summarize(update_data["description"])
+            )
         result = self.collection.update_one(
             {"_id": ObjectId(assignment_id)}, {"$set": update_data}
         )
@@ -56,3 +92,11 @@ class AssignmentModel:
         """Delete assignment"""
         result = self.collection.delete_one({"_id": ObjectId(assignment_id)})
         return result.deleted_count > 0
+
+    def ensure_indexes(self):
+        """Indexes behind the paged and per-teacher lists"""
+        self.collection.create_index([("created_at", -1), ("_id", -1)])
+        self.collection.create_index([("teacher_id", 1), ("created_at", -1)])
+        self.collection.create_index(
+            [("course_id", 1), ("created_at", -1), ("_id", -1)]
+        )
@@ -2,6 +2,17 @@
 from pymongo.collection import Collection
 from bson.objectid import ObjectId
 from datetime import datetime
+from .pagination import PAGE_SIZE, keyset_page, summarize, summary_projection
+
+# Fields the content lists show
+LIST_FIELDS = (
+    "teacher_id",
+    "title",
+    "github_repo_url",
+    "github_repo_path",
+    "course_id",
+    "created_at",
+)
 
 
 class ContentModel:
@@ -15,14 +26,17 @@ class ContentModel:
         description: str,
         github_repo_url: str = None,
         github_repo_path: str = None,
+        course_id: str = None,
     ) -> str:
         """Create a new content item"""
         content = {
             "teacher_id": teacher_id,
             "title": title,
             "description": description,
+            "summary": summarize(description),
             "github_repo_url": github_repo_url,
             "github_repo_path": github_repo_path,
+            "course_id": course_id,  # None: visible to every student
             "created_at": datetime.now(),
         }
         result = self.collection.insert_one(content)
@@ -42,8 +56,29 @@ class ContentModel:
         """Find all content"""
         return list(self.collection.find().sort("created_at", -1))
 
+    def get_content_page(
+        self,
+        scope: dict = None,
+        after: str = None,
+        before: str = None,
+        limit: int = PAGE_SIZE,
+    ) -> dict:
+        """One page of content matching scope (default all), newest first"""
+        return keyset_page(
+            self.collection,
+            scope or {},
+            summary_projection(LIST_FIELDS),
+            after,
+            before,
+            limit,
+        )
+
     def update_content(self, content_id: str, update_data: dict) -> bool:
         """Update content information"""
+        if "description" in update_data:
+            update_data = dict(
+                update_data, summary=summarize(update_data["description"])
+            )
         result = self.collection.update_one(
             {"_id": ObjectId(content_id)}, {"$set": update_data}
         )
@@ -53,3 +88,11 @@ class ContentModel:
         """Delete content"""
         result = self.collection.delete_one({"_id": ObjectId(content_id)})
         return result.deleted_count > 0
+
+    def ensure_indexes(self):
+        """Indexes behind the paged and per-teacher lists"""
+        self.collection.create_index([("created_at", -1), ("_id", -1)])
+        self.collection.create_index([("teacher_id", 1), ("created_at", -1)])
+        self.collection.create_index(
+            [("course_id", 1), ("created_at", -1), ("_id", -1)]
+        )
@@ -0,0 +1,36 @@
+# course.py
+from pymongo.collection import Collection
+from bson.objectid import ObjectId
+from datetime import datetime
+
+
+class CourseModel:
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def create_course(self, teacher_id: str, name: str, code: str = None) -> str:
+        """Create a new course (one section of a class)"""
+        course = {
+            "teacher_id": teacher_id,
+            "name": name,
+            "code": code,
+            "created_at": datetime.now(),
+        }
+        result = self.collection.insert_one(course)
+        return str(result.inserted_id)
+
+    def get_course(self, course_id: str) -> dict | None:
+        """Find course by ID"""
+        return self.collection.find_one({"_id": ObjectId(course_id)})
+
+    def get_teacher_courses(self, teacher_id: str) -> list:
+        """Find all courses taught by a teacher"""
+        return list(self.collection.find({"teacher_id": teacher_id}).sort("name", 1))
+
+    def get_courses(self, course_ids: list) -> list:
+        """Find the given courses"""
+        ids = [ObjectId(course_id) for course_id in course_ids]
+        return list(self.collection.find({"_id": {"$in": ids}}).sort("name", 1))
+
+    def ensure_indexes(self):
+        self.collection.create_index("teacher_id")
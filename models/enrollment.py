@@ -0,0 +1,64 @@
+# enrollment.py
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+
+
+class EnrollmentModel:
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def enroll(self, course_id: str, student_id: str) -> bool:
+        """Add a student to a course; False if they were already in it"""
+        try:
+            self.collection.insert_one(
+                {
+                    "course_id": course_id,
+                    "student_id": student_id,
+                    "enrolled_at": datetime.now(),
+                }
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def unenroll(self, course_id: str, student_id: str) -> bool:
+        """Remove a student from a course"""
+        result = self.collection.delete_one(
+            {"course_id": course_id, "student_id": student_id}
+        )
+        return result.deleted_count > 0
+
+    def is_enrolled(self, course_id: str, student_id: str) -> bool:
+        """Whether a student is in a course"""
+        return (
+            self.collection.find_one(
+                {"course_id": course_id, "student_id": student_id}, {"_id": 1}
+            )
+            is not None
+        )
+
+    def get_student_course_ids(self, student_id: str) -> list:
+        """IDs of the courses a student is enrolled in"""
+        return [
+            doc["course_id"]
+            for doc in self.collection.find(
+                {"student_id": student_id}, {"course_id": 1, "_id": 0}
+            )
+        ]
+
+    def get_course_student_ids(self, course_id: str) -> list:
+        """IDs of the students enrolled in a course"""
+        return [
+            doc["student_id"]
+            for doc in self.collection.find(
+                {"course_id": course_id}, {"student_id": 1, "_id": 0}
+            )
+        ]
+
+    def ensure_indexes(self):
+        # The unique pair serves roster lookups; student_id serves "my courses"
+        self.collection.create_index(
+            [("course_id", 1), ("student_id", 1)], unique=True
+        )
+        self.collection.create_index("student_id")
@@ -0,0 +1,110 @@
+# pagination.py
+import base64
+from datetime import datetime
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Lists only show the start of a description; that much is stored as
+# "summary" so list queries can leave the description out
+SUMMARY_CHARS = 200
+
+
+def summarize(description) -> str:
+    return (description or "")[:SUMMARY_CHARS]
+
+
+def summary_projection(fields) -> dict:
+    """Project `fields` and the summary, leaving out the full description."""
+    projection = {field: 1 for field in fields}
+    projection["summary"] = 1
+    return projection
+
+
+def backfill_summaries(collection) -> int:
+    """Add summaries to documents written before they existed; returns how many."""
+    filled = 0
+    missing = collection.find({"summary": {"$exists": False}}, {"description": 1})
+    for doc in missing:
+        collection.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"summary": summarize(doc.get("description"))}},
+        )
+        filled += 1
+    return filled
+
+
+def encode_cursor(doc) -> str:
+    """An opaque page token pointing just past `doc` in (created_at, _id) order."""
+    key = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """(created_at, _id) from a page token, or None if it is not valid."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, _id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), ObjectId(_id)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        return None
+
+
+def _beyond(key, older: bool) -> dict:
+    created_at, _id = key
+    op = "$lt" if older else "$gt"
+    return {
+        "$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: _id}},
+        ]
+    }
+
+
+def keyset_page(
+    collection, query, projection, after=None, before=None, limit=PAGE_SIZE
+):
+    """One page of `query`, newest first, with tokens for the pages around it.
+
+    Pages are found with an index range on (created_at, _id) instead of
+    skipping, so every page costs the same. Returns a dict with "items",
+    "next" (older items) and "prev" (newer items); tokens are None at
+    either end.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+    filters = [query] if query else []
+    if before_key:
+        filters.append(_beyond(before_key, older=False))
+        order = ASCENDING
+    else:
+        if after_key:
+            filters.append(_beyond(after_key, older=True))
+        order = DESCENDING
+
+    where = {"$and": filters} if len(filters) > 1 else (filters[0] if filters else {})
+    docs = list(
+        collection.find(where, projection)
+        .sort([("created_at", order), ("_id", order)])
+        .limit(limit + 1)
+    )
+    more = len(docs) > limit
+    docs = docs[:limit]
+    if before_key:
+        docs.reverse()
+
+    if before_key:
+        older, newer = bool(docs), more
+    else:
+        older, newer = more, bool(after_key)
+    return {
+        "items": docs,
+        "next": encode_cursor(docs[-1]) if docs and older else None,
+        "prev": encode_cursor(docs[0]) if docs and newer else None,
+    }
@@ -14,6 +14,7 @@ class SubmissionModel:
         assignment_id: str,
         github_link: str,
         readme_content: str = None,
+        commit_sha: str = None,
     ) -> str:
         """Submit an assignment"""
         submission = {
@@ -21,6 +22,7 @@ class SubmissionModel:
             "assignment_id": assignment_id,
             "github_link": github_link,
             "readme_content": readme_content,
+            "commit_sha": commit_sha,
             "submitted_at": datetime.now(),
             "grade": None,
             "feedback": None,
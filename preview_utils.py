@@ -0,0 +1,64 @@
+# preview_utils.py
+import os
+
+# How much of a file the preview page inlines, and how much each "load more" adds
+PREVIEW_MAX_BYTES = int(os.getenv("PREVIEW_MAX_BYTES", 256 * 1024))
+PREVIEW_CHUNK_BYTES = int(os.getenv("PREVIEW_CHUNK_BYTES", 256 * 1024))
+
+# Text files the preview page shows inline (markdown rendered, code highlighted)
+MARKDOWN_EXTENSIONS = [".md", ".markdown"]
+CODE_EXTENSIONS = [".py", ".c", ".cpp", ".h", ".js", ".html", ".css", ".java"]
+
+# Only this much of the head is inspected when sniffing for binary content
+BINARY_SNIFF_BYTES = 8192
+
+
+def looks_binary(data: bytes) -> bool:
+    """Guess whether file content is binary (NUL bytes or not UTF-8)."""
+    sample = data[:BINARY_SNIFF_BYTES]
+    if b"\0" in sample:
+        return True
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is fine
+        return e.start < len(sample) - 3
+    return False
+
+
+def line_aligned(data: bytes, at_eof: bool) -> bytes:
+    """Trim a chunk back to its last complete line unless it ends the file.
+
+    A chunk holding a single enormous line is returned whole so paging
+    always makes progress.
+    """
+    if at_eof:
+        return data
+    cut = data.rfind(b"\n")
+    if cut == -1:
+        return data
+    return data[: cut + 1]
+
+
+def preview_template(is_markdown: bool, size: int | None) -> str:
+    """The page a text file previews as: markdown is rendered if it fits whole."""
+    if is_markdown and size is not None and size <= PREVIEW_MAX_BYTES:
+        return "preview_markdown.html"
+    return "preview_code.html"
+
+
+def decode_text(data: bytes) -> str:
+    """Decode a (possibly mid-character) chunk for display."""
+    return data.decode("utf-8", errors="replace")
+
+
+def format_size(num_bytes: int | None) -> str:
+    """Human readable size used in the truncation banner."""
+    if num_bytes is None:
+        return "unknown size"
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
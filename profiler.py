@@ -0,0 +1,140 @@
+# profiler.py
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import tempfile
+import time
+import uuid
+
+from flask import Response, g, request
+
+try:
+    import pyinstrument
+except ImportError:  # falls back to cProfile
+    pyinstrument = None
+
+# Profiling is off unless this is set; a request is profiled when it sends
+# the token in the X-Profile header (never the URL, which lands in access logs)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+# Where reports for header-triggered requests are written
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "darkspace-profiles")
+)
+# Functions listed in a cProfile report
+PROFILE_TOP_FUNCTIONS = 60
+
+HEADER = "X-Profile"
+# With this query parameter a profiled request returns the report inline
+QUERY_FLAG = "_profile"
+
+
+def _requested():
+    if not PROFILE_TOKEN:
+        return False
+    supplied = request.headers.get(HEADER)
+    return bool(supplied) and hmac.compare_digest(supplied, PROFILE_TOKEN)
+
+
+class RequestProfiler:
+    """Profiles the current thread with pyinstrument, or cProfile without it."""
+
+    def __init__(self):
+        self.sampling = pyinstrument is not None
+        if self.sampling:
+            self._profiler = pyinstrument.Profiler()
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.sampling:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.sampling:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    @property
+    def suffix(self):
+        return ".html" if self.sampling else ".txt"
+
+    @property
+    def content_type(self):
+        return "text/html" if self.sampling else "text/plain"
+
+    def report(self):
+        """A pyinstrument call tree as HTML, or the top cProfile entries as text."""
+        if self.sampling:
+            return self._profiler.output_html()
+        out = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        return out.getvalue()
+
+
+def save_report(profiler, label):
+    """Write a report to PROFILE_DIR and return its file name."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}{profiler.suffix}"
+    with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+        f.write(profiler.report())
+    return name
+
+
+def _start():
+    if not _requested():
+        return
+    profiler = RequestProfiler()
+    try:
+        profiler.start()
+    except (RuntimeError, ValueError) as e:
+        # e.g. another profiler is already active on this thread
+        print(f"[profile] could not start: {e}")
+        return
+    g.profiler = profiler
+
+
+def _finish(response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.stop()
+
+    if QUERY_FLAG in request.args:
+        # Show the report instead of the page; close the page's response so
+        # a streamed body (e.g. an upstream GitHub download) is released
+        response.close()
+        return Response(profiler.report(), content_type=profiler.content_type)
+
+    label = (request.endpoint or "unmatched").replace(".", "-")
+    try:
+        name = save_report(profiler, label)
+    except OSError as e:
+        print(f"[profile] could not save report: {e}")
+        return response
+    print(f"[profile] {request.method} {request.full_path.rstrip('?')} -> {name}")
+    response.headers["X-Profile-Report"] = name
+    return response
+
+
+def _abandon(exc=None):
+    # after_request does not run when a view raises
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+
+
+def init_app(app):
+    """Profile single requests that carry PROFILE_TOKEN.
+
+    Register before the other request hooks so they are inside the profile.
+    Streamed bodies are produced after the profile ends and are not included.
+    """
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_abandon)
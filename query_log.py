@@ -0,0 +1,280 @@
+# query_log.py
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from pymongo import DESCENDING, MongoClient
+from pymongo.errors import PyMongoError
+
+load_dotenv()
+
+# Off by default: every new query shape costs an extra explain() round trip
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "").lower() in ("1", "true", "yes")
+# Queries slower than this are logged even when they use an index
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+# A shape's plan is explained again after this long, so new indexes show up
+PLAN_RECHECK_SECONDS = 300
+# Logged shapes not seen again for this long are dropped
+SLOW_QUERY_TTL = timedelta(days=7)
+# Longest example query kept per shape
+SAMPLE_CHARS = 2000
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+slow_queries = db["slow_queries"]
+
+# shape id -> (checked at, whether the plan scans the whole collection)
+_plans = {}
+_plans_lock = threading.Lock()
+_indexed = False
+
+
+def shape(value):
+    """A query with its values blanked, so repeats with other arguments match."""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            item = shape(item)
+            if item not in shapes:
+                shapes.append(item)
+        return shapes
+    return "?"
+
+
+def _dumps(value, **kwargs):
+    return json.dumps(value, default=str, sort_keys=True, **kwargs)
+
+
+def shape_id(collection, op, query) -> str:
+    key = f"{collection}:{op}:{_dumps(shape(query))}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]
+
+
+def scans_collection(plan) -> bool:
+    """Whether an explain() result has a COLLSCAN stage anywhere in it."""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(scans_collection(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(scans_collection(value) for value in plan)
+    return False
+
+
+def _docs_examined(plan):
+    if isinstance(plan, dict):
+        if "totalDocsExamined" in plan:
+            return plan["totalDocsExamined"]
+        for value in plan.values():
+            found = _docs_examined(value)
+            if found is not None:
+                return found
+    elif isinstance(plan, list):
+        for value in plan:
+            found = _docs_examined(value)
+            if found is not None:
+                return found
+    return None
+
+
+def observe(collection, op, query, elapsed_ms, explain):
+    """Log a query if it was slow or its plan scans the collection.
+
+    `explain` is called (at most once per shape every PLAN_RECHECK_SECONDS,
+    and for every slow query) to fetch the query plan.
+    """
+    key = shape_id(collection, op, query)
+    now = time.time()
+    slow = elapsed_ms >= SLOW_QUERY_MS
+    with _plans_lock:
+        checked = _plans.get(key)
+    plan = None
+    if slow or checked is None or now - checked[0] > PLAN_RECHECK_SECONDS:
+        try:
+            plan = explain()
+        except Exception as e:
+            plan = {"error": str(e)}
+        collscan = scans_collection(plan)
+        with _plans_lock:
+            _plans[key] = (now, collscan)
+    else:
+        collscan = checked[1]
+
+    if not (slow or collscan):
+        return
+    reasons = [
+        reason for reason, hit in (("slow", slow), ("collscan", collscan)) if hit
+    ]
+    print(f"[query] {'+'.join(reasons)} {op} {collection} {elapsed_ms:.0f}ms")
+
+    seen = datetime.now(timezone.utc)
+    update = {
+        "$set": {
+            "collection": collection,
+            "op": op,
+            "shape": _dumps(shape(query)),
+            "sample": _dumps(query)[:SAMPLE_CHARS],
+            "last_ms": round(elapsed_ms, 1),
+            "last_seen": seen,
+            "expires_at": seen + SLOW_QUERY_TTL,
+        },
+        "$setOnInsert": {"first_seen": seen},
+        "$inc": {"count": 1, "total_ms": elapsed_ms},
+        "$max": {"max_ms": round(elapsed_ms, 1)},
+        "$addToSet": {"reasons": {"$each": reasons}},
+    }
+    if plan is not None:
+        update["$set"]["explain"] = _dumps(plan, indent=1)
+        update["$set"]["docs_examined"] = _docs_examined(plan)
+    try:
+        _ensure_indexes()
+        slow_queries.update_one({"_id": key}, update, upsert=True)
+    except PyMongoError as e:
+        print(f"[query] could not log query: {e}")
+
+
+def _ensure_indexes():
+    global _indexed
+    if _indexed:
+        return
+    slow_queries.create_index("expires_at", expireAfterSeconds=0)
+    _indexed = True
+
+
+def recent(limit=200) -> list:
+    """Logged query shapes, most recently seen first."""
+    return list(slow_queries.find().sort("last_seen", DESCENDING).limit(limit))
+
+
+def clear() -> int:
+    with _plans_lock:
+        _plans.clear()
+    return slow_queries.delete_many({}).deleted_count
+
+
+def _elapsed_ms(started):
+    return (time.perf_counter() - started) * 1000
+
+
+class WatchedCursor:
+    """A find() cursor that is timed and explained once it is read."""
+
+    def __init__(self, watched, query, cursor):
+        self._watched = watched
+        self._query = query
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def sort(self, *args, **kwargs):
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, *args, **kwargs):
+        self._cursor.skip(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self._cursor.limit(*args, **kwargs)
+        return self
+
+    def __iter__(self):
+        started = time.perf_counter()
+        docs = list(self._cursor)
+        self._watched._observe("find", self._query, started, self._cursor.explain)
+        return iter(docs)
+
+
+class WatchedCollection:
+    """A collection whose reads and writes are checked by observe().
+
+    Writes are explained through a find() with the same filter, which
+    selects an index the same way.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def __getitem__(self, name):
+        return self._collection[name]
+
+    def _observe(self, op, query, started, explain):
+        elapsed = _elapsed_ms(started)
+        try:
+            observe(self._collection.name, op, query, elapsed, explain)
+        except Exception as e:
+            # Debugging aid only; never fail the query because of it
+            print(f"[query] could not check {op}: {e}")
+
+    def _explain_filter(self, query):
+        return lambda: self._collection.find(query).limit(1).explain()
+
+    def _timed(self, op, query, call, *args, **kwargs):
+        started = time.perf_counter()
+        result = call(*args, **kwargs)
+        self._observe(op, query, started, self._explain_filter(query))
+        return result
+
+    def find(self, filter=None, *args, **kwargs):
+        cursor = self._collection.find(filter, *args, **kwargs)
+        return WatchedCursor(self, filter or {}, cursor)
+
+    def find_one(self, filter=None, *args, **kwargs):
+        return self._timed(
+            "find_one", filter or {}, self._collection.find_one, filter, *args, **kwargs
+        )
+
+    def count_documents(self, filter, **kwargs):
+        count = self._collection.count_documents
+        return self._timed("count_documents", filter, count, filter, **kwargs)
+
+    def aggregate(self, pipeline, **kwargs):
+        started = time.perf_counter()
+        docs = list(self._collection.aggregate(pipeline, **kwargs))
+        self._observe(
+            "aggregate",
+            pipeline,
+            started,
+            lambda: self._collection.database.command(
+                "aggregate", self._collection.name, pipeline=pipeline, explain=True
+            ),
+        )
+        return iter(docs)
+
+    def update_one(self, filter, *args, **kwargs):
+        return self._timed(
+            "update_one", filter, self._collection.update_one, filter, *args, **kwargs
+        )
+
+    def update_many(self, filter, *args, **kwargs):
+        return self._timed(
+            "update_many", filter, self._collection.update_many, filter, *args, **kwargs
+        )
+
+    def delete_one(self, filter, *args, **kwargs):
+        return self._timed(
+            "delete_one", filter, self._collection.delete_one, filter, *args, **kwargs
+        )
+
+    def delete_many(self, filter, *args, **kwargs):
+        return self._timed(
+            "delete_many", filter, self._collection.delete_many, filter, *args, **kwargs
+        )
+
+
+def watch(collection):
+    """The collection to hand to a model: checked when QUERY_DEBUG is on."""
+    if not QUERY_DEBUG:
+        return collection
+    return WatchedCollection(collection)
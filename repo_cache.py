@@ -0,0 +1,184 @@
+# repo_cache.py
+import copy
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import metrics
+
+load_dotenv()
+
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+
+# With push webhooks invalidating entries, cached GitHub data can safely
+# live for a day; without them keep it short so edits show up quickly.
+REPO_CACHE_TTL = int(
+    os.getenv("REPO_CACHE_TTL", 24 * 3600 if GITHUB_WEBHOOK_SECRET else 60)
+)
+
+KIND_CONTENTS = "contents"
+KIND_COMMIT = "commit"
+# The part of a file the preview page inlines, stored with its blob SHA
+KIND_HEAD = "head"
+
+# Push payloads list at most this many commits; longer pushes drop everything
+PUSH_COMMITS_LIMIT = 2048
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+cache_collection = db["github_cache"]
+
+
+def path_ancestors(path: str) -> list[str]:
+    """The path itself plus every directory above it, down from the repo root."""
+    parts = [p for p in (path or "").split("/") if p]
+    return [""] + ["/".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def _entry_id(kind, full_name, path, token):
+    # The token is part of the key so a listing fetched with one account's
+    # access is never served to another account
+    token_hash = hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:16]
+    return f"{kind}:{full_name}:{token_hash}:{path}"
+
+
+class RepoCache:
+    """Cache of GitHub API results for repository paths.
+
+    Entries are shared between workers through Mongo (or kept in-process
+    when no collection is given) and can be dropped by repository and path,
+    which is what the push webhook does.
+    """
+
+    def __init__(self, collection=None, ttl=REPO_CACHE_TTL, clock=time.time):
+        self.collection = collection
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._indexed = False
+
+    def get(self, kind, full_name, path, token):
+        value = self._get(kind, full_name, path, token)
+        metrics.cache_lookup("repo", value is not None)
+        return value
+
+    def _get(self, kind, full_name, path, token):
+        path = (path or "").strip("/")
+        key = _entry_id(kind, full_name, path, token)
+        now = self.clock()
+        if self.collection is None:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and entry["expires"] > now:
+                # Hand out copies, like documents read back from Mongo
+                return copy.deepcopy(entry["value"])
+            return None
+
+        try:
+            doc = self.collection.find_one({"_id": key})
+        except PyMongoError as e:
+            print(f"[repo-cache] read failed: {e}")
+            return None
+        if doc and doc["expires_at"].replace(tzinfo=timezone.utc).timestamp() > now:
+            return doc["value"]
+        return None
+
+    def put(self, kind, full_name, path, token, value):
+        path = (path or "").strip("/")
+        key = _entry_id(kind, full_name, path, token)
+        expires = self.clock() + self.ttl
+        if self.collection is None:
+            with self._lock:
+                self._entries[key] = {
+                    "repo": full_name,
+                    "path": path,
+                    "value": copy.deepcopy(value),
+                    "expires": expires,
+                }
+            return
+
+        try:
+            self._ensure_indexes()
+            self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "kind": kind,
+                    "repo": full_name,
+                    "path": path,
+                    "value": value,
+                    "expires_at": datetime.fromtimestamp(expires, timezone.utc),
+                },
+                upsert=True,
+            )
+        except PyMongoError as e:
+            print(f"[repo-cache] write failed: {e}")
+
+    def invalidate(self, full_name, paths=None) -> int:
+        """Drop cached entries that may have changed; returns how many.
+
+        A changed file invalidates itself and every directory above it.
+        With paths=None the whole repository is dropped.
+        """
+        affected = None
+        if paths is not None:
+            affected = set()
+            for path in paths:
+                affected.update(path_ancestors(path))
+
+        if self.collection is None:
+            with self._lock:
+                stale = [
+                    key
+                    for key, entry in self._entries.items()
+                    if entry["repo"] == full_name
+                    and (affected is None or entry["path"] in affected)
+                ]
+                for key in stale:
+                    del self._entries[key]
+            return len(stale)
+
+        query = {"repo": full_name}
+        if affected is not None:
+            query["path"] = {"$in": sorted(affected)}
+        try:
+            return self.collection.delete_many(query).deleted_count
+        except PyMongoError as e:
+            print(f"[repo-cache] invalidation failed: {e}")
+            return 0
+
+    def _ensure_indexes(self):
+        if self._indexed:
+            return
+        # Mongo expires entries itself; the repo/path index serves invalidation
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self.collection.create_index([("repo", 1), ("path", 1)])
+        self._indexed = True
+
+
+github_cache = RepoCache(cache_collection)
+
+
+def changed_paths(push: dict) -> set[str] | None:
+    """Files touched by a push event, or None if everything must be dropped."""
+    commits = push.get("commits") or []
+    if (
+        push.get("forced")
+        or push.get("deleted")
+        or not commits
+        or len(commits) >= PUSH_COMMITS_LIMIT
+    ):
+        return None
+    paths = set()
+    for commit in commits:
+        for key in ("added", "removed", "modified"):
+            paths.update(commit.get(key) or [])
+    return paths
@@ -0,0 +1,385 @@
+# repo_mirror.py
+import base64
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from github_utils import token_key
+
+load_dotenv()
+
+# Mirror mode is on when a directory for the bare clones is configured
+REPO_MIRROR_DIR = os.getenv("REPO_MIRROR_DIR")
+# Where clones are fetched from; tests point this at file:// repositories
+REPO_MIRROR_URL = os.getenv("REPO_MIRROR_URL", "https://github.com/{full_name}.git")
+# Seconds between background fetches of every mirrored teacher repo
+REPO_MIRROR_INTERVAL = int(os.getenv("REPO_MIRROR_INTERVAL", 300))
+
+GIT_TIMEOUT = 300
+BLOB_CHUNK_SIZE = 64 * 1024
+# Like the Contents API, only inline file bodies up to 1 MB
+INLINE_CONTENT_MAX_BYTES = 1024 * 1024
+
+FULL_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class MirrorError(Exception):
+    """A git command failed or the path doesn't exist in the mirror."""
+
+
+class BlobStream:
+    """Streams a blob with the interface relay_upstream expects from requests."""
+
+    def __init__(self, process, status_code, headers, skip=0, length=None):
+        self.process = process
+        self.status_code = status_code
+        self.headers = headers
+        self._skip = skip
+        self._length = length
+
+    def iter_content(self, chunk_size=BLOB_CHUNK_SIZE):
+        if self.process is None:
+            return
+        out = self.process.stdout
+        while self._skip:
+            dropped = len(out.read(min(self._skip, chunk_size)))
+            if not dropped:
+                return
+            self._skip -= dropped
+        remaining = self._length
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = out.read(size)
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+
+def _entry_type(mode, kind):
+    if kind == "tree":
+        return "dir"
+    if kind == "commit":
+        return "submodule"
+    if mode == "120000":
+        return "symlink"
+    return "file"
+
+
+class RepoMirror:
+    """Bare clones of teacher repositories, read with git plumbing commands.
+
+    Results mimic the GitHub Contents API so callers don't need to know
+    whether a repo is mirrored. A mirror only answers for the token that
+    created it, so it never exposes a repo to an account GitHub would refuse.
+    """
+
+    def __init__(self, base_dir, url_template=REPO_MIRROR_URL):
+        self.base_dir = base_dir
+        self.url_template = url_template
+        self._lock = threading.Lock()
+        self._repo_locks = {}
+        self._owners = {}
+
+    def path(self, full_name) -> str:
+        if not FULL_NAME_RE.match(full_name or "") or ".." in full_name:
+            raise MirrorError(f"Invalid repository name: {full_name}")
+        owner, repo = full_name.split("/")
+        return os.path.join(self.base_dir, owner, f"{repo}.git")
+
+    def _git(self, git_dir, *args, timeout=GIT_TIMEOUT, env=None):
+        result = subprocess.run(
+            ["git", "--git-dir", git_dir, *args],
+            capture_output=True,
+            timeout=timeout,
+            env={**os.environ, **env} if env else None,
+        )
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", "replace").strip()
+            raise MirrorError(message or f"git {args[0]} failed")
+        return result.stdout
+
+    def _remote_env(self, full_name, token):
+        url = self.url_template.format(full_name=full_name)
+        if token and url.startswith("https://"):
+            # Credentials go through the environment, never the command line
+            # (readable by any local user) or the repo config
+            basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+            return {
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+            }, url
+        return None, url
+
+    def fetch(self, full_name, token):
+        """Create or update the bare clone of a repository."""
+        git_dir = self.path(full_name)
+        with self._lock:
+            repo_lock = self._repo_locks.setdefault(full_name, threading.Lock())
+
+        with repo_lock:
+            if not os.path.isdir(git_dir):
+                os.makedirs(git_dir, exist_ok=True)
+                self._git(git_dir, "init", "--bare", "--quiet")
+
+            env, url = self._remote_env(full_name, token)
+            self._git(
+                git_dir, "fetch", "--prune", "--no-tags", "--quiet",
+                url, "+refs/heads/*:refs/heads/*", env=env,
+            )
+            # Point HEAD at the remote's default branch
+            symref = self._git(git_dir, "ls-remote", "--symref", url, "HEAD", env=env)
+            for line in symref.decode("utf-8").splitlines():
+                if line.startswith("ref: ") and line.endswith("\tHEAD"):
+                    self._git(git_dir, "symbolic-ref", "HEAD", line[5:].split("\t")[0])
+                    break
+
+            key = token_key(token)
+            self._git(git_dir, "config", "darkspace.tokenkey", key)
+            with self._lock:
+                self._owners[full_name] = key
+
+    def serves(self, full_name, token) -> bool:
+        """Whether this repo is mirrored for this token."""
+        with self._lock:
+            key = self._owners.get(full_name)
+        if key is None:
+            try:
+                git_dir = self.path(full_name)
+            except MirrorError:
+                return False
+            if not os.path.isdir(git_dir):
+                return False
+            try:
+                key = self._git(git_dir, "config", "--get", "darkspace.tokenkey")
+            except MirrorError:
+                return False
+            key = key.decode("utf-8").strip()
+            with self._lock:
+                self._owners[full_name] = key
+        return key == token_key(token)
+
+    def _ls_tree(self, git_dir, path, recursive=False, rev="HEAD"):
+        args = ["ls-tree", "-l", "-z"]
+        if recursive:
+            args += ["-r", "-t"]
+        args.append(rev)
+        if path:
+            args += ["--", path]
+        entries = []
+        for raw in self._git(git_dir, *args).split(b"\0"):
+            if not raw:
+                continue
+            meta, name = raw.decode("utf-8", "replace").split("\t", 1)
+            mode, kind, sha, size = meta.split()
+            entries.append((mode, kind, sha, 0 if size == "-" else int(size), name))
+        return entries
+
+    def _item(self, full_name, mode, kind, sha, size, path):
+        item_type = _entry_type(mode, kind)
+        return {
+            "name": path.split("/")[-1],
+            "path": path,
+            "sha": sha,
+            "size": size,
+            "type": item_type,
+            "url": f"https://api.github.com/repos/{full_name}/contents/{path}",
+            "html_url": f"https://github.com/{full_name}/blob/HEAD/{path}",
+            "download_url": (
+                f"https://raw.githubusercontent.com/{full_name}/HEAD/{path}"
+                if item_type == "file"
+                else None
+            ),
+        }
+
+    def _node(self, git_dir, path):
+        """The (mode, type, sha, size, path) entry for a path; None for the root."""
+        path = (path or "").strip("/")
+        if not path:
+            return None
+        entries = self._ls_tree(git_dir, path)
+        if not entries or entries[0][4] != path:
+            raise MirrorError(f"Not Found: {path}")
+        return entries[0]
+
+    def contents(self, full_name, path=""):
+        """Contents API shaped listing (list) or file (dict) for a path."""
+        git_dir = self.path(full_name)
+        node = self._node(git_dir, path)
+        if node is None or node[1] == "tree":
+            prefix = f"{node[4]}/" if node else ""
+            return [
+                self._item(full_name, *entry)
+                for entry in self._ls_tree(git_dir, prefix)
+            ]
+
+        item = self._item(full_name, *node)
+        if item["type"] == "file" and node[3] <= INLINE_CONTENT_MAX_BYTES:
+            blob = self._git(git_dir, "cat-file", "blob", node[2])
+            item["encoding"] = "base64"
+            item["content"] = base64.b64encode(blob).decode("ascii")
+        return item
+
+    def tree(self, full_name):
+        """The whole tree at HEAD, shaped like githubRoute.get_repo_tree."""
+        git_dir = self.path(full_name)
+        commit = self._git(git_dir, "rev-parse", "HEAD").decode("utf-8").strip()
+        tree_sha = self._git(git_dir, "rev-parse", f"{commit}^{{tree}}")
+        entries = [
+            {"path": path, "type": _entry_type(mode, kind), "size": size, "sha": sha}
+            for mode, kind, sha, size, path in self._ls_tree(
+                git_dir, "", recursive=True, rev=commit
+            )
+        ]
+        return {
+            "commit": commit,
+            "sha": tree_sha.decode("utf-8").strip(),
+            "truncated": False,
+            "entries": entries,
+        }
+
+    def commit_sha(self, full_name, path=""):
+        """SHA of the newest commit touching a path on the default branch."""
+        git_dir = self.path(full_name)
+        args = ["log", "-1", "--format=%H", "HEAD"]
+        if path:
+            args += ["--", path]
+        sha = self._git(git_dir, *args).decode("utf-8").strip()
+        if not sha:
+            raise MirrorError(f"No commits found for path: {path or '/'}")
+        return sha
+
+    def _blob(self, git_dir, path):
+        node = self._node(git_dir, path)
+        if node is None or node[1] != "blob":
+            raise MirrorError(f"Not a file: {path}")
+        return node[2], node[3]
+
+    def _cat_blob(self, git_dir, sha):
+        return subprocess.Popen(
+            ["git", "--git-dir", git_dir, "cat-file", "blob", sha],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read_range(self, full_name, path, start, length):
+        """Same contract as githubRoute.read_repo_file_range."""
+        git_dir = self.path(full_name)
+        sha, size = self._blob(git_dir, path)
+        if start >= size:
+            return b"", size
+        stream = BlobStream(self._cat_blob(git_dir, sha), 200, {}, start, length)
+        try:
+            return b"".join(stream.iter_content()), size
+        finally:
+            stream.close()
+
+    def open_blob(self, full_name, path, range_header=None):
+        """Stream a file, honouring a single-range Range header like GitHub does."""
+        git_dir = self.path(full_name)
+        sha, size = self._blob(git_dir, path)
+        headers = {"ETag": f'"{sha}"'}
+
+        match = RANGE_RE.match(range_header or "")
+        if not match or match.groups() == ("", ""):
+            headers["Content-Length"] = str(size)
+            return BlobStream(self._cat_blob(git_dir, sha), 200, headers)
+
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+        if start >= size or start > end:
+            headers["Content-Range"] = f"bytes */{size}"
+            return BlobStream(None, 416, headers)
+
+        length = end - start + 1
+        headers["Content-Length"] = str(length)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return BlobStream(self._cat_blob(git_dir, sha), 206, headers, start, length)
+
+    def write_archive(self, full_name, path, out):
+        """Write a path to the open file `out`: the blob itself, or a ZIP of a folder.
+
+        Returns True for a ZIP. The layout matches archives built from the
+        Contents API: a selected folder becomes the top-level directory.
+        """
+        git_dir = self.path(full_name)
+        node = self._node(git_dir, path)
+        if node is not None and node[1] == "blob":
+            process = self._cat_blob(git_dir, node[2])
+            stream = BlobStream(process, 200, {})
+            try:
+                for chunk in stream.iter_content():
+                    out.write(chunk)
+            finally:
+                stream.close()
+            if process.returncode not in (0, None, -9):
+                raise MirrorError(f"Failed to read {path}")
+            return False
+
+        args = ["archive", "--format=zip"]
+        if node is not None:
+            args += [f"--prefix={node[4].split('/')[-1]}/", f"HEAD:{node[4]}"]
+        else:
+            args.append("HEAD")
+        out.write(self._git(git_dir, *args))
+        return True
+
+
+mirror = RepoMirror(REPO_MIRROR_DIR) if REPO_MIRROR_DIR else None
+
+_fetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mirror")
+
+
+def mirror_for(owner, repo, token):
+    """The mirror to read owner/repo from, or None to use the GitHub API."""
+    if mirror is None:
+        return None
+    full_name = f"{owner}/{repo}"
+    return mirror if mirror.serves(full_name, token) else None
+
+
+def schedule_fetch(full_name, token):
+    """Update a mirror in the background (webhook pushes, new items)."""
+    if mirror is None:
+        return None
+
+    def run():
+        try:
+            mirror.fetch(full_name, token)
+        except Exception as e:
+            print(f"[mirror] fetch of {full_name} failed: {e}")
+
+    return _fetch_executor.submit(run)
+
+
+def sync_mirrors(accounts):
+    """Fetch every linked teacher repo; run periodically by the scheduler."""
+    if mirror is None:
+        return 0
+    synced = 0
+    for account in accounts:
+        if not account.get("repo") or not account.get("access_token"):
+            continue
+        try:
+            mirror.fetch(account["repo"], account["access_token"])
+            synced += 1
+        except Exception as e:
+            print(f"[mirror] sync of {account['repo']} failed: {e}")
+    return synced
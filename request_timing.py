@@ -0,0 +1,125 @@
+# request_timing.py
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from pymongo import monitoring
+
+# Requests slower than this are logged with their breakdown (0 = log none)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 1000))
+
+# Server-Timing metric name and what one unit of each is called
+CATEGORIES = {"mongo": "commands", "github": "calls", "smtp": "sends"}
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Count and total duration of the slow calls one request made."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.calls = {name: [0, 0.0] for name in CATEGORIES}
+
+    def add(self, category, seconds):
+        # GitHub calls fanned out on the async loop report from other threads
+        with self._lock:
+            entry = self.calls.setdefault(category, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        """The Server-Timing header value (durations in milliseconds)."""
+        metrics = []
+        with self._lock:
+            for name, (count, seconds) in self.calls.items():
+                if count:
+                    unit = CATEGORIES.get(name, "calls")
+                    metrics.append(
+                        f'{name};dur={seconds * 1000:.1f};desc="{count} {unit}"'
+                    )
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def summary(self):
+        with self._lock:
+            parts = [
+                f"{name}={count}/{seconds * 1000:.0f}ms"
+                for name, (count, seconds) in self.calls.items()
+                if count
+            ]
+        return " ".join(parts)
+
+
+def record(category, seconds):
+    """Add one call to the current request's timings (no-op outside requests)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(category, seconds)
+
+
+@contextmanager
+def timed(category):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(category, time.perf_counter() - started)
+
+
+class MongoTimingListener(monitoring.CommandListener):
+    """Feeds every Mongo command's server round trip into the request timings."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record("mongo", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record("mongo", event.duration_micros / 1e6)
+
+
+# Listeners only apply to clients created afterwards, so app.py imports this
+# module before anything that opens a MongoClient
+monitoring.register(MongoTimingListener())
+
+
+def _start():
+    g.request_timings = RequestTimings()
+    g.request_timings_token = _current.set(g.request_timings)
+
+
+def _finish(response):
+    timings = g.get("request_timings")
+    if timings is None:
+        return response
+    response.headers["Server-Timing"] = timings.header()
+
+    elapsed_ms = timings.elapsed() * 1000
+    if SLOW_REQUEST_MS and elapsed_ms >= SLOW_REQUEST_MS:
+        print(
+            f"[slow] {request.method} {request.full_path.rstrip('?')} "
+            f"{response.status_code} {elapsed_ms:.0f}ms {timings.summary()}".rstrip()
+        )
+    return response
+
+
+def _reset(exc=None):
+    token = g.pop("request_timings_token", None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_app(app):
+    """Time every request of a Flask app."""
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_reset)
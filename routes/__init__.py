@@ -3,5 +3,17 @@ from .githubRoute import github_bp
 from .chatRoute import chat_bp
 from .emailRoute import email_bp
 from .contentRoute import content_bp
+from .jobRoute import job_bp
+from .adminRoute import admin_bp
+from .courseRoute import course_bp
 
-all_blueprints = [assignment_bp, github_bp, email_bp, chat_bp, content_bp]
+all_blueprints = [
+    assignment_bp,
+    github_bp,
+    email_bp,
+    chat_bp,
+    content_bp,
+    job_bp,
+    admin_bp,
+    course_bp,
+]
@@ -0,0 +1,46 @@
+# routes/adminRoute.py
+import os
+
+from flask import Blueprint, redirect, render_template, session, url_for
+
+import query_log
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+# Usernames allowed on the admin pages, comma-separated; nobody when unset.
+# Logged queries include other users' filters, so the teacher role isn't enough.
+ADMIN_USERS = {
+    name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()
+}
+
+
+def _admin():
+    return session.get("username") in ADMIN_USERS
+
+
+@admin_bp.route("/slow-queries")
+def slow_queries():
+    """Model queries that were slow or scanned a whole collection"""
+    if "username" not in session:
+        return redirect(url_for("login"))
+    if not _admin():
+        return "Forbidden", 403
+    return render_template(
+        "slow_queries.html",
+        queries=query_log.recent() if query_log.QUERY_DEBUG else [],
+        enabled=query_log.QUERY_DEBUG,
+        threshold_ms=query_log.SLOW_QUERY_MS,
+        username=session["username"],
+        identity=session["identity"],
+    )
+
+
+@admin_bp.route("/slow-queries/clear", methods=["POST"])
+def clear_slow_queries():
+    if "username" not in session:
+        return redirect(url_for("login"))
+    if not _admin():
+        return "Forbidden", 403
+    query_log.clear()
+    return redirect(url_for("admin.slow_queries"))
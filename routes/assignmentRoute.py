@@ -1,7 +1,4 @@
 import os
-import requests
-import zipfile
-from io import BytesIO
 from datetime import datetime
 from flask import (
     Blueprint,
@@ -12,23 +9,67 @@ from flask import (
     url_for,
     jsonify,
     send_file,
-    Response,
 )
 from bson.objectid import ObjectId
 from pymongo import MongoClient
 from models.assignment import AssignmentModel
 from models.submission import SubmissionModel
-from email_utils import send_mail
+from email_utils import queue_bulk_mail
+from markdown_utils import render_markdown
+from http_utils import (
+    relay_upstream,
+    page_etag,
+    not_modified,
+    conditional_page,
+    rate_limited_response,
+)
+from github_utils import RateLimitExceeded
+from archive_utils import ZIP_SUFFIX, download_etag, get_or_build_archive
+from warmup import schedule_item_warmup
+from preview_utils import (
+    CODE_EXTENSIONS,
+    MARKDOWN_EXTENSIONS,
+    PREVIEW_CHUNK_BYTES,
+    PREVIEW_MAX_BYTES,
+    decode_text,
+    format_size,
+    line_aligned,
+    looks_binary,
+    preview_template,
+)
 from dotenv import load_dotenv
-import base64
-import mimetypes
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.image import MIMEImage
 from pathlib import Path
 
 # Import shared GitHub functions
-from .githubRoute import get_repo_contents, is_repo_path_file
+from .githubRoute import (
+    get_repo_contents,
+    resolve_repo_path,
+    read_repo_file,
+    stream_repo_file,
+    get_file_entry,
+    get_path_commit_sha,
+    git_blob_sha,
+    read_repo_file_range,
+    read_file_head,
+    get_tree_index,
+)
+from tree_index import tree_index_response
+import submission_export
+import request_timing
+import query_log
+import dashboard
+import deadline
+from course_utils import (
+    course_model,
+    course_scope,
+    enrollment_model,
+    student_filter,
+    teacher_course,
+    visible_to_student,
+)
 
 load_dotenv()
 
@@ -71,9 +112,10 @@ def send_receipt_html(to_addr: str, title: str) -> None:
     import smtplib, ssl
 
     ctx = ssl.create_default_context()
-    with smtplib.SMTP_SSL(smtp_server, smtp_port, context=ctx) as server:
-        server.login(login, password)
-        server.send_message(msg)
+    with request_timing.timed("smtp"):
+        with smtplib.SMTP_SSL(smtp_server, smtp_port, context=ctx) as server:
+            server.login(login, password)
+            server.send_message(msg)
 
 
 assignment_bp = Blueprint("assignment", __name__)
@@ -88,8 +130,25 @@ submissions_collection = db["submissions"]
 github_accounts = db["github"]
 
 # Create model instances
-assignment_model = AssignmentModel(assignments_collection)
-submission_model = SubmissionModel(submissions_collection)
+assignment_model = AssignmentModel(query_log.watch(assignments_collection))
+submission_model = SubmissionModel(query_log.watch(submissions_collection))
+
+
+def _visible_assignment(assignment_id):
+    """The assignment if the logged-in user may open it, else None.
+
+    Students only get assignments of their courses (or posted without one),
+    the same ones their assignment list shows.
+    """
+    assignment = assignment_model.get_assignment(assignment_id)
+    if not assignment or session.get("identity") == "teacher":
+        return assignment
+    if assignment.get("course_id") is None:
+        return assignment
+    student = users.find_one({"username": session.get("username")})
+    if not student or not visible_to_student(assignment, str(student["_id"])):
+        return None
+    return assignment
 
 
 # Display all assignments list
@@ -116,33 +175,20 @@ def show_assignments():
             identity=identity,
         )
     else:
-        # If student, display all available assignments
-        assignments = assignment_model.get_all_assignments()
-        # Process date format and calculate remaining days
-        now = datetime.now()
-        for assignment in assignments:
-            if isinstance(assignment.get("due_date"), str):
-                try:
-                    due_date = datetime.fromisoformat(
-                        assignment["due_date"].replace("Z", "+00:00")
-                    )
-                    time_diff = due_date - now
-                    assignment["remaining_days"] = time_diff.days
-                    # Add hours, minutes, seconds for precision
-                    assignment["remaining_hours"] = time_diff.seconds // 3600
-                    assignment["remaining_minutes"] = (time_diff.seconds % 3600) // 60
-                    assignment["remaining_seconds"] = time_diff.seconds % 60
-                    assignment["overdue"] = time_diff.total_seconds() < 0
-                except ValueError:
-                    assignment["remaining_days"] = 7  # Default value
-            else:
-                assignment["remaining_days"] = 7  # Default value
-        # Get all submissions for this student
         user = users.find_one({"username": username})
         if not user:
             return "User not found", 404
-
         user_id = str(user["_id"])
+
+        # If student, display one page of their courses' assignments
+        page = assignment_model.get_assignments_page(
+            course_scope(enrollment_model.get_student_course_ids(user_id)),
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        )
+        assignments = page["items"]
+        deadline.annotate(assignments)
+        # Get all submissions for this student
         submissions = submission_model.get_student_submissions(user_id)
 
         # Create a dictionary with assignment ID as key and submission object as value
@@ -153,6 +199,7 @@ def show_assignments():
         return render_template(
             "student_assignments.html",
             assignments=assignments,
+            page=page,
             submissions=submission_dict,
             username=username,
             identity=identity,
@@ -208,6 +255,28 @@ def list_repo_contents():
         )
 
         return jsonify(formatted_contents)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
+    except Exception as e:
+        return jsonify({"error": f"GitHub API error: {str(e)}"}), 400
+
+
+@assignment_bp.route("/assignments/repo_tree")
+def repo_tree():
+    """The linked repository's whole tree as one gzipped index, for the folder picker"""
+    if not session.get("username") or session.get("identity") != "teacher":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    github_info = github_accounts.find_one({"username": session.get("username")})
+    if not github_info or not github_info.get("repo"):
+        return jsonify({"error": "No GitHub repository linked"}), 400
+
+    owner, repo = github_info["repo"].split("/")
+    try:
+        tree_sha, data = get_tree_index(owner, repo, github_info["access_token"])
+        return tree_index_response(tree_sha, data)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
     except Exception as e:
         return jsonify({"error": f"GitHub API error: {str(e)}"}), 400
 
@@ -221,9 +290,12 @@ def create_assignment():
     if request.method == "GET":
         # Get teacher's linked GitHub repositories
         github_info = github_accounts.find_one({"username": session.get("username")})
+        user = users.find_one({"username": session.get("username")})
+        courses = course_model.get_teacher_courses(str(user["_id"])) if user else []
         return render_template(
             "create_assignment.html",
             github_info=github_info,
+            courses=courses,
             username=session.get("username"),
             identity=session.get("identity"),
         )
@@ -246,6 +318,11 @@ def create_assignment():
     if not user:
         return "User not found", 404
 
+    # Optional course; only the teacher's own courses can be chosen
+    course_id = request.form.get("course_id") or None
+    if course_id and not teacher_course(course_id, str(user["_id"])):
+        return "Course not found", 404
+
     # Get teacher's GitHub information
     github_info = github_accounts.find_one({"username": session.get("username")})
 
@@ -270,20 +347,26 @@ def create_assignment():
         due_date=due_datetime,
         github_repo_url=github_repo_url,
         github_repo_path=github_repo_path,
+        course_id=course_id,
     )
-    # ── NEW: fetch all student addresses and mail them
-    students = users.find({"identity": "student", "email": {"$ne": None}})
+    dashboard.assignment_added(assignment_id, title, due_datetime, course_id)
+    # Warm the repo caches so the first student doesn't wait on GitHub
+    schedule_item_warmup(github_info, github_repo_path)
+
+    # ── NEW: mail the course's students (everyone without a course), from a job
+    students = users.find(student_filter(course_id), {"email": 1})
     subject = f"[DarkSpace] New assignment: {title}"
     body = (
         f"Hello student,\n\nA new assignment “{title}” has been posted.\n"
         f"Due: {due_datetime}\n\n"
         f"{description}\n\nPlease submit before the deadline."
     )
-    for stu in students:
-        try:
-            send_mail(stu["email"], subject, body)
-        except Exception as e:
-            print(f"Mail to {stu['email']} failed: {e}")
+    try:
+        queue_bulk_mail(
+            [stu["email"] for stu in students], subject, body, session.get("username")
+        )
+    except Exception as e:
+        print(f"Queueing assignment mail failed: {e}")
 
     return redirect(url_for("assignment.show_assignments"))
 
@@ -294,7 +377,7 @@ def view_assignment(assignment_id):
     if not session.get("username"):
         return redirect(url_for("login"))
 
-    assignment = assignment_model.get_assignment(assignment_id)
+    assignment = _visible_assignment(assignment_id)
     if not assignment:
         return "Assignment not found", 404
 
@@ -363,6 +446,9 @@ def submit_assignment(assignment_id):
     if not github_link:
         return "Missing GitHub repository link", 400
 
+    if not _visible_assignment(assignment_id):
+        return "Assignment not found", 404
+
     # Get student ID
     student = users.find_one({"username": session.get("username")})
     if not student:
@@ -393,6 +479,7 @@ def submit_assignment(assignment_id):
             github_link=github_link,
             readme_content=readme_content,
         )
+    dashboard.submission_recorded(student_id, assignment_id)
 
     return redirect(url_for("assignment.show_assignments", assignment_id=assignment_id))
 
@@ -423,6 +510,9 @@ def grade_submission(submission_id):
 
     # Get submission information to redirect to assignment details page
     submission = submission_model.get_submission(submission_id)
+    dashboard.submission_recorded(
+        submission["student_id"], submission["assignment_id"], "graded", grade_float
+    )
     return redirect(
         url_for("assignment.view_assignment", assignment_id=submission["assignment_id"])
     )
@@ -434,7 +524,7 @@ def download_assignment(assignment_id):
     if not session.get("username"):
         return redirect(url_for("login"))
 
-    assignment = assignment_model.get_assignment(assignment_id)
+    assignment = _visible_assignment(assignment_id)
     if not assignment:
         return "Assignment not found", 404
 
@@ -471,113 +561,39 @@ def download_assignment(assignment_id):
         # Use the linked repository
         owner, repo = repo_path.split("/")
 
-    # Get the name of the selected folder or file
-    selected_folder_name = ""
-    if github_repo_path:
-        selected_folder_name = github_repo_path.split("/")[-1]
-
-    # Check if selected path is a file
+    # The last commit touching the path keys both the disk cache and the ETag
     try:
-        is_direct_file = is_repo_path_file(owner, repo, access_token, github_repo_path)
-
-        # If it's a direct file, download and return it without ZIP
-        if is_direct_file:
-            # Get file content directly
-            content_info = get_repo_contents(
-                owner, repo, access_token, github_repo_path
-            )
-            download_url = content_info.get("download_url")
-            if download_url:
-                file_response = requests.get(
-                    download_url,
-                    headers={
-                        "Authorization": f"token {access_token}",
-                        "Accept": "application/vnd.github+json",
-                    },
-                )
-                if file_response.status_code == 200:
-                    memory_file = BytesIO(file_response.content)
-                    memory_file.seek(0)
-
-                    # Get filename from path
-                    filename = github_repo_path.split("/")[-1]
-
-                    return send_file(
-                        memory_file,
-                        download_name=filename,
-                        as_attachment=True,
-                        mimetype="application/octet-stream",  # Generic binary
-                    )
+        commit_sha = get_path_commit_sha(owner, repo, access_token, github_repo_path)
+        archive_path = get_or_build_archive(
+            owner, repo, access_token, github_repo_path, commit_sha
+        )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
-        # Log the error but continue with ZIP creation as fallback
-        print(f"Error checking if path is a file: {str(e)}")
-
-    # Create a ZIP file in memory (for folders or multiple files)
-    memory_file = BytesIO()
-    with zipfile.ZipFile(memory_file, "w", zipfile.ZIP_DEFLATED) as zf:
-        # Recursively get repository contents
-        def fetch_repo_contents(path):
-            try:
-                # Get contents using shared function
-                contents = get_repo_contents(owner, repo, access_token, path)
-
-                # Handle single file response case
-                if not isinstance(contents, list):
-                    contents = [contents]
-
-                for item in contents:
-                    item_path = item["path"]
-                    item_type = item["type"]
-
-                    if item_type == "file":
-                        # Get file content
-                        download_url = item["download_url"]
-                        file_response = requests.get(
-                            download_url,
-                            headers={
-                                "Authorization": f"token {access_token}",
-                                "Accept": "application/vnd.github+json",
-                            },
-                        )
-                        if file_response.status_code == 200:
-                            # Build the path for the file in the ZIP
-                            if github_repo_path and item_path.startswith(
-                                github_repo_path
-                            ):
-                                # Get the part after the selected path
-                                rel_path = item_path[len(github_repo_path) :].lstrip(
-                                    "/"
-                                )
-                                # Add the selected folder as the top level directory
-                                zip_path = os.path.join(selected_folder_name, rel_path)
-                            else:
-                                # This shouldn't normally happen but as a fallback
-                                zip_path = item_path
-
-                            # Add file to zip
-                            zf.writestr(zip_path, file_response.content)
-
-                    elif item_type == "dir":
-                        # Recursively process subdirectory
-                        fetch_repo_contents(item_path)
-            except Exception as e:
-                print(f"Error fetching repository contents for {path}: {str(e)}")
-
-        # Start recursive content retrieval
-        fetch_repo_contents(github_repo_path)
-
-    # Set file pointer to beginning
-    memory_file.seek(0)
-
-    # Generate download filename
-    assignment_title = assignment.get("title", "assignment").replace(" ", "_")
-
-    return send_file(
-        memory_file,
-        download_name=f"{assignment_title}.zip",
+        return f"Error accessing repository: {str(e)}", 400
+
+    if archive_path.endswith(ZIP_SUFFIX):
+        # Generate download filename
+        assignment_title = assignment.get("title", "assignment").replace(" ", "_")
+        download_name = f"{assignment_title}.zip"
+        mimetype = "application/zip"
+    else:
+        # A single selected file is downloaded directly without ZIP
+        download_name = github_repo_path.split("/")[-1]
+        mimetype = "application/octet-stream"  # Generic binary
+
+    # conditional=True answers Range/If-Range and If-None-Match from the cached
+    # file, so interrupted downloads resume and repeat downloads revalidate
+    response = send_file(
+        archive_path,
+        download_name=download_name,
         as_attachment=True,
-        mimetype="application/zip",
+        mimetype=mimetype,
+        conditional=True,
+        etag=download_etag(github_repo_path, commit_sha),
     )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 # View student submission README
@@ -605,12 +621,41 @@ def view_readme(submission_id):
     return render_template(
         "view_readme.html",
         readme_content=readme_content,
+        readme_html=render_markdown(readme_content, breaks=True),
         submission=submission,
         username=username,
         identity=identity,
     )
 
 
+# Export all submissions of an assignment as a ZIP (Teacher only)
+@assignment_bp.route("/assignments/<assignment_id>/submissions/export", methods=["POST"])
+def export_submissions(assignment_id):
+    """Start building the ZIP in the background; the page polls its status"""
+    if not session.get("username") or session.get("identity") != "teacher":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    assignment = assignment_model.get_assignment(assignment_id)
+    if not assignment:
+        return jsonify({"error": "Assignment not found"}), 404
+
+    # Only the assignment's own teacher may export it (and its students' repos)
+    user = users.find_one({"username": session.get("username")})
+    if not user or str(user["_id"]) != assignment["teacher_id"]:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    include_repos = request.form.get("include_repos") == "1"
+    job_id = submission_export.start_export(
+        assignment_id, session.get("username"), include_repos, assignment.get("title")
+    )
+    return (
+        jsonify(
+            {"job_id": job_id, "status_url": url_for("jobs.job_status", job_id=job_id)}
+        ),
+        202,
+    )
+
+
 # Delete an assignment and related submissions (Teacher only)
 @assignment_bp.route("/assignments/<assignment_id>/delete", methods=["POST"])
 def delete_assignment(assignment_id):
@@ -634,6 +679,7 @@ def delete_assignment(assignment_id):
     success = assignment_model.delete_assignment(assignment_id)
 
     if success:
+        dashboard.assignment_removed(assignment_id)
         return redirect(url_for("assignment.show_assignments"))
     else:
         return "Failed to delete assignment", 500
@@ -649,7 +695,7 @@ def preview_assignment_file(assignment_id, file_path):
         return redirect(url_for("login"))
 
     # Get assignment details
-    assignment = assignment_model.get_assignment(assignment_id)
+    assignment = _visible_assignment(assignment_id)
     if not assignment:
         return "Assignment not found", 404
 
@@ -682,82 +728,252 @@ def preview_assignment_file(assignment_id, file_path):
     else:
         full_path = file_path
 
-    # Make a request to the GitHub API to get the file content
-    headers = {
-        "Authorization": f"token {access_token}",
-        "Accept": "application/vnd.github.v3.raw",
-    }
-
-    # Get file content via GitHub API
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{full_path}"
-    response = requests.get(api_url, headers=headers)
-
-    if response.status_code != 200:
-        return f"Error fetching file: {response.status_code}", 404
-
     # Detect file type based on extension
     file_extension = os.path.splitext(file_path)[1].lower()
 
-    # Get the file content
-    file_content = response.content
+    # What the preview page shows besides the file itself; part of its ETag
+    page_parts = (
+        session.get("username"),
+        session.get("identity"),
+        assignment.get("title"),
+        full_path,
+    )
 
-    # Handle different file types
-    if file_extension in [".md", ".markdown"]:
-        # For markdown, we'll render it with GitHub styling
-        # Get content as text and pass it directly to the template
-        content_text = file_content.decode("utf-8")
+    if file_extension == ".pdf":
+        # For PDFs, point the viewer at the streaming raw endpoint instead of
+        # inlining the file, so large slides load progressively
+        etag = page_etag("preview_pdf.html", *page_parts)
+        cached = not_modified(etag)
+        if cached:
+            return cached
 
-        # Render the markdown template with the content
-        return render_template(
-            "preview_markdown.html",
-            content=content_text,
+        page = render_template(
+            "preview_pdf.html",
+            pdf_url=url_for(
+                "assignment.raw_assignment_file",
+                assignment_id=assignment_id,
+                file_path=file_path,
+            ),
             file_name=os.path.basename(file_path),
             item=assignment,
             item_type="assignment",
             username=session.get("username"),
             identity=session.get("identity"),
         )
+        return conditional_page(page, etag)
 
-    elif file_extension in [".py", ".c", ".cpp", ".h", ".js", ".html", ".css", ".java"]:
-        # For code files, show with syntax highlighting
-        content_text = file_content.decode("utf-8")
+    if file_extension not in MARKDOWN_EXTENSIONS + CODE_EXTENSIONS:
+        # For unsupported file types, stream the download instead of buffering it
+        return download_assignment_file(owner, repo, access_token, full_path)
 
-        return render_template(
-            "preview_code.html",
-            content=content_text,
-            file_name=os.path.basename(file_path),
-            language=file_extension[1:],  # Remove the dot from extension
-            item=assignment,
-            item_type="assignment",
-            username=session.get("username"),
-            identity=session.get("identity"),
+    # The listing's blob SHA and size pin down the page, so a revalidation is
+    # answered from the (cached) listing before any file bytes are fetched
+    try:
+        entry = get_file_entry(owner, repo, access_token, full_path)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    file_version = None
+    if entry and entry.get("sha"):
+        file_version = (entry["sha"], entry.get("size"))
+        is_markdown = file_extension in MARKDOWN_EXTENSIONS
+        template = preview_template(is_markdown, entry.get("size"))
+        cached = not_modified(page_etag(template, *file_version, *page_parts))
+        if cached:
+            return cached
+
+    # Only fetch the head of the file; the rest is paged in by the chunk endpoint
+    try:
+        file_head, total_size = read_file_head(
+            owner, repo, access_token, full_path, entry
         )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        return f"Error fetching file: {str(e)}", 404
 
-    elif file_extension == ".pdf":
-        # For PDFs, we can embed using an iframe or object tag
-        # Create a data URI for the PDF content
-        pdf_base64 = base64.b64encode(file_content).decode("utf-8")
-        pdf_data_uri = f"data:application/pdf;base64,{pdf_base64}"
+    if looks_binary(file_head):
+        # Never inline binary content, offer it as a download instead
+        return download_assignment_file(owner, repo, access_token, full_path)
 
-        return render_template(
-            "preview_pdf.html",
-            pdf_data=pdf_data_uri,
+    if total_size is None:
+        truncated = len(file_head) >= PREVIEW_MAX_BYTES
+    else:
+        truncated = total_size > len(file_head)
+    shown = line_aligned(file_head, at_eof=not truncated)
+    if file_version is None:
+        file_version = (git_blob_sha(file_head), total_size)
+
+    # Handle different file types
+    if file_extension in MARKDOWN_EXTENSIONS and not truncated:
+        # For markdown, render server-side with pygments highlighting
+        etag = page_etag("preview_markdown.html", *file_version, *page_parts)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        # Render the markdown template with the server-rendered (cached) HTML
+        page = render_template(
+            "preview_markdown.html",
+            content_html=render_markdown(decode_text(shown)),
             file_name=os.path.basename(file_path),
             item=assignment,
             item_type="assignment",
             username=session.get("username"),
             identity=session.get("identity"),
         )
+        return conditional_page(page, etag)
+
+    # Code files (and markdown too large to render at once) are shown as text
+    # with syntax highlighting; a truncated view can load further chunks
+    etag = page_etag("preview_code.html", *file_version, *page_parts)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if file_extension in MARKDOWN_EXTENSIONS:
+        language = "markdown"
     else:
-        # For unsupported file types, prompt download
-        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
-        return Response(
-            file_content,
-            headers={
-                "Content-Type": content_type,
-                "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}",
-            },
+        language = file_extension[1:]  # Remove the dot from extension
+
+    page = render_template(
+        "preview_code.html",
+        content=decode_text(shown),
+        file_name=os.path.basename(file_path),
+        language=language,
+        truncated=truncated,
+        shown_size=format_size(len(shown)),
+        total_size=format_size(total_size),
+        next_offset=len(shown),
+        chunk_url=url_for(
+            "assignment.assignment_file_chunk", assignment_id=assignment_id, file_path=file_path
+        ),
+        item=assignment,
+        item_type="assignment",
+        username=session.get("username"),
+        identity=session.get("identity"),
+    )
+    return conditional_page(page, etag)
+
+
+def download_assignment_file(owner, repo, access_token, full_path):
+    """Stream a repository file to the browser as an attachment"""
+    upstream = stream_repo_file(owner, repo, access_token, full_path)
+    if upstream.status_code != 200:
+        upstream.close()
+        return f"Error fetching file: {upstream.status_code}", 404
+    return relay_upstream(upstream, os.path.basename(full_path), as_attachment=True)
+
+
+@assignment_bp.route("/assignments/<assignment_id>/chunk/<path:file_path>")
+def assignment_file_chunk(assignment_id, file_path):
+    """Return the next line-aligned chunk of a truncated text preview as JSON"""
+    if not session.get("username"):
+        return jsonify({"error": "Not logged in"}), 403
+
+    offset = request.args.get("offset", default=0, type=int)
+    if offset < 0:
+        return jsonify({"error": "Invalid offset"}), 400
+
+    assignment = _visible_assignment(assignment_id)
+    if not assignment:
+        return jsonify({"error": "Assignment not found"}), 404
+
+    github_repo_path = assignment.get("github_repo_path", "")
+
+    # Get teacher's GitHub access token
+    teacher = users.find_one({"_id": ObjectId(assignment["teacher_id"])})
+    if not teacher:
+        return jsonify({"error": "Teacher not found"}), 404
+
+    github_info = github_accounts.find_one({"username": teacher.get("username")})
+    if not github_info or not github_info.get("access_token"):
+        return jsonify({"error": "Teacher GitHub account not linked"}), 400
+
+    repo_path = github_info.get("repo")
+    if not repo_path:
+        return jsonify({"error": "No repository linked"}), 400
+
+    owner, repo = repo_path.split("/")
+
+    if github_repo_path and not file_path.startswith(github_repo_path):
+        full_path = f"{github_repo_path}/{file_path}"
+    else:
+        full_path = file_path
+
+    try:
+        data, total_size = read_repo_file_range(
+            owner, repo, github_info["access_token"], full_path, offset, PREVIEW_CHUNK_BYTES
         )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching file: {str(e)}"}), 404
+
+    if looks_binary(data):
+        return jsonify({"error": "Binary content cannot be previewed"}), 415
+
+    at_eof = len(data) < PREVIEW_CHUNK_BYTES or (
+        total_size is not None and offset + len(data) >= total_size
+    )
+    chunk = line_aligned(data, at_eof)
+
+    return jsonify(
+        {
+            "content": decode_text(chunk),
+            "next_offset": offset + len(chunk),
+            "eof": at_eof,
+            "total_size": total_size,
+        }
+    )
+
+
+@assignment_bp.route("/assignments/<assignment_id>/raw/<path:file_path>")
+def raw_assignment_file(assignment_id, file_path):
+    """
+    Stream the raw bytes of a repository file (used by the PDF viewer).
+    Range requests are forwarded to GitHub so the browser can load it progressively.
+    """
+    if not session.get("username"):
+        return redirect(url_for("login"))
+
+    assignment = _visible_assignment(assignment_id)
+    if not assignment:
+        return "Assignment not found", 404
+
+    github_repo_path = assignment.get("github_repo_path", "")
+
+    # Get teacher's GitHub access token
+    teacher = users.find_one({"_id": ObjectId(assignment["teacher_id"])})
+    if not teacher:
+        return "Teacher not found", 404
+
+    github_info = github_accounts.find_one({"username": teacher.get("username")})
+    if not github_info or not github_info.get("access_token"):
+        return "Teacher GitHub account not linked or missing access token", 400
+
+    repo_path = github_info.get("repo")
+    if not repo_path:
+        return "No repository linked", 400
+
+    owner, repo = repo_path.split("/")
+
+    if github_repo_path and not file_path.startswith(github_repo_path):
+        full_path = f"{github_repo_path}/{file_path}"
+    else:
+        full_path = file_path
+
+    upstream = stream_repo_file(
+        owner,
+        repo,
+        github_info["access_token"],
+        full_path,
+        range_header=request.headers.get("Range"),
+    )
+    if upstream.status_code not in (200, 206, 416):
+        upstream.close()
+        return f"Error fetching file: {upstream.status_code}", 404
+
+    return relay_upstream(upstream, os.path.basename(file_path))
 
 
 # Add a route to browse assignment files
@@ -767,7 +983,7 @@ def browse_assignment_files(assignment_id):
     if not session.get("username"):
         return redirect(url_for("login"))
 
-    assignment = assignment_model.get_assignment(assignment_id)
+    assignment = _visible_assignment(assignment_id)
     if not assignment:
         return "Assignment not found", 404
 
@@ -796,23 +1012,21 @@ def browse_assignment_files(assignment_id):
     # Determine path to browse (from query param or from assignment)
     browse_path = request.args.get("path", github_repo_path)
 
-    # If it's a direct file, redirect to preview
-    if browse_path and is_repo_path_file(owner, repo, access_token, browse_path):
-        return redirect(
-            url_for(
-                "assignment.preview_assignment_file",
-                assignment_id=assignment_id,
-                file_path=browse_path,
-            )
-        )
-
-    # Get contents of path
+    # One contents request says whether this is a file and lists it if not
     try:
-        contents = get_repo_contents(owner, repo, access_token, browse_path)
+        node = resolve_repo_path(owner, repo, access_token, browse_path)
 
-        # Handle single file response case
-        if not isinstance(contents, list):
-            contents = [contents]
+        # If it's a direct file, redirect to preview
+        if browse_path and node.is_file:
+            return redirect(
+                url_for(
+                    "assignment.preview_assignment_file",
+                    assignment_id=assignment_id,
+                    file_path=browse_path,
+                )
+            )
+
+        contents = node.entries
 
         # Format contents for display
         formatted_contents = []
@@ -832,6 +1046,22 @@ def browse_assignment_files(assignment_id):
             key=lambda x: (0 if x["type"] == "dir" else 1, x["name"])
         )
 
+        # The listing's blob/tree SHAs change whenever anything under it does;
+        # the assignment's own fields are rendered above the listing
+        etag = page_etag(
+            "browse_assignment_files.html",
+            session.get("username"),
+            session.get("identity"),
+            assignment.get("title"),
+            assignment.get("description"),
+            github_repo_path,
+            browse_path,
+            *(f"{item['path']}:{item.get('sha', '')}" for item in contents),
+        )
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
         # Compute breadcrumb paths
         breadcrumbs = []
         if browse_path:
@@ -843,7 +1073,7 @@ def browse_assignment_files(assignment_id):
                 current_path += part
                 breadcrumbs.append({"name": part, "path": current_path})
 
-        return render_template(
+        page = render_template(
             "browse_assignment_files.html",
             assignment=assignment,
             contents=formatted_contents,
@@ -853,11 +1083,41 @@ def browse_assignment_files(assignment_id):
             username=session.get("username"),
             identity=session.get("identity"),
         )
+        return conditional_page(page, etag)
 
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return f"Error accessing repository: {str(e)}", 400
 
 
+@assignment_bp.route("/assignments/<assignment_id>/tree")
+def assignment_tree(assignment_id):
+    """Tree index of the assignment's repository, so browsing runs client-side"""
+    if not session.get("username"):
+        return jsonify({"error": "Not logged in"}), 403
+
+    assignment = _visible_assignment(assignment_id)
+    if not assignment:
+        return jsonify({"error": "Assignment not found"}), 404
+
+    teacher = users.find_one({"_id": ObjectId(assignment["teacher_id"])})
+    github_info = (
+        github_accounts.find_one({"username": teacher.get("username")}) if teacher else None
+    )
+    if not github_info or not github_info.get("access_token") or not github_info.get("repo"):
+        return jsonify({"error": "No GitHub repository linked"}), 400
+
+    owner, repo = github_info["repo"].split("/")
+    try:
+        tree_sha, data = get_tree_index(owner, repo, github_info["access_token"])
+        return tree_index_response(tree_sha, data)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
+    except Exception as e:
+        return jsonify({"error": f"GitHub API error: {str(e)}"}), 400
+
+
 # Student repository file browser
 @assignment_bp.route("/assignments/<assignment_id>/select-file")
 def select_submission_file(assignment_id):
@@ -865,7 +1125,7 @@ def select_submission_file(assignment_id):
     if not session.get("username") or session.get("identity") != "student":
         return redirect(url_for("home"))
 
-    assignment = assignment_model.get_assignment(assignment_id)
+    assignment = _visible_assignment(assignment_id)
     if not assignment:
         return "Assignment not found", 404
 
@@ -884,35 +1144,33 @@ def select_submission_file(assignment_id):
     # Determine path to browse (from query param)
     browse_path = request.args.get("path", "")
 
-    # If it's a direct file, check if it's a markdown file
-    if browse_path and is_repo_path_file(owner, repo, access_token, browse_path):
-        if browse_path.lower().endswith((".md", ".markdown")):
-            # Allow direct submission
-            return redirect(
-                url_for(
-                    "assignment.submit_markdown_assignment",
-                    assignment_id=assignment_id,
-                    markdown_path=browse_path,
+    # One contents request says whether this is a file and lists it if not
+    try:
+        node = resolve_repo_path(owner, repo, access_token, browse_path)
+
+        # If it's a direct file, check if it's a markdown file
+        if browse_path and node.is_file:
+            if browse_path.lower().endswith((".md", ".markdown")):
+                # Allow direct submission
+                return redirect(
+                    url_for(
+                        "assignment.submit_markdown_assignment",
+                        assignment_id=assignment_id,
+                        markdown_path=browse_path,
+                    )
                 )
-            )
-        else:
-            # Not a markdown file - redirect back to folder view
-            parent_path = "/".join(browse_path.split("/")[:-1])
-            return redirect(
-                url_for(
-                    "assignment.select_submission_file",
-                    assignment_id=assignment_id,
-                    path=parent_path,
+            else:
+                # Not a markdown file - redirect back to folder view
+                parent_path = "/".join(browse_path.split("/")[:-1])
+                return redirect(
+                    url_for(
+                        "assignment.select_submission_file",
+                        assignment_id=assignment_id,
+                        path=parent_path,
+                    )
                 )
-            )
 
-    # Get contents of path
-    try:
-        contents = get_repo_contents(owner, repo, access_token, browse_path)
-
-        # Handle single file response case
-        if not isinstance(contents, list):
-            contents = [contents]
+        contents = node.entries
 
         # Format contents for display
         formatted_contents = []
@@ -953,6 +1211,8 @@ def select_submission_file(assignment_id):
             identity=session.get("identity"),
         )
 
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return f"Error accessing repository: {str(e)}", 400
 
@@ -976,7 +1236,7 @@ def submit_markdown_assignment(assignment_id):
         return "No markdown file selected", 400
 
     # Get assignment
-    assignment = assignment_model.get_assignment(assignment_id)
+    assignment = _visible_assignment(assignment_id)
     if not assignment:
         return "Assignment not found", 404
 
@@ -1004,26 +1264,28 @@ def submit_markdown_assignment(assignment_id):
 
     try:
         # Check if path is a valid markdown file
-        if not is_repo_path_file(owner, repo, access_token, markdown_path):
+        try:
+            node = resolve_repo_path(owner, repo, access_token, markdown_path)
+        except RateLimitExceeded:
+            raise
+        except Exception:
+            node = None
+        if node is None or not node.is_file:
             return "Invalid file path", 400
 
         if not markdown_path.lower().endswith((".md", ".markdown")):
             return "Selected file is not a markdown file", 400
 
-        # Get markdown content
-        headers = {
-            "Authorization": f"token {access_token}",
-            "Accept": "application/vnd.github.v3.raw",
-        }
-        api_url = (
-            f"https://api.github.com/repos/{owner}/{repo}/contents/{markdown_path}"
-        )
-        response = requests.get(api_url, headers=headers)
-
-        if response.status_code != 200:
-            return f"Error fetching file: {response.status_code}", 404
+        # Get markdown content (already inlined in the contents response
+        # unless the file is over 1 MB)
+        try:
+            readme_bytes = read_repo_file(owner, repo, access_token, node)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            return f"Error fetching file: {str(e)}", 404
 
-        readme_content = response.content.decode("utf-8")
+        readme_content = readme_bytes.decode("utf-8")
 
         # If GET method, show preview before submission
         if request.method == "GET":
@@ -1045,6 +1307,13 @@ def submit_markdown_assignment(assignment_id):
         # Create file URL for direct linking
         file_url = f"https://github.com/{repo_path}/blob/main/{markdown_path}"
 
+        # Remember the commit so exports can fetch the repo as submitted; no
+        # webhook watches student repos, so a cached SHA could be stale
+        try:
+            commit_sha = get_path_commit_sha(owner, repo, access_token, fresh=True)
+        except Exception:
+            commit_sha = None
+
         if existing_submission:
             # Update submission
             submission_model.update_submission(
@@ -1052,6 +1321,7 @@ def submit_markdown_assignment(assignment_id):
                 {
                     "github_link": file_url,
                     "readme_content": readme_content,
+                    "commit_sha": commit_sha,
                     "submitted_at": datetime.now(),
                     "status": "submitted",
                 },
@@ -1063,7 +1333,9 @@ def submit_markdown_assignment(assignment_id):
                 assignment_id=assignment_id,
                 github_link=file_url,
                 readme_content=readme_content,
+                commit_sha=commit_sha,
             )
+        dashboard.submission_recorded(student_id, assignment_id)
 
         # send receipt mail -----------------------------------------
         if student.get("email"):
@@ -1074,5 +1346,7 @@ def submit_markdown_assignment(assignment_id):
             url_for("assignment.view_assignment", assignment_id=assignment_id)
         )
 
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return f"Error processing markdown file: {str(e)}", 500
@@ -15,6 +15,7 @@ from bson.objectid import ObjectId
 from dotenv import load_dotenv
 from pymongo import MongoClient
 import os
+import query_log
 
 load_dotenv()
 mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
@@ -25,7 +26,7 @@ chat_bp = Blueprint("chat", __name__, url_prefix="/chat")
 chat_collection = db["chats"]
 user_collection = db["users"]
 user_model = UserModel(user_collection)
-chat_model = ChatModel(chat_collection)
+chat_model = ChatModel(query_log.watch(chat_collection))
 
 
 def get_all_contacts(current_username):
@@ -1,7 +1,4 @@
 import os
-import requests
-import zipfile
-from io import BytesIO
 from datetime import datetime
 from flask import (
     Blueprint,
@@ -12,17 +9,54 @@ from flask import (
     url_for,
     jsonify,
     send_file,
-    Response,
 )
 from bson.objectid import ObjectId
 from pymongo import MongoClient
 from models.content import ContentModel
+from markdown_utils import render_markdown
+from http_utils import (
+    relay_upstream,
+    page_etag,
+    not_modified,
+    conditional_page,
+    rate_limited_response,
+)
+from github_utils import RateLimitExceeded
+from archive_utils import ZIP_SUFFIX, download_etag, get_or_build_archive
+from warmup import schedule_item_warmup
+from preview_utils import (
+    CODE_EXTENSIONS,
+    MARKDOWN_EXTENSIONS,
+    PREVIEW_CHUNK_BYTES,
+    PREVIEW_MAX_BYTES,
+    decode_text,
+    format_size,
+    line_aligned,
+    looks_binary,
+    preview_template,
+)
 from dotenv import load_dotenv
-import base64
-import mimetypes
 
 # Import shared GitHub functions
-from .githubRoute import get_repo_contents, is_repo_path_file
+from .githubRoute import (
+    resolve_repo_path,
+    stream_repo_file,
+    get_file_entry,
+    get_path_commit_sha,
+    git_blob_sha,
+    read_repo_file_range,
+    read_file_head,
+    get_tree_index,
+)
+from tree_index import tree_index_response
+import query_log
+from course_utils import (
+    course_model,
+    course_scope,
+    enrollment_model,
+    teacher_course,
+    visible_to_student,
+)
 
 load_dotenv()
 
@@ -37,7 +71,24 @@ content_collection = db["content"]
 github_accounts = db["github"]
 
 # Create model instance
-content_model = ContentModel(content_collection)
+content_model = ContentModel(query_log.watch(content_collection))
+
+
+def _visible_content(content_id):
+    """The content item if the logged-in user may open it, else None.
+
+    Students only get items of their courses (or posted without one), the
+    same ones their content list shows.
+    """
+    content_item = content_model.get_content(content_id)
+    if not content_item or session.get("identity") == "teacher":
+        return content_item
+    if content_item.get("course_id") is None:
+        return content_item
+    student = users.find_one({"username": session.get("username")})
+    if not student or not visible_to_student(content_item, str(student["_id"])):
+        return None
+    return content_item
 
 
 # Display all content items
@@ -64,11 +115,19 @@ def show_content():
             identity=identity,
         )
     else:
-        # If student, display all available content
-        content_items = content_model.get_all_content()
+        # If student, display one page of their courses' content
+        user = users.find_one({"username": username})
+        if not user:
+            return "User not found", 404
+        page = content_model.get_content_page(
+            course_scope(enrollment_model.get_student_course_ids(str(user["_id"]))),
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        )
         return render_template(
             "student_content.html",
-            content_items=content_items,
+            content_items=page["items"],
+            page=page,
             username=username,
             identity=identity,
         )
@@ -83,9 +142,12 @@ def create_content():
     if request.method == "GET":
         # Get teacher's linked GitHub repositories
         github_info = github_accounts.find_one({"username": session.get("username")})
+        user = users.find_one({"username": session.get("username")})
+        courses = course_model.get_teacher_courses(str(user["_id"])) if user else []
         return render_template(
             "create_content.html",
             github_info=github_info,
+            courses=courses,
             username=session.get("username"),
             identity=session.get("identity"),
         )
@@ -103,6 +165,11 @@ def create_content():
     if not user:
         return "User not found", 404
 
+    # Optional course; only the teacher's own courses can be chosen
+    course_id = request.form.get("course_id") or None
+    if course_id and not teacher_course(course_id, str(user["_id"])):
+        return "Course not found", 404
+
     # Get teacher's GitHub information
     github_info = github_accounts.find_one({"username": session.get("username")})
 
@@ -126,7 +193,10 @@ def create_content():
         description=description,
         github_repo_url=github_repo_url,
         github_repo_path=github_repo_path,
+        course_id=course_id,
     )
+    # Warm the repo caches so the first student doesn't wait on GitHub
+    schedule_item_warmup(github_info, github_repo_path)
 
     return redirect(url_for("content.show_content"))
 
@@ -137,7 +207,7 @@ def view_content(content_id):
     if not session.get("username"):
         return redirect(url_for("login"))
 
-    content_item = content_model.get_content(content_id)
+    content_item = _visible_content(content_id)
     if not content_item:
         return "Content not found", 404
 
@@ -161,7 +231,7 @@ def download_content(content_id):
     if not session.get("username"):
         return redirect(url_for("login"))
 
-    content_item = content_model.get_content(content_id)
+    content_item = _visible_content(content_id)
     if not content_item:
         return "Content not found", 404
 
@@ -198,113 +268,39 @@ def download_content(content_id):
         # Use the linked repository
         owner, repo = repo_path.split("/")
 
-    # Get the name of the selected folder or file
-    selected_folder_name = ""
-    if github_repo_path:
-        selected_folder_name = github_repo_path.split("/")[-1]
-
-    # Check if selected path is a file
+    # The last commit touching the path keys both the disk cache and the ETag
     try:
-        is_direct_file = is_repo_path_file(owner, repo, access_token, github_repo_path)
-
-        # If it's a direct file, download and return it without ZIP
-        if is_direct_file:
-            # Get file content directly
-            content_info = get_repo_contents(
-                owner, repo, access_token, github_repo_path
-            )
-            download_url = content_info.get("download_url")
-            if download_url:
-                file_response = requests.get(
-                    download_url,
-                    headers={
-                        "Authorization": f"token {access_token}",
-                        "Accept": "application/vnd.github+json",
-                    },
-                )
-                if file_response.status_code == 200:
-                    memory_file = BytesIO(file_response.content)
-                    memory_file.seek(0)
-
-                    # Get filename from path
-                    filename = github_repo_path.split("/")[-1]
-
-                    return send_file(
-                        memory_file,
-                        download_name=filename,
-                        as_attachment=True,
-                        mimetype="application/octet-stream",  # Generic binary
-                    )
+        commit_sha = get_path_commit_sha(owner, repo, access_token, github_repo_path)
+        archive_path = get_or_build_archive(
+            owner, repo, access_token, github_repo_path, commit_sha
+        )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
-        # Log the error but continue with ZIP creation as fallback
-        print(f"Error checking if path is a file: {str(e)}")
-
-    # Create a ZIP file in memory (for folders or multiple files)
-    memory_file = BytesIO()
-    with zipfile.ZipFile(memory_file, "w", zipfile.ZIP_DEFLATED) as zf:
-        # Recursively get repository contents
-        def fetch_repo_contents(path):
-            try:
-                # Get contents using shared function
-                contents = get_repo_contents(owner, repo, access_token, path)
-
-                # Handle single file response case
-                if not isinstance(contents, list):
-                    contents = [contents]
-
-                for item in contents:
-                    item_path = item["path"]
-                    item_type = item["type"]
-
-                    if item_type == "file":
-                        # Get file content
-                        download_url = item["download_url"]
-                        file_response = requests.get(
-                            download_url,
-                            headers={
-                                "Authorization": f"token {access_token}",
-                                "Accept": "application/vnd.github+json",
-                            },
-                        )
-                        if file_response.status_code == 200:
-                            # Build the path for the file in the ZIP
-                            if github_repo_path and item_path.startswith(
-                                github_repo_path
-                            ):
-                                # Get the part after the selected path
-                                rel_path = item_path[len(github_repo_path) :].lstrip(
-                                    "/"
-                                )
-                                # Add the selected folder as the top level directory
-                                zip_path = os.path.join(selected_folder_name, rel_path)
-                            else:
-                                # This shouldn't normally happen but as a fallback
-                                zip_path = item_path
-
-                            # Add file to zip
-                            zf.writestr(zip_path, file_response.content)
-
-                    elif item_type == "dir":
-                        # Recursively process subdirectory
-                        fetch_repo_contents(item_path)
-            except Exception as e:
-                print(f"Error fetching repository contents for {path}: {str(e)}")
-
-        # Start recursive content retrieval
-        fetch_repo_contents(github_repo_path)
-
-    # Set file pointer to beginning
-    memory_file.seek(0)
-
-    # Generate download filename
-    content_title = content_item.get("title", "content").replace(" ", "_")
-
-    return send_file(
-        memory_file,
-        download_name=f"{content_title}.zip",
+        return f"Error accessing repository: {str(e)}", 400
+
+    if archive_path.endswith(ZIP_SUFFIX):
+        # Generate download filename
+        content_title = content_item.get("title", "content").replace(" ", "_")
+        download_name = f"{content_title}.zip"
+        mimetype = "application/zip"
+    else:
+        # A single selected file is downloaded directly without ZIP
+        download_name = github_repo_path.split("/")[-1]
+        mimetype = "application/octet-stream"  # Generic binary
+
+    # conditional=True answers Range/If-Range and If-None-Match from the cached
+    # file, so interrupted downloads resume and repeat downloads revalidate
+    response = send_file(
+        archive_path,
+        download_name=download_name,
         as_attachment=True,
-        mimetype="application/zip",
+        mimetype=mimetype,
+        conditional=True,
+        etag=download_etag(github_repo_path, commit_sha),
     )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @content_bp.route("/content/<content_id>/preview/<path:file_path>")
@@ -317,7 +313,7 @@ def preview_content_file(content_id, file_path):
         return redirect(url_for("login"))
 
     # Get content details
-    content_item = content_model.get_content(content_id)
+    content_item = _visible_content(content_id)
     if not content_item:
         return "Content not found", 404
 
@@ -350,82 +346,252 @@ def preview_content_file(content_id, file_path):
     else:
         full_path = file_path
 
-    # Make a request to the GitHub API to get the file content
-    headers = {
-        "Authorization": f"token {access_token}",
-        "Accept": "application/vnd.github.v3.raw",
-    }
-
-    # Get file content via GitHub API
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{full_path}"
-    response = requests.get(api_url, headers=headers)
-
-    if response.status_code != 200:
-        return f"Error fetching file: {response.status_code}", 404
-
     # Detect file type based on extension
     file_extension = os.path.splitext(file_path)[1].lower()
 
-    # Get the file content
-    file_content = response.content
+    # What the preview page shows besides the file itself; part of its ETag
+    page_parts = (
+        session.get("username"),
+        session.get("identity"),
+        content_item.get("title"),
+        full_path,
+    )
 
-    # Handle different file types
-    if file_extension in [".md", ".markdown"]:
-        # For markdown, we'll render it with GitHub styling
-        # Get content as text and pass it directly to the template
-        content_text = file_content.decode("utf-8")
+    if file_extension == ".pdf":
+        # For PDFs, point the viewer at the streaming raw endpoint instead of
+        # inlining the file, so large slides load progressively
+        etag = page_etag("preview_pdf.html", *page_parts)
+        cached = not_modified(etag)
+        if cached:
+            return cached
 
-        # Render the markdown template with the content
-        return render_template(
-            "preview_markdown.html",
-            content=content_text,
+        page = render_template(
+            "preview_pdf.html",
+            pdf_url=url_for(
+                "content.raw_content_file",
+                content_id=content_id,
+                file_path=file_path,
+            ),
             file_name=os.path.basename(file_path),
             item=content_item,
             item_type="content",
             username=session.get("username"),
             identity=session.get("identity"),
         )
+        return conditional_page(page, etag)
 
-    elif file_extension in [".py", ".c", ".cpp", ".h", ".js", ".html", ".css", ".java"]:
-        # For code files, show with syntax highlighting
-        content_text = file_content.decode("utf-8")
+    if file_extension not in MARKDOWN_EXTENSIONS + CODE_EXTENSIONS:
+        # For unsupported file types, stream the download instead of buffering it
+        return download_content_file(owner, repo, access_token, full_path)
 
-        return render_template(
-            "preview_code.html",
-            content=content_text,
-            file_name=os.path.basename(file_path),
-            language=file_extension[1:],  # Remove the dot from extension
-            item=content_item,
-            item_type="content",
-            username=session.get("username"),
-            identity=session.get("identity"),
+    # The listing's blob SHA and size pin down the page, so a revalidation is
+    # answered from the (cached) listing before any file bytes are fetched
+    try:
+        entry = get_file_entry(owner, repo, access_token, full_path)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    file_version = None
+    if entry and entry.get("sha"):
+        file_version = (entry["sha"], entry.get("size"))
+        is_markdown = file_extension in MARKDOWN_EXTENSIONS
+        template = preview_template(is_markdown, entry.get("size"))
+        cached = not_modified(page_etag(template, *file_version, *page_parts))
+        if cached:
+            return cached
+
+    # Only fetch the head of the file; the rest is paged in by the chunk endpoint
+    try:
+        file_head, total_size = read_file_head(
+            owner, repo, access_token, full_path, entry
         )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        return f"Error fetching file: {str(e)}", 404
 
-    elif file_extension == ".pdf":
-        # For PDFs, we can embed using an iframe or object tag
-        # Create a data URI for the PDF content
-        pdf_base64 = base64.b64encode(file_content).decode("utf-8")
-        pdf_data_uri = f"data:application/pdf;base64,{pdf_base64}"
+    if looks_binary(file_head):
+        # Never inline binary content, offer it as a download instead
+        return download_content_file(owner, repo, access_token, full_path)
 
-        return render_template(
-            "preview_pdf.html",
-            pdf_data=pdf_data_uri,
+    if total_size is None:
+        truncated = len(file_head) >= PREVIEW_MAX_BYTES
+    else:
+        truncated = total_size > len(file_head)
+    shown = line_aligned(file_head, at_eof=not truncated)
+    if file_version is None:
+        file_version = (git_blob_sha(file_head), total_size)
+
+    # Handle different file types
+    if file_extension in MARKDOWN_EXTENSIONS and not truncated:
+        # For markdown, render server-side with pygments highlighting
+        etag = page_etag("preview_markdown.html", *file_version, *page_parts)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        # Render the markdown template with the server-rendered (cached) HTML
+        page = render_template(
+            "preview_markdown.html",
+            content_html=render_markdown(decode_text(shown)),
             file_name=os.path.basename(file_path),
             item=content_item,
             item_type="content",
             username=session.get("username"),
             identity=session.get("identity"),
         )
+        return conditional_page(page, etag)
+
+    # Code files (and markdown too large to render at once) are shown as text
+    # with syntax highlighting; a truncated view can load further chunks
+    etag = page_etag("preview_code.html", *file_version, *page_parts)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if file_extension in MARKDOWN_EXTENSIONS:
+        language = "markdown"
     else:
-        # For unsupported file types, prompt download
-        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
-        return Response(
-            file_content,
-            headers={
-                "Content-Type": content_type,
-                "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}",
-            },
+        language = file_extension[1:]  # Remove the dot from extension
+
+    page = render_template(
+        "preview_code.html",
+        content=decode_text(shown),
+        file_name=os.path.basename(file_path),
+        language=language,
+        truncated=truncated,
+        shown_size=format_size(len(shown)),
+        total_size=format_size(total_size),
+        next_offset=len(shown),
+        chunk_url=url_for(
+            "content.content_file_chunk", content_id=content_id, file_path=file_path
+        ),
+        item=content_item,
+        item_type="content",
+        username=session.get("username"),
+        identity=session.get("identity"),
+    )
+    return conditional_page(page, etag)
+
+
+def download_content_file(owner, repo, access_token, full_path):
+    """Stream a repository file to the browser as an attachment"""
+    upstream = stream_repo_file(owner, repo, access_token, full_path)
+    if upstream.status_code != 200:
+        upstream.close()
+        return f"Error fetching file: {upstream.status_code}", 404
+    return relay_upstream(upstream, os.path.basename(full_path), as_attachment=True)
+
+
+@content_bp.route("/content/<content_id>/chunk/<path:file_path>")
+def content_file_chunk(content_id, file_path):
+    """Return the next line-aligned chunk of a truncated text preview as JSON"""
+    if not session.get("username"):
+        return jsonify({"error": "Not logged in"}), 403
+
+    offset = request.args.get("offset", default=0, type=int)
+    if offset < 0:
+        return jsonify({"error": "Invalid offset"}), 400
+
+    content_item = _visible_content(content_id)
+    if not content_item:
+        return jsonify({"error": "Content not found"}), 404
+
+    github_repo_path = content_item.get("github_repo_path", "")
+
+    # Get teacher's GitHub access token
+    teacher = users.find_one({"_id": ObjectId(content_item["teacher_id"])})
+    if not teacher:
+        return jsonify({"error": "Teacher not found"}), 404
+
+    github_info = github_accounts.find_one({"username": teacher.get("username")})
+    if not github_info or not github_info.get("access_token"):
+        return jsonify({"error": "Teacher GitHub account not linked"}), 400
+
+    repo_path = github_info.get("repo")
+    if not repo_path:
+        return jsonify({"error": "No repository linked"}), 400
+
+    owner, repo = repo_path.split("/")
+
+    if github_repo_path and not file_path.startswith(github_repo_path):
+        full_path = f"{github_repo_path}/{file_path}"
+    else:
+        full_path = file_path
+
+    try:
+        data, total_size = read_repo_file_range(
+            owner, repo, github_info["access_token"], full_path, offset, PREVIEW_CHUNK_BYTES
         )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching file: {str(e)}"}), 404
+
+    if looks_binary(data):
+        return jsonify({"error": "Binary content cannot be previewed"}), 415
+
+    at_eof = len(data) < PREVIEW_CHUNK_BYTES or (
+        total_size is not None and offset + len(data) >= total_size
+    )
+    chunk = line_aligned(data, at_eof)
+
+    return jsonify(
+        {
+            "content": decode_text(chunk),
+            "next_offset": offset + len(chunk),
+            "eof": at_eof,
+            "total_size": total_size,
+        }
+    )
+
+
+@content_bp.route("/content/<content_id>/raw/<path:file_path>")
+def raw_content_file(content_id, file_path):
+    """
+    Stream the raw bytes of a repository file (used by the PDF viewer).
+    Range requests are forwarded to GitHub so the browser can load it progressively.
+    """
+    if not session.get("username"):
+        return redirect(url_for("login"))
+
+    content_item = _visible_content(content_id)
+    if not content_item:
+        return "Content not found", 404
+
+    github_repo_path = content_item.get("github_repo_path", "")
+
+    # Get teacher's GitHub access token
+    teacher = users.find_one({"_id": ObjectId(content_item["teacher_id"])})
+    if not teacher:
+        return "Teacher not found", 404
+
+    github_info = github_accounts.find_one({"username": teacher.get("username")})
+    if not github_info or not github_info.get("access_token"):
+        return "Teacher GitHub account not linked or missing access token", 400
+
+    repo_path = github_info.get("repo")
+    if not repo_path:
+        return "No repository linked", 400
+
+    owner, repo = repo_path.split("/")
+
+    if github_repo_path and not file_path.startswith(github_repo_path):
+        full_path = f"{github_repo_path}/{file_path}"
+    else:
+        full_path = file_path
+
+    upstream = stream_repo_file(
+        owner,
+        repo,
+        github_info["access_token"],
+        full_path,
+        range_header=request.headers.get("Range"),
+    )
+    if upstream.status_code not in (200, 206, 416):
+        upstream.close()
+        return f"Error fetching file: {upstream.status_code}", 404
+
+    return relay_upstream(upstream, os.path.basename(file_path))
 
 
 # Add a route to browse content files
@@ -435,7 +601,7 @@ def browse_content_files(content_id):
     if not session.get("username"):
         return redirect(url_for("login"))
 
-    content_item = content_model.get_content(content_id)
+    content_item = _visible_content(content_id)
     if not content_item:
         return "Content not found", 404
 
@@ -464,23 +630,21 @@ def browse_content_files(content_id):
     # Determine path to browse (from query param or from content)
     browse_path = request.args.get("path", github_repo_path)
 
-    # If it's a direct file, redirect to preview
-    if browse_path and is_repo_path_file(owner, repo, access_token, browse_path):
-        return redirect(
-            url_for(
-                "content.preview_content_file",
-                content_id=content_id,
-                file_path=browse_path,
-            )
-        )
-
-    # Get contents of path
+    # One contents request says whether this is a file and lists it if not
     try:
-        contents = get_repo_contents(owner, repo, access_token, browse_path)
+        node = resolve_repo_path(owner, repo, access_token, browse_path)
+
+        # If it's a direct file, redirect to preview
+        if browse_path and node.is_file:
+            return redirect(
+                url_for(
+                    "content.preview_content_file",
+                    content_id=content_id,
+                    file_path=browse_path,
+                )
+            )
 
-        # Handle single file response case
-        if not isinstance(contents, list):
-            contents = [contents]
+        contents = node.entries
 
         # Format contents for display
         formatted_contents = []
@@ -500,6 +664,22 @@ def browse_content_files(content_id):
             key=lambda x: (0 if x["type"] == "dir" else 1, x["name"])
         )
 
+        # The listing's blob/tree SHAs change whenever anything under it does;
+        # the material's own fields are rendered above the listing
+        etag = page_etag(
+            "browse_content_files.html",
+            session.get("username"),
+            session.get("identity"),
+            content_item.get("title"),
+            content_item.get("description"),
+            github_repo_path,
+            browse_path,
+            *(f"{item['path']}:{item.get('sha', '')}" for item in contents),
+        )
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
         # Compute breadcrumb paths
         breadcrumbs = []
         if browse_path:
@@ -511,7 +691,7 @@ def browse_content_files(content_id):
                 current_path += part
                 breadcrumbs.append({"name": part, "path": current_path})
 
-        return render_template(
+        page = render_template(
             "browse_content_files.html",
             content_item=content_item,
             contents=formatted_contents,
@@ -521,11 +701,41 @@ def browse_content_files(content_id):
             username=session.get("username"),
             identity=session.get("identity"),
         )
+        return conditional_page(page, etag)
 
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return f"Error accessing repository: {str(e)}", 400
 
 
+@content_bp.route("/content/<content_id>/tree")
+def content_tree(content_id):
+    """Tree index of the material's repository, so browsing runs client-side"""
+    if not session.get("username"):
+        return jsonify({"error": "Not logged in"}), 403
+
+    content_item = _visible_content(content_id)
+    if not content_item:
+        return jsonify({"error": "Content not found"}), 404
+
+    teacher = users.find_one({"_id": ObjectId(content_item["teacher_id"])})
+    github_info = (
+        github_accounts.find_one({"username": teacher.get("username")}) if teacher else None
+    )
+    if not github_info or not github_info.get("access_token") or not github_info.get("repo"):
+        return jsonify({"error": "No GitHub repository linked"}), 400
+
+    owner, repo = github_info["repo"].split("/")
+    try:
+        tree_sha, data = get_tree_index(owner, repo, github_info["access_token"])
+        return tree_index_response(tree_sha, data)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
+    except Exception as e:
+        return jsonify({"error": f"GitHub API error: {str(e)}"}), 400
+
+
 # Delete content (Teacher only)
 @content_bp.route("/content/<content_id>/delete", methods=["POST"])
 def delete_content(content_id):
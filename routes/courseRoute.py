@@ -0,0 +1,120 @@
+# routes/courseRoute.py
+import os
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from pymongo import MongoClient
+
+import dashboard
+from course_utils import course_model, enrollment_model, teacher_course
+
+load_dotenv()
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+client = MongoClient(mongo_uri)
+db = client.get_database()
+users = db["users"]
+
+course_bp = Blueprint("courses", __name__, url_prefix="/courses")
+
+
+def _teacher():
+    """The logged-in teacher's user document, or None."""
+    if not session.get("username") or session.get("identity") != "teacher":
+        return None
+    return users.find_one({"username": session["username"]})
+
+
+# Teachers: list their courses and create new ones
+@course_bp.route("/", methods=["GET", "POST"])
+def show_courses():
+    teacher = _teacher()
+    if not teacher:
+        return redirect(url_for("home"))
+    teacher_id = str(teacher["_id"])
+
+    if request.method == "POST":
+        name = (request.form.get("name") or "").strip()
+        if not name:
+            flash("Course name is required", "danger")
+        else:
+            code = (request.form.get("code") or "").strip() or None
+            course_model.create_course(teacher_id, name, code)
+        return redirect(url_for("courses.show_courses"))
+
+    return render_template(
+        "courses.html",
+        courses=course_model.get_teacher_courses(teacher_id),
+        username=session.get("username"),
+        identity=session.get("identity"),
+    )
+
+
+# Course roster
+@course_bp.route("/<course_id>")
+def view_course(course_id):
+    teacher = _teacher()
+    if not teacher:
+        return redirect(url_for("home"))
+    course = teacher_course(course_id, str(teacher["_id"]))
+    if not course:
+        return "Course not found", 404
+
+    student_ids = enrollment_model.get_course_student_ids(course_id)
+    students = list(
+        users.find(
+            {"_id": {"$in": [ObjectId(student_id) for student_id in student_ids]}},
+            {"username": 1, "email": 1},
+        ).sort("username", 1)
+    )
+    return render_template(
+        "course_detail.html",
+        course=course,
+        students=students,
+        username=session.get("username"),
+        identity=session.get("identity"),
+    )
+
+
+# Enroll students by username (one per line or comma separated)
+@course_bp.route("/<course_id>/enroll", methods=["POST"])
+def enroll_students(course_id):
+    teacher = _teacher()
+    if not teacher:
+        return redirect(url_for("home"))
+    if not teacher_course(course_id, str(teacher["_id"])):
+        return "Course not found", 404
+
+    names = {
+        name.strip()
+        for name in (request.form.get("usernames") or "").replace(",", "\n").split("\n")
+        if name.strip()
+    }
+    found = users.find(
+        {"username": {"$in": sorted(names)}, "identity": "student"}, {"username": 1}
+    )
+    enrolled = set()
+    for student in found:
+        if enrollment_model.enroll(course_id, str(student["_id"])):
+            # The course's assignments join the student's dashboard
+            dashboard.invalidate(str(student["_id"]))
+        enrolled.add(student["username"])
+
+    if enrolled:
+        flash(f"Enrolled {len(enrolled)} student(s)", "success")
+    missing = names - enrolled
+    if missing:
+        flash(f"No student named: {', '.join(sorted(missing))}", "warning")
+    return redirect(url_for("courses.view_course", course_id=course_id))
+
+
+@course_bp.route("/<course_id>/unenroll/<student_id>", methods=["POST"])
+def unenroll_student(course_id, student_id):
+    teacher = _teacher()
+    if not teacher:
+        return redirect(url_for("home"))
+    if not teacher_course(course_id, str(teacher["_id"])):
+        return "Course not found", 404
+    if enrollment_model.unenroll(course_id, student_id):
+        dashboard.invalidate(student_id)
+    return redirect(url_for("courses.view_course", course_id=course_id))
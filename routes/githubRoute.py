@@ -1,5 +1,10 @@
 import os
+import base64
+import hashlib
+import hmac
+import json
 import requests
+from dataclasses import dataclass, field
 from flask import (
     Blueprint,
     redirect,
@@ -11,6 +16,15 @@ from flask import (
 )
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from github_utils import RateLimitExceeded, github_get
+import github_async
+import repo_cache
+import repo_mirror
+from repo_cache import KIND_COMMIT, KIND_CONTENTS, KIND_HEAD, changed_paths
+from repo_mirror import MirrorError
+from tree_index import encode_tree_index, tree_indexes
+from http_utils import rate_limited_response
+from preview_utils import PREVIEW_MAX_BYTES
 
 load_dotenv()
 
@@ -26,6 +40,13 @@ users = db["users"]
 github_accounts = db["github"]
 
 
+@github_bp.app_errorhandler(RateLimitExceeded)
+def github_rate_limited(e):
+    """GitHub calls shed by the rate-limit governor surface as a 503"""
+    as_json = request.accept_mimetypes.best == "application/json"
+    return rate_limited_response(e, as_json=as_json)
+
+
 @github_bp.route("/github/link")
 def github_link():
     # Redirect user to GitHub for authorization
@@ -54,12 +75,10 @@ def github_callback():
         return "Failed to get access token", 400
 
     # Step 2: Get user info from GitHub API
-    user_response = requests.get(
+    user_response = github_get(
         "https://api.github.com/user",
-        headers={
-            "Authorization": f"token {access_token}",
-            "Accept": "application/json",
-        },
+        access_token,
+        headers={"Accept": "application/json"},
     )
     github_user = user_response.json()
 
@@ -124,8 +143,14 @@ def github_repo_link():
 
     # List all repositories for the user
     access_token = github_account["access_token"]
-    headers = {"Authorization": f"token {access_token}", "Accept": "application/json"}
-    repo_response = requests.get("https://api.github.com/user/repos", headers=headers)
+    try:
+        repo_response = github_get(
+            "https://api.github.com/user/repos",
+            access_token,
+            headers={"Accept": "application/json"},
+        )
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     repos = repo_response.json()
     if not repos:
         return "No repositories found", 404
@@ -175,61 +200,409 @@ def github_repo_unlink():
     return redirect(url_for("home"))
 
 
+def verify_webhook_signature(body, signature, secret):
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body"""
+    if not secret or not signature:
+        return False
+    expected = "sha256=" + hmac.new(
+        secret.encode("utf-8"), body, hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+@github_bp.route("/github/webhook", methods=["POST"])
+def github_webhook():
+    """Drop cached repository data for the paths changed by a push and refresh the mirror"""
+    secret = repo_cache.GITHUB_WEBHOOK_SECRET
+    if not secret:
+        return jsonify({"error": "Webhook not configured"}), 404
+
+    signature = request.headers.get("X-Hub-Signature-256", "")
+    if not verify_webhook_signature(request.get_data(), signature, secret):
+        return jsonify({"error": "Invalid signature"}), 403
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return jsonify({"ok": True})
+    if event != "push":
+        return jsonify({"ignored": event}), 202
+
+    # Webhooks can be configured to send JSON or a form-encoded payload
+    if request.form.get("payload"):
+        payload = json.loads(request.form["payload"])
+    else:
+        payload = request.get_json(silent=True) or {}
+
+    repository = payload.get("repository") or {}
+    full_name = repository.get("full_name")
+    if not full_name:
+        return jsonify({"error": "Missing repository"}), 400
+
+    # Pages always read the default branch
+    default_ref = f"refs/heads/{repository.get('default_branch', 'main')}"
+    if payload.get("ref") != default_ref:
+        return jsonify({"ignored": payload.get("ref")}), 202
+
+    account = github_accounts.find_one({"repo": full_name})
+    if not account:
+        return jsonify({"ignored": full_name}), 202
+
+    paths = changed_paths(payload)
+    invalidated = repo_cache.github_cache.invalidate(full_name, paths)
+    repo_mirror.schedule_fetch(full_name, account.get("access_token"))
+    return jsonify(
+        {
+            "repo": full_name,
+            "paths": sorted(paths) if paths is not None else None,
+            "invalidated": invalidated,
+        }
+    )
+
+
+# Function to read from the local mirror of a repository, if there is one
+def read_mirror(owner, repo, token, read):
+    """Call read(mirror, full_name) when owner/repo is mirrored for this token.
+
+    Returns None when the repo isn't mirrored or the mirror can't answer
+    (e.g. a path newer than the last fetch), so callers fall back to GitHub.
+    """
+    mirror = repo_mirror.mirror_for(owner, repo, token)
+    if mirror is None:
+        return None
+    try:
+        return read(mirror, f"{owner}/{repo}")
+    except MirrorError as e:
+        print(f"[mirror] {owner}/{repo}: {e}")
+        return None
+
+
 # Function to get repository contents (file or directory)
 def get_repo_contents(owner, repo, token, path=""):
     """Get repository contents (files or directories) from GitHub API"""
+    mirrored = read_mirror(owner, repo, token, lambda m, name: m.contents(name, path))
+    if mirrored is not None:
+        return mirrored
+
+    cached = repo_cache.github_cache.get(KIND_CONTENTS, f"{owner}/{repo}", path, token)
+    if cached is not None:
+        return cached
+
     url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json",
-    }
-    response = requests.get(url, headers=headers)
+    headers = {"Accept": "application/vnd.github+json"}
+    response = github_get(url, token, headers=headers)
 
     if response.status_code != 200:
         raise Exception(f"GitHub API error: {response.text}")
 
-    return response.json()
+    contents = response.json()
+    repo_cache.github_cache.put(KIND_CONTENTS, f"{owner}/{repo}", path, token, contents)
+    return contents
+
+
+# Function to look up a file in its directory's listing
+def get_file_entry(owner, repo, token, path):
+    """The listing entry (with blob sha and size) for a file, or None.
+
+    Listings come from the mirror or the repo cache, so this usually costs
+    no GitHub call, unlike fetching the file itself.
+    """
+    path = (path or "").strip("/")
+    parent = path.rpartition("/")[0]
+    try:
+        listing = get_repo_contents(owner, repo, token, parent)
+    except RateLimitExceeded:
+        raise
+    except Exception:
+        return None
+    if not isinstance(listing, list):
+        return None
+    for entry in listing:
+        if entry.get("path") == path and entry.get("type") == "file":
+            return entry
+    return None
+
+
+# Function to compute the git blob SHA of file content
+def git_blob_sha(content):
+    """Compute the SHA GitHub reports for a blob with this content"""
+    header = f"blob {len(content)}\0".encode("utf-8")
+    return hashlib.sha1(header + content).hexdigest()
+
+
+# Function to get the latest commit that touched a path
+def get_path_commit_sha(owner, repo, token, path="", fresh=False):
+    """
+    Get the SHA of the most recent commit affecting a path (or the whole repo).
+    fresh=True asks GitHub itself, skipping the mirror and the repo cache, for
+    repos no webhook keeps current (e.g. a student's, at submission time).
+    """
+    if not fresh:
+        mirrored = read_mirror(
+            owner, repo, token, lambda m, name: m.commit_sha(name, path)
+        )
+        if mirrored is not None:
+            return mirrored
+
+        cached = repo_cache.github_cache.get(KIND_COMMIT, f"{owner}/{repo}", path, token)
+        if cached is not None:
+            return cached
+
+    url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+    headers = {"Accept": "application/vnd.github+json"}
+    params = {"per_page": 1}
+    if path:
+        params["path"] = path
+    response = github_get(url, token, headers=headers, params=params)
+
+    if response.status_code != 200:
+        raise Exception(f"GitHub API error: {response.text}")
+
+    commits = response.json()
+    if not commits:
+        raise Exception(f"No commits found for path: {path or '/'}")
+    sha = commits[0]["sha"]
+    repo_cache.github_cache.put(KIND_COMMIT, f"{owner}/{repo}", path, token, sha)
+    return sha
+
+
+# Git tree entry types as the Contents API names them
+TREE_ENTRY_TYPES = {"blob": "file", "tree": "dir", "commit": "submodule"}
+
+
+# Function to get the whole repository tree in one request
+def get_repo_tree(owner, repo, token):
+    """
+    List every path in the repository at the latest commit.
+    Returns {"commit", "sha" (tree SHA), "truncated", "entries"}; each entry
+    has path, type (file/dir/symlink/submodule), size and sha.
+    """
+    mirrored = read_mirror(owner, repo, token, lambda m, name: m.tree(name))
+    if mirrored is not None:
+        return mirrored
+
+    commit = get_path_commit_sha(owner, repo, token)
+    url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{commit}"
+    headers = {"Accept": "application/vnd.github+json"}
+    response = github_get(url, token, headers=headers, params={"recursive": 1})
+
+    if response.status_code != 200:
+        raise Exception(f"GitHub API error: {response.text}")
+
+    data = response.json()
+    entries = []
+    for item in data.get("tree", []):
+        item_type = TREE_ENTRY_TYPES.get(item["type"], "file")
+        if item.get("mode") == "120000":
+            item_type = "symlink"
+        entries.append(
+            {
+                "path": item["path"],
+                "type": item_type,
+                "size": item.get("size", 0),
+                "sha": item["sha"],
+            }
+        )
+    return {
+        "commit": commit,
+        "sha": data["sha"],
+        # GitHub cuts recursive listings off at 100,000 entries / 7 MB
+        "truncated": data.get("truncated", False),
+        "entries": entries,
+    }
+
+
+# Function to get the gzipped tree index used for client-side browsing
+def get_tree_index(owner, repo, token):
+    """Return (tree SHA, gzipped JSON index); each tree is listed and encoded once"""
+    commit = get_path_commit_sha(owner, repo, token)
+    found = tree_indexes.lookup(commit)
+    if found:
+        return found
+
+    tree = get_repo_tree(owner, repo, token)
+    data = tree_indexes.get(tree["sha"]) or encode_tree_index(tree)
+    tree_indexes.put(tree["commit"], tree["sha"], data)
+    return tree["sha"], data
+
+
+# Function to stream the raw bytes of a repository file
+def stream_repo_file(owner, repo, token, path, range_header=None):
+    """Open a streaming request for a raw file, forwarding an optional Range header"""
+    mirrored = read_mirror(
+        owner, repo, token, lambda m, name: m.open_blob(name, path, range_header)
+    )
+    if mirrored is not None:
+        return mirrored
+
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+    headers = {
+        "Accept": "application/vnd.github.v3.raw",
+        # Keep the upstream body uncompressed so Content-Length/Range stay valid
+        "Accept-Encoding": "identity",
+    }
+    if range_header:
+        headers["Range"] = range_header
+    return github_get(url, token, headers=headers, stream=True)
+
+
+# Function to read a byte range of a repository file
+def read_repo_file_range(owner, repo, token, path, start, length):
+    """
+    Read at most `length` bytes of a file starting at `start`.
+    Returns (data, total_size); total_size is None if GitHub doesn't report it.
+    """
+    end = start + length - 1
+    response = stream_repo_file(owner, repo, token, path, f"bytes={start}-{end}")
+    try:
+        content_range = response.headers.get("Content-Range", "")
+        total_size = None
+        if "/" in content_range and not content_range.endswith("*"):
+            total_size = int(content_range.rsplit("/", 1)[1])
+
+        if response.status_code == 416:
+            # Offset past the end of the file
+            return b"", total_size
+        if response.status_code == 206:
+            skip = 0
+        elif response.status_code == 200:
+            # Range ignored upstream: skip to the offset while streaming
+            skip = start
+            if response.headers.get("Content-Length"):
+                total_size = int(response.headers["Content-Length"])
+        else:
+            raise Exception(f"GitHub API error: {response.status_code}")
+
+        data = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk = chunk[dropped:]
+                skip -= dropped
+            data.extend(chunk)
+            if len(data) >= length:
+                break
+        return bytes(data[:length]), total_size
+    finally:
+        response.close()
+
+
+# Function to read the part of a file the preview page inlines
+def read_file_head(owner, repo, token, path, entry=None):
+    """
+    Read the first PREVIEW_MAX_BYTES of a file; returns (data, total_size).
+    Given the file's listing entry, the head is kept in the repo cache under
+    its blob SHA, so previewing an unchanged file costs no GitHub call.
+    """
+    sha = (entry or {}).get("sha")
+    # Mirrored files are read locally, there is nothing to save by caching
+    cacheable = sha and repo_mirror.mirror_for(owner, repo, token) is None
+    if cacheable:
+        cached = repo_cache.github_cache.get(KIND_HEAD, f"{owner}/{repo}", path, token)
+        if cached and cached.get("sha") == sha:
+            return bytes(cached["head"]), cached["size"]
+
+    head, total_size = read_repo_file_range(
+        owner, repo, token, path, 0, PREVIEW_MAX_BYTES
+    )
+    if cacheable:
+        repo_cache.github_cache.put(
+            KIND_HEAD,
+            f"{owner}/{repo}",
+            path,
+            token,
+            {"sha": sha, "head": head, "size": total_size},
+        )
+    return head, total_size
 
 
 # Function to recursively get all files in a repository
 def list_repo_files_recursive(owner, repo, token, path=""):
     """Recursively list all files in a repository or subdirectory"""
     try:
-        items = get_repo_contents(owner, repo, token, path)
-
-        # Handle single file response
-        if not isinstance(items, list):
-            items = [items]
-
-        all_files = []
-
-        for item in items:
-            if item["type"] == "file":
-                all_files.append(
-                    {
-                        "name": item["name"],
-                        "path": item["path"],
-                        "download_url": item["download_url"],
-                    }
-                )
-            elif item["type"] == "dir":
-                all_files.extend(
-                    list_repo_files_recursive(owner, repo, token, item["path"])
-                )
-
-        return all_files
+        # Sibling directories are listed concurrently
+        items = github_async.run(github_async.client.walk(owner, repo, token, path))
+        return [
+            {
+                "name": item["name"],
+                "path": item["path"],
+                "download_url": item["download_url"],
+            }
+            for item in items
+            if item["type"] == "file"
+        ]
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         print(f"Error listing repository files: {str(e)}")
         return []
 
 
+@dataclass
+class RepoNode:
+    """A repository path resolved with a single contents request.
+
+    Files carry their metadata (and their bytes when GitHub inlines them,
+    i.e. files up to 1 MB); directories carry the raw contents listing.
+    """
+
+    path: str
+    type: str
+    name: str = ""
+    size: int = 0
+    sha: str = ""
+    download_url: str | None = None
+    content: bytes | None = None
+    entries: list = field(default_factory=list)
+
+    @property
+    def is_file(self):
+        return self.type == "file"
+
+    @property
+    def is_dir(self):
+        return self.type == "dir"
+
+
+# Function to resolve a repository path to a file or directory node
+def resolve_repo_path(owner, repo, token, path=""):
+    """Fetch a path once and describe it as a RepoNode (raises on API errors)"""
+    contents = get_repo_contents(owner, repo, token, path)
+    if isinstance(contents, list):
+        return RepoNode(path=path, type="dir", name=path.split("/")[-1], entries=contents)
+
+    content = None
+    if contents.get("encoding") == "base64" and contents.get("content"):
+        content = base64.b64decode(contents["content"])
+    return RepoNode(
+        path=contents.get("path", path),
+        type=contents.get("type", "file"),
+        name=contents.get("name", path.split("/")[-1]),
+        size=contents.get("size", 0),
+        sha=contents.get("sha", ""),
+        download_url=contents.get("download_url"),
+        content=content,
+    )
+
+
+# Function to read a whole repository file
+def read_repo_file(owner, repo, token, node):
+    """Return a file node's bytes, reusing inlined content when GitHub sent it"""
+    if node.content is not None:
+        return node.content
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{node.path}"
+    response = github_get(url, token, headers={"Accept": "application/vnd.github.v3.raw"})
+    if response.status_code != 200:
+        raise Exception(f"GitHub API error: {response.status_code}")
+    return response.content
+
+
 # Check if a repository path is a file
 def is_repo_path_file(owner, repo, token, path):
     """Check if the specified path in repository is a file"""
     try:
-        content = get_repo_contents(owner, repo, token, path)
-        # If it's a single item (not a list), check if it's a file
-        return not isinstance(content, list) and content.get("type") == "file"
+        return resolve_repo_path(owner, repo, token, path).is_file
+    except RateLimitExceeded:
+        raise
     except Exception:
         return False
 
@@ -281,6 +654,8 @@ def get_repository_contents():
         )
 
         return jsonify(formatted_contents)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e, as_json=True)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -305,6 +680,8 @@ def github_repo_files():
 
     try:
         files = list_repo_files_recursive(owner, repo, access_token)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return f"Failed to fetch repository files: {str(e)}", 400
 
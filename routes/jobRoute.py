@@ -0,0 +1,55 @@
+# routes/jobRoute.py
+import os
+
+from flask import Blueprint, jsonify, send_file, session, url_for
+
+import jobs
+
+job_bp = Blueprint("jobs", __name__)
+
+
+def _own_job(job_id):
+    """The job if it belongs to the logged-in user, else None."""
+    job = jobs.get_job(job_id)
+    if not job or not session.get("username") or job["owner"] != session["username"]:
+        return None
+    return job
+
+
+@job_bp.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Progress of a background job, polled by the page that started it"""
+    job = _own_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    status = {
+        "id": job["_id"],
+        "kind": job["kind"],
+        "state": job["state"],
+        "done": job.get("done", 0),
+        "total": job.get("total"),
+        "error": job.get("error"),
+    }
+    if job["state"] == jobs.STATE_DONE and job.get("artifact"):
+        status["download_url"] = url_for("jobs.job_download", job_id=job_id)
+    return jsonify(status)
+
+
+@job_bp.route("/jobs/<job_id>/download")
+def job_download(job_id):
+    """The file a finished job produced"""
+    job = _own_job(job_id)
+    if not job:
+        return "Job not found", 404
+    if job["state"] != jobs.STATE_DONE:
+        return "Job is not finished yet", 409
+    path = job.get("artifact")
+    if not path or not os.path.exists(path):
+        return "This job's result has expired", 410
+
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=job.get("download_name") or os.path.basename(path),
+    )
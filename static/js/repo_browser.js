@@ -0,0 +1,148 @@
+// Folder navigation for the browse pages without a page load per folder.
+// The server-rendered listing stays as is; once the tree index arrives,
+// folder links (data-dir-path) are answered from it and the URL is kept in
+// sync with history.pushState. Without an index the links work as before.
+(function (window, document) {
+    const ICONS = {
+        py: 'fab fa-python text-success',
+        md: 'fab fa-markdown text-info',
+        markdown: 'fab fa-markdown text-info',
+        pdf: 'fas fa-file-pdf text-danger',
+        c: 'fas fa-file-code text-primary',
+        cpp: 'fas fa-file-code text-primary',
+        h: 'fas fa-file-code text-primary',
+        js: 'fab fa-js text-warning',
+        html: 'fab fa-html5 text-danger',
+        htm: 'fab fa-html5 text-danger',
+        css: 'fab fa-css3-alt text-primary',
+        java: 'fab fa-java text-danger',
+        txt: 'fas fa-file-alt text-light',
+        jpg: 'fas fa-file-image text-success',
+        jpeg: 'fas fa-file-image text-success',
+        png: 'fas fa-file-image text-success',
+        gif: 'fas fa-file-image text-success'
+    };
+
+    function iconFor(name) {
+        const ext = name.indexOf('.') === -1 ? '' : name.split('.').pop();
+        return ICONS[ext] || 'fas fa-file text-light';
+    }
+
+    function el(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function entry(href, iconClass, name, dirPath) {
+        const link = el('a', 'file-browser-item');
+        link.href = href;
+        if (dirPath !== undefined) link.setAttribute('data-dir-path', dirPath);
+        const icon = el('div', 'file-icon');
+        icon.appendChild(el('i', iconClass));
+        link.appendChild(icon);
+        link.appendChild(el('div', 'file-name', name));
+        return link;
+    }
+
+    function RepoBrowser(root, tree) {
+        this.root = root;
+        this.tree = tree;
+        this.browseUrl = root.getAttribute('data-browse-url');
+        this.previewUrl = root.getAttribute('data-preview-url');
+        this.rootLabel = root.querySelector('#fileBreadcrumb li').cloneNode(true);
+    }
+
+    RepoBrowser.prototype.browseHref = function (path) {
+        return path ? this.browseUrl + '?path=' + encodeURIComponent(path) : this.browseUrl;
+    };
+
+    RepoBrowser.prototype.previewHref = function (path) {
+        return this.previewUrl.replace('__path__', path.split('/').map(encodeURIComponent).join('/'));
+    };
+
+    // Render a folder from the index; returns false if the index can't.
+    RepoBrowser.prototype.show = function (path) {
+        const items = this.tree.list(path);
+        if (!items) return false;
+        const self = this;
+
+        const crumbs = this.root.querySelector('#fileBreadcrumb');
+        crumbs.innerHTML = '';
+        crumbs.appendChild(this.rootLabel.cloneNode(true));
+        let current = '';
+        (path ? path.split('/') : []).forEach(function (part, i, parts) {
+            current += (i > 0 ? '/' : '') + part;
+            const li = el('li', 'breadcrumb-item');
+            if (i === parts.length - 1) {
+                li.classList.add('active');
+                li.style.color = '#ffffff';
+                li.textContent = part;
+            } else {
+                const a = el('a', '', part);
+                a.href = self.browseHref(current);
+                a.setAttribute('data-dir-path', current);
+                li.appendChild(a);
+            }
+            crumbs.appendChild(li);
+        });
+
+        const list = this.root.querySelector('#fileEntries');
+        list.innerHTML = '';
+        if (path) {
+            const parent = path.indexOf('/') === -1 ? '' : path.slice(0, path.lastIndexOf('/'));
+            list.appendChild(entry(this.browseHref(parent), 'fas fa-arrow-up', 'Parent Directory', parent));
+        }
+        items.forEach(function (item) {
+            if (item.type === 'dir') {
+                list.appendChild(entry(self.browseHref(item.path), 'fas fa-folder text-warning', item.name, item.path));
+            }
+        });
+        items.forEach(function (item) {
+            if (item.type !== 'file') return;
+            const link = entry(self.previewHref(item.path), iconFor(item.name), item.name);
+            if (item.size) {
+                link.appendChild(el('div', 'file-size', (item.size / 1024).toFixed(1) + ' KB'));
+            }
+            list.appendChild(link);
+        });
+        if (items.length === 0) {
+            const empty = el('div', 'file-browser-item text-muted');
+            empty.appendChild(el('i', 'fas fa-info-circle mr-2'));
+            empty.appendChild(document.createTextNode(' This directory is empty.'));
+            list.appendChild(empty);
+        }
+        return true;
+    };
+
+    RepoBrowser.init = function (rootId) {
+        const root = document.getElementById(rootId);
+        if (!root || !window.RepoTree || !window.history.pushState) return;
+
+        window.RepoTree.load(root.getAttribute('data-tree-url')).then(function (tree) {
+            if (!tree) return;
+            const browser = new RepoBrowser(root, tree);
+
+            root.addEventListener('click', function (e) {
+                const link = e.target.closest('[data-dir-path]');
+                if (!link || e.ctrlKey || e.metaKey || e.shiftKey) return;
+                const path = link.getAttribute('data-dir-path');
+                if (browser.show(path)) {
+                    e.preventDefault();
+                    window.history.pushState({ path: path }, '', link.href);
+                }
+            });
+
+            window.addEventListener('popstate', function () {
+                const path = new URLSearchParams(window.location.search).get('path');
+                // Fall back to a real load if the index doesn't know the path
+                if (!browser.show(path === null ? root.getAttribute('data-base-path') : path)) {
+                    window.location.reload();
+                }
+            });
+        });
+    };
+
+    window.RepoBrowser = RepoBrowser;
+})(window, document);
@@ -0,0 +1,68 @@
+// Client-side navigation of a repository from one gzipped tree index.
+// The server sends {sha, truncated, entries: [[path, type, size, sha], ...]}
+// with type "d" (folder), "f" (file), "l" (symlink) or "s" (submodule).
+(function (window) {
+    const TYPES = { d: 'dir', f: 'file', l: 'symlink', s: 'submodule' };
+
+    function RepoTree(index) {
+        this.sha = index.sha;
+        this.truncated = index.truncated;
+        this.children = { '': [] };
+
+        const children = this.children;
+        index.entries.forEach(function (entry) {
+            const path = entry[0];
+            const type = TYPES[entry[1]] || 'file';
+            const cut = path.lastIndexOf('/');
+            const parent = cut === -1 ? '' : path.slice(0, cut);
+            if (type === 'dir' && !children[path]) {
+                children[path] = [];
+            }
+            (children[parent] = children[parent] || []).push({
+                name: path.slice(cut + 1),
+                path: path,
+                type: type,
+                size: entry[2],
+                sha: entry[3]
+            });
+        });
+
+        Object.keys(children).forEach(function (dir) {
+            children[dir].sort(function (a, b) {
+                const rank = (a.type === 'dir' ? 0 : 1) - (b.type === 'dir' ? 0 : 1);
+                return rank || (a.name < b.name ? -1 : a.name > b.name ? 1 : 0);
+            });
+        });
+    }
+
+    // Items directly inside `path` (folders first), or null if the index
+    // can't answer (a truncated index or an unknown folder).
+    RepoTree.prototype.list = function (path) {
+        path = (path || '').replace(/^\/+|\/+$/g, '');
+        if (this.truncated || !this.children[path]) {
+            return null;
+        }
+        return this.children[path];
+    };
+
+    RepoTree.prototype.isDir = function (path) {
+        return !!this.children[(path || '').replace(/^\/+|\/+$/g, '')];
+    };
+
+    // Fetch an index once; resolves to a RepoTree, or null so callers fall
+    // back to per-folder requests.
+    RepoTree.load = function (url) {
+        return fetch(url, { credentials: 'same-origin' })
+            .then(function (response) {
+                return response.ok ? response.json() : null;
+            })
+            .then(function (index) {
+                return index ? new RepoTree(index) : null;
+            })
+            .catch(function () {
+                return null;
+            });
+    };
+
+    window.RepoTree = RepoTree;
+})(window);
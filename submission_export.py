@@ -0,0 +1,183 @@
+# submission_export.py
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+import jobs
+import query_log
+from github_utils import PRIORITY_LOW, github_get
+from http_utils import STREAM_CHUNK_SIZE
+from models.submission import SubmissionModel
+
+load_dotenv()
+
+# Student repositories downloaded at once while building an export
+EXPORT_FETCH_WORKERS = int(os.getenv("EXPORT_FETCH_WORKERS", 4))
+
+EXPORT_JOB = "submission_export"
+
+mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/gitBrightSpace")
+mongo_client = MongoClient(mongo_uri)
+db = mongo_client.get_database()
+users = db["users"]
+github_accounts = db["github"]
+submission_model = SubmissionModel(query_log.watch(db["submissions"]))
+
+
+def safe_name(name: str) -> str:
+    """A file or folder name for the ZIP, without path separators or spaces."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name or "").strip("._") or "unknown"
+
+
+def _fetch_repo(github_info, commit_sha):
+    """Download a student's linked repository (GitHub's zipball) to a temp file."""
+    ref = commit_sha or "HEAD"
+    url = f"https://api.github.com/repos/{github_info['repo']}/zipball/{ref}"
+    out = tempfile.TemporaryFile()
+    try:
+        # Worker threads don't inherit the job's priority context
+        response = github_get(
+            url, github_info.get("access_token"), priority=PRIORITY_LOW, stream=True
+        )
+        try:
+            if response.status_code != 200:
+                raise Exception(f"GitHub API error: {response.status_code}")
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                out.write(chunk)
+        finally:
+            response.close()
+    except BaseException:
+        out.close()
+        raise
+    out.seek(0)
+    return out
+
+
+def _submission_folders(submissions):
+    """Map each submission to its folder, student's username and GitHub account."""
+    # Two batched lookups instead of one query per student
+    student_ids = [
+        ObjectId(s["student_id"]) for s in submissions if ObjectId.is_valid(s["student_id"])
+    ]
+    students = {str(u["_id"]): u for u in users.find({"_id": {"$in": student_ids}})}
+    usernames = [u["username"] for u in students.values()]
+    accounts = {
+        a["username"]: a for a in github_accounts.find({"username": {"$in": usernames}})
+    }
+
+    folders = []
+    seen = set()
+    for submission in submissions:
+        student = students.get(submission["student_id"], {})
+        username = student.get("username") or submission["student_id"]
+        folder = safe_name(username)
+        while folder in seen:
+            folder += "_"
+        seen.add(folder)
+        folders.append((submission, folder, username, accounts.get(username)))
+    return folders
+
+
+def _manifest(submission, username):
+    return {
+        "student": username,
+        "github_link": submission.get("github_link"),
+        "commit_sha": submission.get("commit_sha"),
+        "submitted_at": str(submission.get("submitted_at") or ""),
+        "status": submission.get("status"),
+        "grade": submission.get("grade"),
+        "feedback": submission.get("feedback"),
+    }
+
+
+def build_submissions_zip(assignment_id, out, include_repos=False, progress=None):
+    """Write every submission of an assignment into a ZIP, one folder per student.
+
+    Each folder has README.md (the submitted markdown), submission.json and,
+    with include_repos, repo.zip: the student's linked repository at the
+    submitted commit. Repositories are downloaded in parallel; a repository
+    that can't be downloaded is noted in the manifest instead of failing the
+    export. progress(done, total) is called after each student.
+    """
+    submissions = submission_model.get_assignment_submissions(assignment_id)
+    folders = _submission_folders(submissions)
+    total = len(folders)
+    done = 0
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        pending = {}
+        fetcher = ThreadPoolExecutor(max_workers=EXPORT_FETCH_WORKERS)
+        try:
+            for submission, folder, username, github_info in folders:
+                if include_repos and github_info and github_info.get("repo"):
+                    future = fetcher.submit(
+                        _fetch_repo, github_info, submission.get("commit_sha")
+                    )
+                    pending[future] = (submission, folder, username)
+                    continue
+                _write_student(zf, submission, folder, username, None, None)
+                done += 1
+                if progress:
+                    progress(done, total)
+
+            for future in as_completed(pending):
+                submission, folder, username = pending[future]
+                try:
+                    repo_zip, error = future.result(), None
+                except Exception as e:
+                    repo_zip, error = None, str(e)
+                try:
+                    _write_student(zf, submission, folder, username, repo_zip, error)
+                finally:
+                    if repo_zip is not None:
+                        repo_zip.close()
+                done += 1
+                if progress:
+                    progress(done, total)
+        finally:
+            fetcher.shutdown(wait=True, cancel_futures=True)
+    return total
+
+
+def _write_student(zf, submission, folder, username, repo_zip, error):
+    manifest = _manifest(submission, username)
+    if error:
+        manifest["repo_error"] = error
+    zf.writestr(f"{folder}/README.md", submission.get("readme_content") or "")
+    zf.writestr(f"{folder}/submission.json", json.dumps(manifest, indent=2))
+    if repo_zip is not None:
+        # Already compressed, so store it; copy in chunks to keep memory flat
+        info = zipfile.ZipInfo(f"{folder}/repo.zip", time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with zf.open(info, "w", force_zip64=True) as dest:
+            shutil.copyfileobj(repo_zip, dest, STREAM_CHUNK_SIZE)
+
+
+def start_export(assignment_id, owner, include_repos=False, title=None):
+    """Queue an export of an assignment's submissions; returns the job id."""
+    return jobs.enqueue(
+        EXPORT_JOB,
+        owner,
+        {"assignment_id": assignment_id, "include_repos": include_repos},
+        download_name=f"{safe_name(title or assignment_id)}-submissions.zip",
+    )
+
+
+@jobs.handler(EXPORT_JOB)
+def _run_export(job):
+    with open(job.artifact_path(".zip"), "wb") as out:
+        build_submissions_zip(
+            job.params["assignment_id"],
+            out,
+            job.params.get("include_repos", False),
+            progress=job.progress,
+        )
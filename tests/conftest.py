@@ -9,6 +9,9 @@ from flask import Flask, session
 # Add the parent directory to the path to import app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+# Tests run jobs explicitly instead of on worker threads polling Mongo
+os.environ.setdefault("JOB_WORKERS", "0")
+
 
 @pytest.fixture
 def app():
@@ -28,6 +31,67 @@ def client(app):
         yield client
 
 
+@pytest.fixture(autouse=True)
+def github_governor(monkeypatch):
+    """Fresh in-process rate-limit governor so tests never touch Mongo or leak quota"""
+    import github_utils
+
+    governor = github_utils.RateLimitGovernor()
+    monkeypatch.setattr(github_utils, "governor", governor)
+    return governor
+
+
+@pytest.fixture(autouse=True)
+def github_cache(monkeypatch):
+    """Empty in-process repo cache per test"""
+    import repo_cache
+
+    cache = repo_cache.RepoCache()
+    monkeypatch.setattr(repo_cache, "github_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def no_warmup(monkeypatch):
+    """Keep background warmup threads from calling GitHub during tests"""
+    import warmup
+
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def no_mirror(monkeypatch):
+    """Serve repos from the (mocked) GitHub API unless a test sets up a mirror"""
+    import repo_mirror
+
+    monkeypatch.setattr(repo_mirror, "mirror", None)
+
+
+@pytest.fixture(autouse=True)
+def no_courses(monkeypatch):
+    """No courses or enrollments unless a test sets them up"""
+    import course_utils
+
+    for name in ("get_student_course_ids", "get_course_student_ids"):
+        monkeypatch.setattr(course_utils.enrollment_model, name, lambda _id: [])
+    monkeypatch.setattr(
+        course_utils.enrollment_model, "is_enrolled", lambda course_id, student_id: False
+    )
+    monkeypatch.setattr(
+        course_utils.course_model, "get_teacher_courses", lambda teacher_id: []
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_dashboards(monkeypatch):
+    """Dashboard snapshots live in a mock so write hooks never reach Mongo"""
+    import dashboard
+
+    for name in ("dashboards", "assignments_collection", "submissions_collection"):
+        monkeypatch.setattr(dashboard, name, MagicMock())
+    dashboard.dashboards.find_one.return_value = None
+
+
 @pytest.fixture
 def mock_mongo():
     """Create a mock MongoDB client with all necessary collections"""
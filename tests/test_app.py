@@ -60,8 +60,12 @@ class TestApp:
         with patch("app.AssignmentModel") as mock_assignment_model, patch(
             "app.ContentModel"
         ) as mock_content_model, patch("app.SubmissionModel") as mock_submission_model:
-            mock_assignment_model.return_value.get_all_assignments.return_value = []
-            mock_content_model.return_value.get_all_content.return_value = []
+            mock_assignment_model.return_value.get_assignments_page.return_value = {
+                "items": []
+            }
+            mock_content_model.return_value.get_content_page.return_value = {
+                "items": []
+            }
             mock_submission_model.return_value.get_student_submissions.return_value = []
 
             # Set session
@@ -31,6 +31,7 @@ class TestAppRoutes:
     def test_delete_student_route(self, mock_users, client):
         # Setup
         mock_users.find_one.return_value = {
+            "_id": ObjectId(),
             "username": "student1",
             "identity": "student",
         }
@@ -0,0 +1,132 @@
+import os
+import time
+import zipfile
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import archive_utils
+import github_async
+import github_utils
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_utils, "ARCHIVE_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def fake_repo(monkeypatch):
+    """A tiny repo: hw1/README.md and hw1/src/main.py"""
+    tree = {
+        "hw1": [
+            {"type": "file", "path": "hw1/README.md", "download_url": "u/readme"},
+            {"type": "dir", "path": "hw1/src"},
+        ],
+        "hw1/src": [
+            {"type": "file", "path": "hw1/src/main.py", "download_url": "u/main"},
+        ],
+        "hw1/README.md": {
+            "type": "file",
+            "path": "hw1/README.md",
+            "download_url": "u/readme",
+        },
+    }
+    prefix = "https://api.github.com/repos/o/r/contents/"
+    blobs = {
+        prefix + "hw1/README.md": b"# HW1",
+        prefix + "hw1/src/main.py": b"print(1)",
+    }
+
+    contents = AsyncMock(side_effect=lambda o, r, t, p, ref=None: tree[p])
+    monkeypatch.setattr(github_async.client, "get_repo_contents", contents)
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        return MagicMock(status_code=200, content=blobs[url])
+
+    get = MagicMock(side_effect=fake_get)
+    monkeypatch.setattr(github_utils.requests, "get", get)
+    return contents, get
+
+
+class TestArchiveUtils:
+    def test_build_directory_zip(self, fake_repo):
+        path = archive_utils.build_archive("o", "r", "tok", "hw1", "sha1")
+
+        assert path.endswith(".zip")
+        with zipfile.ZipFile(path) as zf:
+            assert sorted(zf.namelist()) == ["hw1/README.md", "hw1/src/main.py"]
+            assert zf.read("hw1/src/main.py") == b"print(1)"
+
+    def test_build_reads_everything_at_the_commit(self, fake_repo):
+        contents, get = fake_repo
+        archive_utils.build_archive("o", "r", "tok", "hw1", "sha1")
+
+        assert {c.args[4] for c in contents.call_args_list} == {"sha1"}
+        assert get.call_count == 2
+        for call in get.call_args_list:
+            assert call.kwargs["params"] == {"ref": "sha1"}
+            assert call.kwargs["headers"]["Accept"] == "application/vnd.github.v3.raw"
+
+    @pytest.mark.parametrize("status", [404, 500])
+    def test_failed_file_caches_no_archive(
+        self, fake_repo, cache_dir, monkeypatch, status
+    ):
+        def flaky_get(url, headers=None, params=None, timeout=None):
+            if url.endswith("main.py"):
+                return MagicMock(status_code=status, headers={})
+            return MagicMock(status_code=200, content=b"# HW1")
+
+        monkeypatch.setattr(github_utils.requests, "get", flaky_get)
+        with pytest.raises(Exception, match="hw1/src/main.py"):
+            archive_utils.get_or_build_archive("o", "r", "tok", "hw1", "sha1")
+        assert os.listdir(cache_dir) == []
+        assert archive_utils.find_cached_archive("o", "r", "hw1", "sha1") is None
+
+    def test_build_single_file(self, fake_repo):
+        path = archive_utils.build_archive("o", "r", "tok", "hw1/README.md", "sha1")
+
+        assert path.endswith(".file")
+        with open(path, "rb") as f:
+            assert f.read() == b"# HW1"
+
+    def test_get_or_build_uses_cache(self, fake_repo):
+        contents, get = fake_repo
+        first = archive_utils.get_or_build_archive("o", "r", "tok", "hw1", "sha1")
+        calls = contents.call_count
+
+        second = archive_utils.get_or_build_archive("o", "r", "tok", "hw1", "sha1")
+        assert first == second
+        assert contents.call_count == calls
+
+        # A new commit produces a separate cache entry
+        third = archive_utils.get_or_build_archive("o", "r", "tok", "hw1", "sha2")
+        assert third != first
+
+    def test_failed_build_leaves_no_partial_file(self, fake_repo, cache_dir, monkeypatch):
+        monkeypatch.setattr(
+            github_utils.requests, "get", lambda *a, **k: MagicMock(status_code=500)
+        )
+        with pytest.raises(Exception):
+            archive_utils.build_archive("o", "r", "tok", "hw1/README.md", "sha1")
+        assert os.listdir(cache_dir) == []
+
+    def test_download_etag(self):
+        etag = archive_utils.download_etag("hw1", "abc123")
+        assert etag.startswith("abc123-")
+        assert etag == archive_utils.download_etag("hw1", "abc123")
+        assert etag != archive_utils.download_etag("hw2", "abc123")
+
+    def test_prune_evicts_oldest(self, cache_dir):
+        old = cache_dir / "old.zip"
+        new = cache_dir / "new.zip"
+        old.write_bytes(b"x" * 10)
+        new.write_bytes(b"y" * 10)
+        past = time.time() - 100
+        os.utime(old, (past, past))
+
+        freed = archive_utils.prune_archive_cache(max_bytes=15)
+        assert freed == 10
+        assert not old.exists()
+        assert new.exists()
@@ -3,8 +3,11 @@ import json
 from datetime import datetime
 
 import pytest
+from bson.objectid import ObjectId
 from flask import Flask
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
+
+from routes.githubRoute import RepoNode
 
 # -----------------------------------------------------------------------------
 #  Fixtures – build a minimal Flask app that only carries assignment_bp
@@ -15,10 +18,12 @@ def app():
     Build a minimal Flask app that registers only the blueprint we want to test.
     """
     from routes.assignmentRoute import assignment_bp  # import after mocks in tests
+    from routes.jobRoute import job_bp
 
     app = Flask(__name__)
     app.secret_key = "unit_test_key"
     app.register_blueprint(assignment_bp)
+    app.register_blueprint(job_bp)  # export status URLs point at /jobs
 
     # a dummy home/login route so redirects resolve
     @app.route("/home")
@@ -67,14 +72,22 @@ def base_patches(monkeypatch):
 
     # GitHub helpers
     mod.get_repo_contents = MagicMock(name="get_repo_contents")
-    mod.is_repo_path_file = MagicMock(name="is_repo_path_file")
+    monkeypatch.setattr(mod, "resolve_repo_path", MagicMock(name="resolve_repo_path"))
+    monkeypatch.setattr(mod, "read_repo_file", MagicMock(name="read_repo_file"))
+    monkeypatch.setattr(mod, "stream_repo_file", MagicMock(name="stream_repo_file"))
+    monkeypatch.setattr(mod, "read_repo_file_range", MagicMock(name="read_repo_file_range"))
+    monkeypatch.setattr(mod, "read_file_head", MagicMock(name="read_file_head"))
+    monkeypatch.setattr(
+        mod, "get_file_entry", MagicMock(name="get_file_entry", return_value=None)
+    )
+    monkeypatch.setattr(
+        mod, "get_path_commit_sha", MagicMock(name="get_path_commit_sha", return_value="c1")
+    )
 
     # outbound e-mail helpers
-    mod.send_mail = MagicMock(name="send_mail")
+    mod.queue_bulk_mail = MagicMock(name="queue_bulk_mail")
     mod.send_receipt_html = MagicMock(name="send_receipt_html")
 
-    # requests.get mocked globally
-    monkeypatch.setattr(mod, "requests", MagicMock())
 
     # templates → just return a string so we see status-200
     monkeypatch.setattr(mod, "render_template", MagicMock(return_value="OK"))
@@ -154,7 +167,63 @@ class TestCreateAssignment:
         assert resp.status_code == 302
         # verify DB write and emails
         mod.assignment_model.create_assignment.assert_called_once()
-        mod.send_mail.assert_called_once()
+        mod.queue_bulk_mail.assert_called_once()
+        assert mod.queue_bulk_mail.call_args.args[0] == ["stu@mail"]
+
+    def test_post_to_a_course_mails_its_students(self, client, monkeypatch):
+        login_session(client, identity="teacher")
+        from routes import assignmentRoute as mod
+        import course_utils
+
+        course_id = str(ObjectId())
+        student_id = ObjectId()
+        mod.users.find_one.return_value = {"_id": "111", "username": "alice"}
+        mod.github_accounts.find_one.return_value = None
+        mod.users.find.return_value = [{"email": "stu@mail"}]
+        monkeypatch.setattr(
+            course_utils.course_model,
+            "get_course",
+            lambda _id: {"_id": ObjectId(course_id), "teacher_id": "111"},
+        )
+        monkeypatch.setattr(
+            course_utils.enrollment_model,
+            "get_course_student_ids",
+            lambda _id: [str(student_id)],
+        )
+
+        form = {
+            "title": "HW1",
+            "description": "desc",
+            "due_date": "2025-05-10",
+            "due_time": "23:59",
+            "course_id": course_id,
+        }
+        resp = client.post("/assignments/create", data=form)
+
+        assert resp.status_code == 302
+        kwargs = mod.assignment_model.create_assignment.call_args.kwargs
+        assert kwargs["course_id"] == course_id
+        query = mod.users.find.call_args.args[0]
+        assert query["_id"] == {"$in": [student_id]}
+
+    def test_post_to_another_teachers_course(self, client, monkeypatch):
+        login_session(client, identity="teacher")
+        from routes import assignmentRoute as mod
+        import course_utils
+
+        mod.users.find_one.return_value = {"_id": "111", "username": "alice"}
+        monkeypatch.setattr(
+            course_utils.course_model, "get_course", lambda _id: {"teacher_id": "222"}
+        )
+        form = {
+            "title": "HW1",
+            "description": "desc",
+            "due_date": "2025-05-10",
+            "due_time": "23:59",
+            "course_id": str(ObjectId()),
+        }
+        assert client.post("/assignments/create", data=form).status_code == 404
+        mod.assignment_model.create_assignment.assert_not_called()
 
 
 class TestSubmitAssignment:
@@ -162,6 +231,7 @@ class TestSubmitAssignment:
         login_session(client, username="bob", identity="student")
         from routes import assignmentRoute as mod
 
+        mod.assignment_model.get_assignment.return_value = {"course_id": None}
         mod.users.find_one.return_value = {"_id": "stu1", "username": "bob"}
         mod.submission_model.get_student_assignment_submission.return_value = None
 
@@ -200,10 +270,9 @@ class TestSubmitMarkdownFlow:
             "email": "bob@mail",
         }
         # helpers
-        mod.is_repo_path_file.return_value = True
+        mod.resolve_repo_path.return_value = RepoNode(path=self.mpath, type="file")
         # mock raw file fetch
-        mod.requests.get.return_value.status_code = 200
-        mod.requests.get.return_value.content = b"# Title\n"
+        mod.read_repo_file.return_value = b"# Title\n"
 
     def test_preview_get(self, client):
         login_session(client, username="bob", identity="student")
@@ -238,9 +307,36 @@ class TestSubmitMarkdownFlow:
         )
         assert resp.status_code == 302
         mod.submission_model.create_submission.assert_called_once()
+        assert mod.submission_model.create_submission.call_args.kwargs["commit_sha"] == "c1"
         # receipt mail sent
         mod.send_receipt_html.assert_called_once()
 
+    def test_resubmit_records_the_new_commit(self, client, monkeypatch):
+        from routes import assignmentRoute as mod
+        from routes import githubRoute
+
+        login_session(client, username="bob", identity="student")
+        self.setup_mock_common()
+        # The real lookup, with the repo cache on and GitHub answering per push
+        monkeypatch.setattr(mod, "get_path_commit_sha", githubRoute.get_path_commit_sha)
+        pushes = iter(["sha-first", "sha-second"])
+        monkeypatch.setattr(
+            githubRoute,
+            "github_get",
+            lambda *a, **k: MagicMock(
+                status_code=200, json=lambda: [{"sha": next(pushes)}]
+            ),
+        )
+        mod.submission_model.get_student_assignment_submission.return_value = None
+        client.post(f"/assignments/{self.aid}/submit-markdown", data={"markdown_path": self.mpath})
+        assert mod.submission_model.create_submission.call_args.kwargs["commit_sha"] == "sha-first"
+
+        # Pushed again within the cache TTL: the new commit is recorded
+        mod.submission_model.get_student_assignment_submission.return_value = {"_id": "sub1"}
+        client.post(f"/assignments/{self.aid}/submit-markdown", data={"markdown_path": self.mpath})
+        fields = mod.submission_model.update_submission.call_args[0][1]
+        assert fields["commit_sha"] == "sha-second"
+
 
 class TestDeleteAssignment:
     def test_delete_ok(self, client):
@@ -276,9 +372,8 @@ class TestPreviewAndBrowse:
             "repo": "alice/demo",
             "access_token": "TOKEN",
         }
-        # file request
-        mod.requests.get.return_value.status_code = 200
-        mod.requests.get.return_value.content = b"# README\n"
+        # file request (head of the file via a Range read)
+        mod.read_file_head.return_value = (b"# README\n", 9)
 
         url = "/assignments/aid123/preview/README.md"
         resp = client.get(url)
@@ -301,15 +396,54 @@ class TestPreviewAndBrowse:
             "access_token": "TOKEN",
         }
         # browsing root → list dirs/files
-        mod.is_repo_path_file.return_value = False
-        mod.get_repo_contents.return_value = [
-            {"name": "src", "path": "src", "type": "dir", "url": "u"},
-            {"name": "main.py", "path": "main.py", "type": "file", "url": "u2"},
-        ]
+        mod.resolve_repo_path.return_value = RepoNode(
+            path="", type="dir", entries=[
+                {"name": "src", "path": "src", "type": "dir", "url": "u"},
+                {"name": "main.py", "path": "main.py", "type": "file", "url": "u2"},
+            ]
+        )
         resp = client.get("/assignments/aid123/browse")
         assert resp.status_code == 200
         mod.render_template.assert_called_once()
 
+    def test_browse_etag_follows_assignment_edits(self, client):
+        login_session(client)
+        from routes import assignmentRoute as mod
+
+        assignment = {
+            "teacher_id": "60d21b4667d0d8992e610c85",
+            "title": "HW1",
+            "description": "Old instructions",
+            "github_repo_path": "",
+        }
+        mod.assignment_model.get_assignment.return_value = assignment
+        mod.users.find_one.return_value = {
+            "_id": "60d21b4667d0d8992e610c85",
+            "username": "alice",
+        }
+        mod.github_accounts.find_one.return_value = {
+            "repo": "alice/demo",
+            "access_token": "TOKEN",
+        }
+        mod.resolve_repo_path.return_value = RepoNode(
+            path="", type="dir", entries=[
+                {"name": "main.py", "path": "main.py", "type": "file", "url": "u",
+                 "sha": "abc"},
+            ]
+        )
+        etag = client.get("/assignments/aid123/browse").headers["ETag"].strip('"')
+
+        unchanged = client.get(
+            "/assignments/aid123/browse", headers={"If-None-Match": f'"{etag}"'}
+        )
+        assert unchanged.status_code == 304
+
+        assignment["description"] = "New instructions"
+        edited = client.get(
+            "/assignments/aid123/browse", headers={"If-None-Match": f'"{etag}"'}
+        )
+        assert edited.status_code == 200
+
 
 class TestSelectSubmissionFile:
     def test_redirect_when_selecting_markdown(self, client):
@@ -321,7 +455,7 @@ class TestSelectSubmissionFile:
             "repo": "bob/demo",
             "access_token": "TOKEN",
         }
-        mod.is_repo_path_file.return_value = True
+        mod.resolve_repo_path.return_value = RepoNode(path="report.md", type="file")
 
         resp = client.get(
             "/assignments/aid321/select-file?path=report.md", follow_redirects=False
@@ -341,24 +475,32 @@ class TestShowAssignmentsStudent:
         from routes import assignmentRoute as mod
 
         now = datetime.now()
-        mod.assignment_model.get_all_assignments.return_value = [
-            {
-                "_id": "a1",
-                "due_date": (now + timedelta(days=2)).isoformat(),
-            },
-            {
-                "_id": "a2",
-                "due_date": (now - timedelta(days=1)).isoformat(),  # 已超期
-            },
-        ]
+        mod.assignment_model.get_assignments_page.return_value = {
+            "items": [
+                {
+                    "_id": "a1",
+                    "due_date": (now + timedelta(days=2)).isoformat(),
+                },
+                {
+                    "_id": "a2",
+                    "due_date": (now - timedelta(days=1)).isoformat(),  # 已超期
+                },
+            ],
+            "next": "older",
+            "prev": None,
+        }
         mod.users.find_one.return_value = {"_id": "stu1", "username": "bob"}
         mod.submission_model.get_student_submissions.return_value = []
 
         mod.render_template.reset_mock()
-        resp = client.get("/assignments")
+        resp = client.get("/assignments?after=tok")
         assert resp.status_code == 200
+        mod.assignment_model.get_assignments_page.assert_called_with(
+            {"course_id": {"$in": [None]}}, after="tok", before=None
+        )
 
         _, kwargs = mod.render_template.call_args
+        assert kwargs["page"]["next"] == "older"
         assign_list = kwargs["assignments"]
         assert assign_list[0]["remaining_days"] >= 0
         assert assign_list[1]["overdue"] is True
@@ -401,13 +543,26 @@ class TestGradeSubmission:
         from routes import assignmentRoute as mod
 
         mod.submission_model.add_feedback.return_value = True
-        mod.submission_model.get_submission.return_value = {"assignment_id": "a1"}
+        mod.submission_model.get_submission.return_value = {
+            "assignment_id": "a1",
+            "student_id": "st1",
+        }
 
         resp = client.post(
             "/submissions/s1/grade", data={"grade": "95", "feedback": "good"}
         )
         assert resp.status_code == 302
         mod.submission_model.add_feedback.assert_called_once_with("s1", 95.0, "good")
+        mod.dashboard.dashboards.update_one.assert_called_once_with(
+            {"_id": "st1", "items.a1": {"$exists": True}},
+            {
+                "$set": {
+                    "items.a1.status": "graded",
+                    "items.a1.grade": 95.0,
+                    "version": ANY,
+                }
+            },
+        )
 
 
 
@@ -429,7 +584,7 @@ class TestBrowseRedirectPreview:
             "repo": "alice/demo",
             "access_token": "TOKEN",
         }
-        mod.is_repo_path_file.return_value = True
+        mod.resolve_repo_path.return_value = RepoNode(path="report.md", type="file")
 
         resp = client.get(
             f"/assignments/{aid}/browse?path=docs/report.md", follow_redirects=False
@@ -456,8 +611,7 @@ class TestPreviewCodeFile:
             "repo": "alice/demo",
             "access_token": "TOKEN",
         }
-        mod.requests.get.return_value.status_code = 200
-        mod.requests.get.return_value.content = b"print('hello')"
+        mod.read_file_head.return_value = (b"print('hello')", 14)
 
         mod.render_template.reset_mock()
         resp = client.get("/assignments/a1/preview/main.py")
@@ -465,6 +619,87 @@ class TestPreviewCodeFile:
         assert mod.render_template.call_args[0][0] == "preview_code.html"
 
 
+    def test_revalidation_needs_no_file_fetch(self, client):
+        login_session(client)
+        from routes import assignmentRoute as mod
+
+        mod.assignment_model.get_assignment.return_value = {
+            "teacher_id": "60d21b4667d0d8992e610c85",
+            "github_repo_path": "",
+        }
+        mod.users.find_one.return_value = {"_id": "t", "username": "alice"}
+        mod.github_accounts.find_one.return_value = {
+            "repo": "alice/demo",
+            "access_token": "TOKEN",
+        }
+        mod.get_file_entry.return_value = {"path": "main.py", "sha": "b1", "size": 14}
+        mod.read_file_head.return_value = (b"print('hello')", 14)
+
+        etag = client.get("/assignments/a1/preview/main.py").headers["ETag"]
+        mod.read_file_head.reset_mock()
+        resp = client.get(
+            "/assignments/a1/preview/main.py", headers={"If-None-Match": etag}
+        )
+        assert resp.status_code == 304
+        mod.read_file_head.assert_not_called()
+
+
+class TestPreviewPdfFile:
+    def test_preview_pdf_uses_raw_endpoint(self, client):
+        login_session(client)
+        from routes import assignmentRoute as mod
+
+        teacher_oid = "60d21b4667d0d8992e610c85"
+        mod.assignment_model.get_assignment.return_value = {
+            "teacher_id": teacher_oid,
+            "github_repo_path": "",
+        }
+        mod.users.find_one.side_effect = [
+            {"_id": teacher_oid, "username": "alice"},
+        ]
+        mod.github_accounts.find_one.return_value = {
+            "repo": "alice/demo",
+            "access_token": "TOKEN",
+        }
+
+        mod.render_template.reset_mock()
+        resp = client.get("/assignments/a1/preview/slides.pdf")
+        assert resp.status_code == 200
+        args, kwargs = mod.render_template.call_args
+        assert args[0] == "preview_pdf.html"
+        assert kwargs["pdf_url"] == "/assignments/a1/raw/slides.pdf"
+        mod.read_file_head.assert_not_called()
+
+    def test_raw_file_streams(self, client):
+        login_session(client)
+        from routes import assignmentRoute as mod
+
+        teacher_oid = "60d21b4667d0d8992e610c85"
+        mod.assignment_model.get_assignment.return_value = {
+            "teacher_id": teacher_oid,
+            "github_repo_path": "docs",
+        }
+        mod.users.find_one.side_effect = [
+            {"_id": teacher_oid, "username": "alice"},
+        ]
+        mod.github_accounts.find_one.return_value = {
+            "repo": "alice/demo",
+            "access_token": "TOKEN",
+        }
+        upstream = MagicMock(status_code=200, headers={"Content-Length": "8"})
+        upstream.iter_content.return_value = [b"%PDF", b"-1.4"]
+        mod.stream_repo_file.return_value = upstream
+
+        resp = client.get("/assignments/a1/raw/slides.pdf")
+        assert resp.status_code == 200
+        assert resp.data == b"%PDF-1.4"
+        assert resp.headers["Content-Type"] == "application/pdf"
+        assert resp.headers["Content-Length"] == "8"
+        mod.stream_repo_file.assert_called_once_with(
+            "alice", "demo", "TOKEN", "docs/slides.pdf", range_header=None
+        )
+
+
 # ---------------------------------------------------------------------------
 #  /assignments/<id>/select-file 
 # ---------------------------------------------------------------------------
@@ -478,16 +713,17 @@ class TestSelectSubmissionList:
             "repo": "bob/demo",
             "access_token": "TOKEN",
         }
-        mod.is_repo_path_file.return_value = False
-        mod.get_repo_contents.return_value = [
-            {"name": "docs", "path": "docs", "type": "dir", "url": "u"},
-            {
-                "name": "report.md",
-                "path": "docs/report.md",
-                "type": "file",
-                "url": "u2",
-            },
-        ]
+        mod.resolve_repo_path.return_value = RepoNode(
+            path="", type="dir", entries=[
+                {"name": "docs", "path": "docs", "type": "dir", "url": "u"},
+                {
+                    "name": "report.md",
+                    "path": "docs/report.md",
+                    "type": "file",
+                    "url": "u2",
+                },
+            ]
+        )
 
         resp = client.get("/assignments/aid321/select-file?path=docs")
         assert resp.status_code == 200
@@ -503,7 +739,7 @@ class TestSubmitMarkdownInvalidExt:
             "repo": "bob/demo",
             "access_token": "TOKEN",
         }
-        mod.is_repo_path_file.return_value = True  
+        mod.resolve_repo_path.return_value = RepoNode(path="report.md", type="file")
 
         resp = client.get(
             "/assignments/aid321/submit-markdown?markdown_path=notes.txt"
@@ -518,3 +754,143 @@ class TestSubmitMarkdownInvalidExt:
 #         --cov=routes.assignmentRoute --cov-report=term-missing -q
 #
 #   Expect statement coverage of ≈80 % for routes/assignmentRoute.py
+
+
+class TestRepoTree:
+    def test_teacher_gets_gzipped_index(self, client, monkeypatch):
+        login_session(client, identity="teacher")
+        from routes import assignmentRoute as mod
+
+        mod.github_accounts.find_one.return_value = {
+            "repo": "alice/demo",
+            "access_token": "TOKEN",
+        }
+        index = MagicMock(return_value=("t1", b"\x1f\x8bgz"))
+        monkeypatch.setattr(mod, "get_tree_index", index)
+
+        resp = client.get("/assignments/repo_tree", headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert resp.data == b"\x1f\x8bgz"
+        index.assert_called_once_with("alice", "demo", "TOKEN")
+
+    def test_students_cannot_list_the_repo(self, client):
+        login_session(client, identity="student")
+        resp = client.get("/assignments/repo_tree")
+        assert resp.status_code == 403
+
+    def test_assignment_tree_uses_teacher_repo(self, client, monkeypatch):
+        login_session(client, identity="student")
+        from routes import assignmentRoute as mod
+
+        mod.assignment_model.get_assignment.return_value = {
+            "_id": "a1",
+            "teacher_id": "507f1f77bcf86cd799439011",
+        }
+        mod.users.find_one.return_value = {"username": "alice"}
+        mod.github_accounts.find_one.return_value = {
+            "repo": "alice/demo",
+            "access_token": "TOKEN",
+        }
+        index = MagicMock(return_value=("t1", b"\x1f\x8bgz"))
+        monkeypatch.setattr(mod, "get_tree_index", index)
+
+        resp = client.get(
+            "/assignments/a1/tree",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": '"t1-gz"'},
+        )
+        assert resp.status_code == 304
+        index.assert_called_once_with("alice", "demo", "TOKEN")
+
+
+class TestExportSubmissions:
+    def test_teacher_starts_export(self, client, monkeypatch):
+        login_session(client, identity="teacher")
+        from routes import assignmentRoute as mod
+
+        mod.assignment_model.get_assignment.return_value = {
+            "_id": "a1",
+            "title": "HW",
+            "teacher_id": "t1",
+        }
+        mod.users.find_one.return_value = {"_id": "t1", "username": "alice"}
+        start = MagicMock(return_value="job1")
+        monkeypatch.setattr(mod.submission_export, "start_export", start)
+
+        resp = client.post("/assignments/a1/submissions/export", data={"include_repos": "1"})
+        assert resp.status_code == 202
+        assert resp.get_json() == {"job_id": "job1", "status_url": "/jobs/job1"}
+        start.assert_called_once_with("a1", "alice", True, "HW")
+
+    def test_other_teachers_cannot_export(self, client, monkeypatch):
+        login_session(client, identity="teacher")
+        from routes import assignmentRoute as mod
+
+        mod.assignment_model.get_assignment.return_value = {
+            "_id": "a1",
+            "title": "HW",
+            "teacher_id": "t1",
+        }
+        mod.users.find_one.return_value = {"_id": "t2", "username": "alice"}
+        start = MagicMock()
+        monkeypatch.setattr(mod.submission_export, "start_export", start)
+
+        resp = client.post("/assignments/a1/submissions/export", data={"include_repos": "1"})
+        assert resp.status_code == 403
+        start.assert_not_called()
+
+    def test_students_cannot_export(self, client):
+        login_session(client, identity="student")
+        resp = client.post("/assignments/a1/submissions/export")
+        assert resp.status_code == 403
+
+
+class TestCourseScope:
+    @pytest.fixture
+    def other_course(self, monkeypatch):
+        import course_utils
+        from routes import assignmentRoute as mod
+
+        mod.assignment_model.get_assignment.return_value = {
+            "_id": "a1",
+            "teacher_id": "60d21b4667d0d8992e610c85",
+            "course_id": "c1",
+            "github_repo_path": "",
+        }
+        mod.users.find_one.return_value = {"_id": "stu1", "username": "bob"}
+        enrolled = MagicMock(return_value=False)
+        monkeypatch.setattr(course_utils.enrollment_model, "is_enrolled", enrolled)
+        return mod, enrolled
+
+    @pytest.mark.parametrize(
+        "method, url",
+        [
+            ("get", "/assignments/a1"),
+            ("get", "/assignments/a1/preview/main.py"),
+            ("get", "/assignments/a1/raw/main.py"),
+            ("get", "/assignments/a1/download"),
+            ("get", "/assignments/a1/browse"),
+            ("post", "/assignments/a1/submit"),
+        ],
+    )
+    def test_not_enrolled_student_gets_404(self, client, other_course, method, url):
+        mod, enrolled = other_course
+        login_session(client, username="bob", identity="student")
+
+        resp = getattr(client, method)(url, data={"github_link": "https://g"})
+        assert resp.status_code == 404
+        enrolled.assert_called_with("c1", "stu1")
+        mod.submission_model.create_submission.assert_not_called()
+        mod.stream_repo_file.assert_not_called()
+
+    def test_enrolled_student_sees_the_assignment(self, client, other_course):
+        mod, enrolled = other_course
+        enrolled.return_value = True
+        login_session(client, username="bob", identity="student")
+        assert client.get("/assignments/a1").status_code == 200
+
+    def test_teacher_is_not_scoped(self, client, other_course):
+        mod, enrolled = other_course
+        login_session(client)
+        assert client.get("/assignments/a1").status_code == 200
+        enrolled.assert_not_called()
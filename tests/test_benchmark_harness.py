@@ -0,0 +1,94 @@
+import io
+import smtplib
+import zipfile
+from email.message import EmailMessage
+
+import pytest
+import requests
+
+from benchmarks.fake_github import FakeGitHub, SyntheticRepo
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.stats import format_table, percentile, summarize
+
+
+@pytest.fixture(scope="module")
+def github():
+    server = FakeGitHub(SyntheticRepo(dirs=2, files=3, depth=1, file_size=100)).start()
+    yield server
+    server.stop()
+
+
+def test_synthetic_repo_layout():
+    repo = SyntheticRepo(dirs=2, files=3, depth=1, file_size=100)
+    assert repo.dirs[""] == ["README.md", "main1.py", "main2.py", "hw1", "hw2"]
+    assert repo.dirs["hw1"] == ["hw1/README.md", "hw1/main1.py", "hw1/main2.py"]
+    assert all(len(data) == 100 for data in repo.files.values())
+
+
+def test_contents_listing_and_file(github):
+    listing = requests.get(f"{github.url}/repos/o/r/contents/hw1").json()
+    assert [item["path"] for item in listing] == [
+        "hw1/README.md",
+        "hw1/main1.py",
+        "hw1/main2.py",
+    ]
+
+    response = requests.get(f"{github.url}/repos/o/r/contents/hw1/README.md")
+    item = response.json()
+    assert item["type"] == "file" and item["encoding"] == "base64"
+    assert int(response.headers["X-RateLimit-Remaining"]) > 0
+    assert requests.get(item["download_url"]).content == github.repo.files["hw1/README.md"]
+
+
+def test_raw_ranges(github):
+    url = f"{github.url}/repos/o/r/contents/main1.py"
+    raw = {"Accept": "application/vnd.github.v3.raw"}
+    response = requests.get(url, headers=dict(raw, Range="bytes=10-19"))
+    assert response.status_code == 206
+    assert response.content == github.repo.files["main1.py"][10:20]
+    assert response.headers["Content-Range"] == "bytes 10-19/100"
+    assert requests.get(url, headers=dict(raw, Range="bytes=500-")).status_code == 416
+
+
+def test_commits_trees_and_zipball(github):
+    commit = requests.get(f"{github.url}/repos/o/r/commits").json()[0]["sha"]
+    tree = requests.get(f"{github.url}/repos/o/r/git/trees/{commit}").json()
+    assert {entry["path"] for entry in tree["tree"]} >= {"hw1", "hw1/main2.py"}
+
+    zipball = requests.get(f"{github.url}/repos/o/r/zipball/{commit}").content
+    with zipfile.ZipFile(io.BytesIO(zipball)) as zf:
+        assert len(zf.namelist()) == len(github.repo.files)
+    assert github.requests["zipball"] >= 1
+
+
+def test_smtp_sink_accepts_mail():
+    sink = SMTPSink().start()
+    try:
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = "a@x", "b@x", "hi"
+        msg.set_content("body")
+        with smtplib.SMTP(*sink.address) as smtp:
+            smtp.login("user", "password")
+            smtp.send_message(msg)
+            smtp.send_message(msg)
+        assert sink.messages == 2
+    finally:
+        sink.stop()
+
+
+def test_percentiles():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 50) == 0.0
+
+    row = summarize(values, duration=10)
+    assert row["count"] == 100 and row["rps"] == 10
+    assert row["p95"] == pytest.approx(95.0)
+
+
+def test_format_table():
+    table = format_table(
+        [{"route": "home", "p50": 1.234}], [("route", "route", "{}"), ("p50", "p50", "{:.1f}")]
+    )
+    assert table.splitlines() == ["route  p50", "-----  ---", "home   1.2"]
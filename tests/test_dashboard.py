@@ -0,0 +1,167 @@
+import time
+from datetime import datetime
+from unittest.mock import ANY, MagicMock
+
+from pymongo.errors import PyMongoError
+
+import course_utils
+import dashboard
+
+NOW = datetime(2025, 5, 1, 12, 0)
+
+
+def entry(due_date, status="pending", grade=None, title="HW"):
+    return {"title": title, "due_date": due_date, "status": status, "grade": grade}
+
+
+def test_build_merges_submissions_into_visible_assignments(monkeypatch):
+    monkeypatch.setattr(
+        course_utils.enrollment_model, "get_student_course_ids", lambda _id: ["c1"]
+    )
+    dashboard.assignments_collection.find.return_value = [
+        {"_id": "a1", "title": "HW1", "due_date": "2025-05-02T12:00:00"},
+        {"_id": "a2", "title": "HW2", "due_date": "2025-05-03T12:00:00"},
+    ]
+    dashboard.submissions_collection.find.return_value = [
+        {"assignment_id": "a1", "status": "graded", "grade": 95.0},
+        {"assignment_id": "gone", "status": "submitted", "grade": None},
+    ]
+
+    snapshot = dashboard.build("s1")
+
+    scope = dashboard.assignments_collection.find.call_args[0][0]
+    assert scope == {"course_id": {"$in": ["c1", None]}}
+    assert snapshot["items"] == {
+        "a1": entry("2025-05-02T12:00:00", "graded", 95.0, "HW1"),
+        "a2": entry("2025-05-03T12:00:00", title="HW2"),
+    }
+    dashboard.dashboards.insert_one.assert_called_once_with(snapshot)
+
+
+def test_build_keeps_updates_made_while_it_ran(monkeypatch):
+    monkeypatch.setattr(
+        course_utils.enrollment_model, "get_student_course_ids", lambda _id: []
+    )
+    dashboard.assignments_collection.find.return_value = []
+    dashboard.submissions_collection.find.return_value = []
+    dashboard.dashboards.find_one.side_effect = [{"version": "v1"}, {"version": "v2"}]
+    # The first write finds the snapshot changed under it, so it is redone
+    dashboard.dashboards.replace_one.side_effect = [
+        MagicMock(matched_count=0),
+        MagicMock(matched_count=1),
+    ]
+
+    snapshot = dashboard.build("s1")
+
+    first, second = dashboard.dashboards.replace_one.call_args_list
+    assert first[0][0] == {"_id": "s1", "version": "v1"}
+    assert second[0] == ({"_id": "s1", "version": "v2"}, snapshot)
+
+
+def test_buckets_split_and_sort():
+    items = {
+        "late": entry("2025-04-30T12:00:00"),
+        "soon": entry("2025-05-01T13:00:00"),
+        "later": entry("2025-05-09T12:00:00"),
+        "undated": entry(None),
+        "done": entry("2025-04-20T12:00:00", "submitted"),
+        "marked": entry("2025-04-10T12:00:00", "graded", 88),
+        "utc": entry("2025-04-30T12:00:00+00:00"),
+    }
+    result = dashboard.buckets(items, NOW)
+
+    def ids(name):
+        return [item["assignment_id"] for item in result[name]]
+
+    assert ids("upcoming") == ["soon", "later", "undated"]
+    assert sorted(ids("overdue")) == ["late", "utc"]
+    assert ids("submitted") == ["done"]
+    assert ids("graded") == ["marked"]
+    assert result["graded"][0]["grade"] == 88
+    assert result["upcoming"][0]["countdown"].remaining_hours == 1
+
+
+def test_get_reads_a_fresh_snapshot(monkeypatch):
+    dashboard.dashboards.find_one.return_value = {
+        "_id": "s1",
+        "items": {"a1": entry("2025-05-02T12:00:00")},
+        "built_at": time.time(),
+    }
+    build = MagicMock()
+    monkeypatch.setattr(dashboard, "build", build)
+
+    result = dashboard.get("s1", NOW)
+
+    build.assert_not_called()
+    assert [item["assignment_id"] for item in result["upcoming"]] == ["a1"]
+
+
+def test_get_rebuilds_missing_or_stale_snapshots(monkeypatch):
+    build = MagicMock(return_value={"items": {}})
+    monkeypatch.setattr(dashboard, "build", build)
+
+    dashboard.get("s1", NOW)
+    dashboard.dashboards.find_one.return_value = {
+        "items": {},
+        "built_at": time.time() - dashboard.DASHBOARD_MAX_AGE - 1,
+    }
+    dashboard.get("s1", NOW)
+
+    assert build.call_count == 2
+
+
+def test_assignment_added_reaches_the_course_roster(monkeypatch):
+    monkeypatch.setattr(
+        course_utils.enrollment_model, "get_course_student_ids", lambda _id: ["s1"]
+    )
+    dashboard.assignment_added("a1", "HW1", "2025-05-02T12:00:00", "c1")
+    dashboard.assignment_added("a2", "HW2", "2025-05-02T12:00:00")
+
+    course_call, open_call = dashboard.dashboards.update_many.call_args_list
+    assert course_call[0] == (
+        {"_id": {"$in": ["s1"]}},
+        {
+            "$set": {
+                "items.a1": entry("2025-05-02T12:00:00", title="HW1"),
+                "version": ANY,
+            }
+        },
+    )
+    assert open_call[0][0] == {}
+
+
+def test_submission_and_removal_hooks():
+    dashboard.submission_recorded("s1", "a1", "graded", 91.0)
+    dashboard.dashboards.update_one.assert_called_once_with(
+        {"_id": "s1", "items.a1": {"$exists": True}},
+        {
+            "$set": {
+                "items.a1.status": "graded",
+                "items.a1.grade": 91.0,
+                "version": ANY,
+            }
+        },
+    )
+
+    # A resubmission leaves the grade alone, as build() would see it
+    dashboard.dashboards.update_one.reset_mock()
+    dashboard.submission_recorded("s1", "a1")
+    dashboard.dashboards.update_one.assert_called_once_with(
+        {"_id": "s1", "items.a1": {"$exists": True}},
+        {"$set": {"items.a1.status": "submitted", "version": ANY}},
+    )
+
+    dashboard.assignment_removed("a1")
+    dashboard.dashboards.update_many.assert_called_once_with(
+        {"items.a1": {"$exists": True}},
+        {"$unset": {"items.a1": ""}, "$set": {"version": ANY}},
+    )
+
+    dashboard.invalidate("s1")
+    dashboard.dashboards.delete_one.assert_called_once_with({"_id": "s1"})
+
+
+def test_hooks_never_fail_the_request(capsys):
+    dashboard.dashboards.update_one.side_effect = PyMongoError("down")
+    dashboard.submission_recorded("s1", "a1")
+    assert "[dashboard] submission not applied" in capsys.readouterr().out
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+import deadline
+
+NOW = datetime(2025, 5, 1, 12, 0)
+
+
+def legacy(due_date, now):
+    # The per-assignment loop the routes used before this module
+    time_diff = datetime.fromisoformat(due_date) - now
+    return deadline.Countdown(
+        time_diff.days,
+        time_diff.seconds // 3600,
+        (time_diff.seconds % 3600) // 60,
+        time_diff.seconds % 60,
+        time_diff.total_seconds() < 0,
+    )
+
+
+OFFSETS = [
+    timedelta(days=2, hours=3, minutes=4, seconds=5),
+    timedelta(minutes=30),
+    timedelta(seconds=0.5),
+    timedelta(0),
+    -timedelta(seconds=0.5),
+    -timedelta(days=1, hours=2),
+    -timedelta(days=40, seconds=59),
+]
+
+
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_matches_the_old_loop(offset):
+    due = (NOW + offset).isoformat()
+    assert deadline.countdowns([due], NOW) == [legacy(due, NOW)]
+
+
+def test_missing_and_invalid_dates_get_the_default():
+    result = deadline.countdowns([None, "", "next week", 5], NOW)
+    assert result == [deadline.UNKNOWN] * 4
+    assert deadline.UNKNOWN.remaining_days == deadline.DEFAULT_DAYS
+    assert not deadline.UNKNOWN.overdue
+
+
+def test_aware_and_datetime_due_dates():
+    aware = NOW.astimezone(timezone.utc)
+    due = (aware + timedelta(hours=5)).isoformat().replace("+00:00", "Z")
+    countdown, parsed = deadline.countdowns([due, NOW + timedelta(hours=1)], NOW)
+    assert (countdown.remaining_days, countdown.remaining_hours) == (0, 5)
+    assert (parsed.remaining_days, parsed.remaining_hours) == (0, 1)
+
+
+def test_annotate_adds_fields_in_place():
+    assignments = [{"_id": "a1", "due_date": (NOW - timedelta(days=1)).isoformat()}]
+    assert deadline.annotate(assignments, NOW) is assignments
+    assert assignments[0]["remaining_days"] == -1
+    assert assignments[0]["overdue"] is True
+
+
+def test_vector_path_matches_the_loop(monkeypatch):
+    pytest.importorskip("numpy")
+    dues = [(NOW + offset).isoformat() for offset in OFFSETS]
+    expected = deadline.countdowns(dues, NOW)
+    monkeypatch.setattr(deadline, "VECTOR_MIN_BATCH", 1)
+    monkeypatch.setattr(deadline, "_loop_rows", None)  # must not be needed
+    vectored = deadline.countdowns(dues, NOW)
+    assert vectored == expected
+    assert all(type(value) is int for value in vectored[0][:4])
+
+
+ODD = [None, "", "NaT", "next week", "2025-05-02T10:00:00Z", "2025-05-02T10:00-04:00"]
+
+
+@pytest.mark.parametrize("odd", ODD)
+def test_vector_path_leaves_odd_batches_to_the_loop(monkeypatch, odd):
+    pytest.importorskip("numpy")
+    dues = [(NOW + offset).isoformat() for offset in OFFSETS] + [odd]
+    expected = deadline.countdowns(dues, NOW)
+    monkeypatch.setattr(deadline, "VECTOR_MIN_BATCH", 1)
+    assert deadline.countdowns(dues, NOW) == expected
@@ -61,3 +61,68 @@ class TestEmailUtils:
         # Verify login was called but not send_message
         mock_smtp.login.assert_called_once()
         mock_smtp.send_message.assert_not_called()
+
+    @patch("smtplib.SMTP_SSL")
+    @patch("ssl.create_default_context")
+    def test_bulk_mail_job_uses_one_session(self, mock_ssl_context, mock_smtp_ssl):
+        mock_smtp = MagicMock()
+        mock_smtp.send_message.side_effect = [
+            None,
+            smtplib.SMTPRecipientsRefused({"b@example.com": (550, b"no")}),
+            None,
+        ]
+        mock_smtp_ssl.return_value = mock_smtp
+
+        from email_utils import _send_bulk_mail
+
+        job = MagicMock(
+            params={
+                "recipients": ["a@example.com", "b@example.com", "c@example.com"],
+                "subject": "New assignment",
+                "body": "Body",
+            }
+        )
+        _send_bulk_mail(job)
+
+        # One login for the batch; a refused address doesn't stop the rest
+        mock_smtp_ssl.assert_called_once()
+        mock_smtp.login.assert_called_once()
+        assert mock_smtp.send_message.call_count == 3
+        job.progress.assert_called_with(3, 3)
+
+    @patch("smtplib.SMTP_SSL")
+    @patch("ssl.create_default_context")
+    def test_bulk_mail_reconnects_after_a_dropped_session(
+        self, mock_ssl_context, mock_smtp_ssl
+    ):
+        dropped, fresh = MagicMock(), MagicMock()
+        dropped.send_message.side_effect = [
+            None,
+            smtplib.SMTPServerDisconnected("gone"),
+        ]
+        fresh.send_message.side_effect = [None, OSError("timeout"), None]
+        later = MagicMock()
+        mock_smtp_ssl.side_effect = [dropped, fresh, later]
+
+        from email_utils import _send_bulk_mail
+
+        recipients = ["a@example.com", "b@example.com", "c@example.com", "d@example.com"]
+        job = MagicMock(params={"recipients": recipients, "subject": "S", "body": "B"})
+        _send_bulk_mail(job)
+
+        # b is retried on a new session; c fails there and is retried again;
+        # d still goes out, nothing after the failure is dropped
+        sent = [
+            call.args[0]["To"]
+            for smtp in (dropped, fresh, later)
+            for call in smtp.send_message.call_args_list
+        ]
+        assert sent == [
+            "a@example.com",
+            "b@example.com",
+            "b@example.com",
+            "c@example.com",
+            "c@example.com",
+            "d@example.com",
+        ]
+        job.progress.assert_called_with(4, 4)
@@ -0,0 +1,200 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+import github_async
+import github_utils
+from github_async import AsyncGitHub
+from github_utils import PRIORITY_LOW, RateLimitExceeded
+
+
+class R:
+    def __init__(self, status_code=200, payload=None, content=b"", headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.content = content
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def sync_transport(monkeypatch):
+    """Force the requests-on-threads transport even where httpx is installed"""
+    monkeypatch.setattr(github_async, "httpx", None)
+
+
+@pytest.fixture
+def fake_github(monkeypatch, sync_transport):
+    tree = {
+        "": [
+            {"type": "dir", "name": "a", "path": "a"},
+            {"type": "dir", "name": "b", "path": "b"},
+            {"type": "file", "name": "top.md", "path": "top.md", "download_url": "raw/top"},
+        ],
+        "a": [{"type": "file", "name": "x.py", "path": "a/x.py", "download_url": "raw/x"}],
+        "b": [{"type": "dir", "name": "c", "path": "b/c"}],
+        "b/c": [{"type": "file", "name": "y.py", "path": "b/c/y.py", "download_url": "raw/y"}],
+    }
+    prefix = "https://api.github.com/repos/o/r/contents/"
+
+    def fake_get(url, headers=None, **kwargs):
+        if url.startswith(prefix):
+            return R(payload=tree[url[len(prefix):]])
+        return R(content=url.encode())
+
+    get = MagicMock(side_effect=fake_get)
+    monkeypatch.setattr(github_async.requests, "get", get)
+    return get
+
+
+def run(coro):
+    return github_async.run(coro, timeout=10)
+
+
+class TestLoopThread:
+    def test_runs_coroutines_from_many_threads(self):
+        async def double(n):
+            await asyncio.sleep(0)
+            return n * 2
+
+        results = {}
+        threads = [
+            threading.Thread(target=lambda n=n: results.__setitem__(n, run(double(n))))
+            for n in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == {n: n * 2 for n in range(5)}
+
+    def test_raises_coroutine_errors(self):
+        async def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            run(boom())
+
+    def test_caller_priority_carries_over(self):
+        async def priority():
+            return github_utils.current_priority()
+
+        assert run(priority()) == github_utils.PRIORITY_HIGH
+        with github_utils.github_priority(PRIORITY_LOW):
+            assert run(priority()) == PRIORITY_LOW
+
+    def test_gives_up_and_cancels_a_stuck_coroutine(self):
+        cancelled = threading.Event()
+
+        async def stuck():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(concurrent.futures.TimeoutError):
+            github_async.run(stuck(), timeout=0.05)
+        assert cancelled.wait(5)
+
+
+class TestAsyncGitHub:
+    def test_walk_lists_every_level(self, fake_github):
+        items = run(AsyncGitHub().walk("o", "r", "tok"))
+        assert {i["path"] for i in items if i["type"] == "file"} == {
+            "top.md",
+            "a/x.py",
+            "b/c/y.py",
+        }
+        auth = fake_github.call_args.kwargs["headers"]["Authorization"]
+        assert auth == "token tok"
+
+    def test_walk_of_a_file(self, fake_github, monkeypatch):
+        client = AsyncGitHub()
+        monkeypatch.setattr(
+            client, "get", MagicMock(side_effect=AssertionError("not cached"))
+        )
+        github_async.repo_cache.github_cache.put(
+            "contents", "o/r", "a/x.py", "tok", {"type": "file", "path": "a/x.py"}
+        )
+        assert run(client.walk("o", "r", "tok", "a/x.py")) == [
+            {"type": "file", "path": "a/x.py"}
+        ]
+
+    def test_listings_are_cached(self, fake_github):
+        client = AsyncGitHub()
+        run(client.walk("o", "r", "tok"))
+        calls = fake_github.call_count
+        run(client.walk("o", "r", "tok"))
+        assert fake_github.call_count == calls
+
+    def test_fetch_files(self, fake_github):
+        blobs = run(AsyncGitHub().fetch_files(["raw/x", "raw/y"], "tok"))
+        assert blobs == [b"raw/x", b"raw/y"]
+
+    def test_fallback_transport_has_a_timeout(self, fake_github):
+        run(AsyncGitHub().fetch_files(["raw/x"], "tok"))
+        timeout = fake_github.call_args.kwargs["timeout"]
+        assert timeout == github_async.GITHUB_TIMEOUT_SECONDS
+
+    def test_fetch_files_raises_on_a_failed_file(self, monkeypatch, sync_transport):
+        monkeypatch.setattr(
+            github_async.requests,
+            "get",
+            lambda url, **kw: R(status_code=500) if url == "raw/y" else R(content=b"x"),
+        )
+        with pytest.raises(Exception, match="500"):
+            run(AsyncGitHub().fetch_files(["raw/x", "raw/y", "raw/z"], "tok"))
+
+    def test_concurrency_is_bounded(self, monkeypatch, sync_transport):
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def slow_get(url, headers=None, **kwargs):
+            with lock:
+                active.append(url)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(url)
+            return R(content=b"x")
+
+        monkeypatch.setattr(github_async.requests, "get", slow_get)
+        urls = [f"raw/{n}" for n in range(12)]
+        assert run(AsyncGitHub(concurrency=3).fetch_files(urls, "tok")) == [b"x"] * 12
+        assert max(peak) == 3
+
+    def test_rate_limit_aborts_walk(self, monkeypatch, sync_transport):
+        limited = R(status_code=429, headers={"Retry-After": "30"})
+        root = R(payload=[{"type": "dir", "name": "a", "path": "a"}])
+        prefix = "https://api.github.com/repos/o/r/contents/"
+        monkeypatch.setattr(
+            github_async.requests,
+            "get",
+            lambda url, **kw: root if url == prefix else limited,
+        )
+        with pytest.raises(RateLimitExceeded) as exc:
+            run(AsyncGitHub().walk("o", "r", "tok"))
+        assert exc.value.retry_after == 30
+
+    def test_unlistable_directory_is_skipped(self, monkeypatch, sync_transport):
+        root = R(payload=[
+            {"type": "dir", "name": "a", "path": "a"},
+            {"type": "file", "name": "f", "path": "f", "download_url": "raw/f"},
+        ])
+        prefix = "https://api.github.com/repos/o/r/contents/"
+        monkeypatch.setattr(
+            github_async.requests,
+            "get",
+            lambda url, **kw: root if url == prefix else R(status_code=404),
+        )
+        items = run(AsyncGitHub().walk("o", "r", "tok"))
+        assert [i["path"] for i in items] == ["a", "f"]
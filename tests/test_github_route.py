@@ -1,6 +1,6 @@
 # tests/test_github_routes.py
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
 from flask import Flask
@@ -152,7 +152,7 @@ class TestGithubBlueprint:
         assert [item["name"] for item in payload] == ["src", "README.md"]
 
     # ---------- Pure-Python helper: list_repo_files_recursive ----------
-    @patch("routes.githubRoute.get_repo_contents")
+    @patch("github_async.client.get_repo_contents", new_callable=AsyncMock)
     def test_list_repo_files_recursive(self, mock_get):
         """
         Directory structure mocked:
@@ -259,7 +259,7 @@ class TestGithubBlueprintExtra:
         assert is_repo_path_file("alice", "demo", "tok", "") is False
 
     # ---------- list_repo_files_recursive error branch ----------
-    @patch("routes.githubRoute.get_repo_contents")
+    @patch("github_async.client.get_repo_contents", new_callable=AsyncMock)
     def test_list_repo_files_recursive_error(self, mock_get):
         from routes.githubRoute import list_repo_files_recursive
 
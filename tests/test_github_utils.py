@@ -0,0 +1,241 @@
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+import github_utils
+from github_utils import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    RateLimitExceeded,
+    RateLimitGovernor,
+    github_get,
+    github_priority,
+    token_key,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_response(status_code=200, headers=None, text=""):
+    return MagicMock(status_code=status_code, headers=headers or {}, text=text)
+
+
+def quota(remaining, reset_at):
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(int(reset_at))}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def governor(clock):
+    return RateLimitGovernor(clock=clock, sleep=clock.sleep)
+
+
+class TestRateLimitGovernor:
+    def test_low_priority_shed_near_limit(self, governor, clock):
+        governor.record("tok", make_response(headers=quota(10, clock.now + 600)))
+
+        with pytest.raises(RateLimitExceeded) as exc:
+            governor.acquire("tok", PRIORITY_LOW)
+        assert exc.value.retry_after == 600
+        # Interactive calls still go through
+        governor.acquire("tok", PRIORITY_HIGH)
+
+    def test_plenty_of_quota_allows_everything(self, governor, clock):
+        governor.record("tok", make_response(headers=quota(4000, clock.now + 600)))
+        governor.acquire("tok", PRIORITY_LOW)
+        governor.acquire("tok", PRIORITY_HIGH)
+
+    def test_exhausted_quota(self, governor, clock):
+        governor.record("tok", make_response(headers=quota(0, clock.now + 600)))
+        with pytest.raises(RateLimitExceeded):
+            governor.acquire("tok", PRIORITY_HIGH)
+
+        # Once the window resets the stale count no longer applies
+        clock.now += 601
+        governor.acquire("tok", PRIORITY_HIGH)
+
+    def test_short_backoff_waits_for_interactive_calls(self, governor, clock):
+        governor.record("tok", make_response(403, {"Retry-After": "2"}))
+        governor.acquire("tok", PRIORITY_HIGH)
+        assert clock.slept == [2]
+
+        governor.record("tok", make_response(403, {"Retry-After": "2"}))
+        with pytest.raises(RateLimitExceeded):
+            governor.acquire("tok", PRIORITY_LOW)
+
+    def test_secondary_limit_backoff_doubles(self, governor, clock):
+        body = "You have exceeded a secondary rate limit."
+        assert governor.record("tok", make_response(403, text=body)) == 60
+        assert governor.record("tok", make_response(403, text=body)) == 120
+
+        clock.now += 121
+        governor.record("tok", make_response(200))
+        assert governor.record("tok", make_response(403, text=body)) == 60
+
+    def test_plain_forbidden_is_not_a_limit(self, governor):
+        assert governor.record("tok", make_response(403, text="Bad credentials")) is None
+        governor.acquire("tok", PRIORITY_LOW)
+
+    def test_tokens_are_tracked_separately(self, governor, clock):
+        governor.record("a", make_response(headers=quota(0, clock.now + 600)))
+        governor.acquire("b", PRIORITY_LOW)
+
+
+class TestSharedState:
+    def test_low_quota_is_published(self, clock):
+        collection = MagicMock()
+        collection.find_one.return_value = None
+        governor = RateLimitGovernor(collection, clock=clock, sleep=clock.sleep)
+
+        governor.record("tok", make_response(headers=quota(4000, clock.now + 600)))
+        collection.update_one.assert_not_called()
+
+        governor.record("tok", make_response(headers=quota(20, clock.now + 600)))
+        (query, update), kwargs = collection.update_one.call_args
+        assert query == {"_id": token_key("tok")}
+        assert update["$set"]["remaining"] == 20
+        assert kwargs == {"upsert": True}
+
+    def test_other_workers_state_is_honoured(self, clock):
+        collection = MagicMock()
+        collection.find_one.return_value = {
+            "_id": token_key("tok"),
+            "blocked_until": clock.now + 300,
+        }
+        governor = RateLimitGovernor(collection, clock=clock, sleep=clock.sleep)
+
+        with pytest.raises(RateLimitExceeded) as exc:
+            governor.acquire("tok", PRIORITY_HIGH)
+        assert exc.value.retry_after == 300
+
+    def test_merge_keeps_lower_remaining(self, clock):
+        reset_at = int(clock.now + 600)
+        collection = MagicMock()
+        collection.find_one.return_value = {"remaining": 5, "reset_at": reset_at}
+        governor = RateLimitGovernor(collection, clock=clock, sleep=clock.sleep)
+        governor.record("tok", make_response(headers=quota(3000, reset_at)))
+
+        clock.now += 2  # past the refresh interval
+        with pytest.raises(RateLimitExceeded):
+            governor.acquire("tok", PRIORITY_LOW)
+
+    def test_token_is_not_stored(self):
+        assert "secret" not in token_key("secret")
+        assert token_key(None) == "anonymous"
+
+
+class TestGithubGet:
+    def test_adds_auth_and_records(self, monkeypatch, github_governor):
+        response = make_response(headers=quota(10, 9_999_999_999))
+        get = MagicMock(return_value=response)
+        monkeypatch.setattr(github_utils.requests, "get", get)
+
+        assert github_get("https://api.github.com/x", "tok", headers={"Accept": "a"}) is response
+        assert get.call_args.kwargs["headers"] == {"Accept": "a", "Authorization": "token tok"}
+
+        with github_priority(PRIORITY_LOW):
+            with pytest.raises(RateLimitExceeded):
+                github_get("https://api.github.com/x", "tok")
+        assert get.call_count == 1
+
+    def test_rate_limited_response_raises(self, monkeypatch):
+        response = make_response(429, {"Retry-After": "30"})
+        monkeypatch.setattr(github_utils.requests, "get", MagicMock(return_value=response))
+
+        with pytest.raises(RateLimitExceeded) as exc:
+            github_get("https://api.github.com/x", "tok")
+        assert exc.value.retry_after == 30
+        response.close.assert_called_once()
+
+
+class TestSingleFlight:
+    def _run_concurrently(self, flight, fn, callers=5):
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(flight.do("key", fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(callers)]
+        for t in threads:
+            t.start()
+        # Hold the leader until every other caller is waiting on it
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            call = flight._calls.get("key")
+            if call is not None and call.waiters == callers - 1:
+                break
+            time.sleep(0.001)
+        return threads, results, errors
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = github_utils.SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"sha": "abc"}
+
+        threads, results, errors = self._run_concurrently(flight, fetch)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert errors == []
+        assert results == [{"sha": "abc"}] * 5
+        # Nothing is cached once the call completes
+        assert flight.do("key", lambda: "fresh") == "fresh"
+
+    def test_errors_reach_every_caller(self):
+        flight = github_utils.SingleFlight()
+        release = threading.Event()
+
+        def fetch():
+            release.wait(5)
+            raise RateLimitExceeded(10)
+
+        threads, results, errors = self._run_concurrently(flight, fetch, callers=3)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert results == []
+        assert len(errors) == 3
+        assert all(isinstance(e, RateLimitExceeded) for e in errors)
+
+    def test_streamed_gets_are_not_coalesced(self, monkeypatch):
+        flight = MagicMock()
+        monkeypatch.setattr(github_utils, "inflight", flight)
+        monkeypatch.setattr(
+            github_utils.requests, "get", MagicMock(return_value=make_response())
+        )
+
+        github_get("https://api.github.com/x", "tok", stream=True)
+        flight.do.assert_not_called()
+
+        github_get("https://api.github.com/x", "tok", params={"per_page": 1})
+        key = flight.do.call_args.args[0]
+        assert key[0] == "https://api.github.com/x"
+        assert ("per_page", 1) in key[4]
@@ -0,0 +1,115 @@
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock
+
+from http_utils import (
+    conditional_page,
+    content_disposition,
+    not_modified,
+    page_etag,
+    relay_upstream,
+)
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def make_upstream(status_code=200, headers=None, chunks=(b"data",)):
+    upstream = MagicMock(status_code=status_code, headers=headers or {})
+    upstream.iter_content.return_value = list(chunks)
+    return upstream
+
+
+class TestRelayUpstream:
+    def test_relay_passes_range_headers(self, app):
+        upstream = make_upstream(
+            206,
+            {
+                "Content-Length": "2",
+                "Content-Range": "bytes 2-3/10",
+                "ETag": '"abc"',
+                "X-GitHub-Request-Id": "ignored",
+            },
+            [b"ab"],
+        )
+        with app.test_request_context():
+            resp = relay_upstream(upstream, "notes.pdf")
+            body = b"".join(resp.response)
+
+        assert resp.status_code == 206
+        assert body == b"ab"
+        assert resp.headers["Content-Range"] == "bytes 2-3/10"
+        assert resp.headers["ETag"] == '"abc"'
+        assert "X-GitHub-Request-Id" not in resp.headers
+        assert resp.headers["Content-Type"] == "application/pdf"
+        assert resp.headers["Content-Disposition"] == 'inline; filename="notes.pdf"'
+        upstream.close.assert_called_once()
+
+    def test_relay_as_attachment_unknown_type(self, app):
+        upstream = make_upstream()
+        with app.test_request_context():
+            resp = relay_upstream(upstream, "blob.xyz123", as_attachment=True)
+            b"".join(resp.response)
+
+        assert resp.headers["Content-Type"] == "application/octet-stream"
+        assert resp.headers["Content-Disposition"].startswith("attachment;")
+        assert resp.headers["Cache-Control"] == "private, max-age=300"
+
+    def test_relay_non_ascii_name(self, app):
+        with app.test_request_context():
+            resp = relay_upstream(make_upstream(), "Übung 1.pdf", as_attachment=True)
+            b"".join(resp.response)
+
+        assert resp.headers["Content-Disposition"] == (
+            "attachment; filename=\"Ubung 1.pdf\"; "
+            "filename*=UTF-8''%C3%9Cbung%201.pdf"
+        )
+
+    def test_content_disposition_escapes_quotes_and_newlines(self):
+        assert content_disposition("inline", 'say "hi".md') == (
+            'inline; filename="say \\"hi\\".md"'
+        )
+        assert content_disposition("inline", "a\r\nSet-Cookie: x.txt") == (
+            'inline; filename="aSet-Cookie: x.txt"'
+        )
+        assert content_disposition("inline", "笔记.md") == (
+            "inline; filename=\".md\"; filename*=UTF-8''%E7%AC%94%E8%AE%B0.md"
+        )
+
+    def test_relay_skips_empty_chunks(self, app):
+        upstream = make_upstream(chunks=[b"a", b"", b"b"])
+        with app.test_request_context():
+            resp = relay_upstream(upstream, "a.txt")
+            assert b"".join(resp.response) == b"ab"
+
+
+class TestConditionalPages:
+    def test_page_etag_changes_with_parts(self):
+        base = page_etag("browse_content_files.html", "alice", "sha1")
+        assert base == page_etag("browse_content_files.html", "alice", "sha1")
+        assert base != page_etag("browse_content_files.html", "bob", "sha1")
+        assert base != page_etag("browse_content_files.html", "alice", "sha2")
+        # Different templates never share validators
+        assert base != page_etag("preview_code.html", "alice", "sha1")
+
+    def test_not_modified_matches(self, app):
+        with app.test_request_context(headers={"If-None-Match": '"abc"'}):
+            resp = not_modified("abc")
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == '"abc"'
+        assert resp.headers["Cache-Control"] == "private, no-cache"
+
+    def test_not_modified_mismatch(self, app):
+        with app.test_request_context(headers={"If-None-Match": '"old"'}):
+            assert not_modified("abc") is None
+        with app.test_request_context():
+            assert not_modified("abc") is None
+
+    def test_conditional_page_sets_validators(self, app):
+        with app.test_request_context():
+            resp = conditional_page("<html></html>", "abc")
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] == '"abc"'
+        assert resp.headers["Cache-Control"] == "private, no-cache"
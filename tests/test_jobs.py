@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from unittest.mock import MagicMock
+
+import jobs
+
+
+@pytest.fixture(autouse=True)
+def collection(monkeypatch, tmp_path):
+    collection = MagicMock(name="jobs")
+    monkeypatch.setattr(jobs, "jobs_collection", collection)
+    monkeypatch.setattr(jobs, "JOB_ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "_handlers", {})
+    return collection
+
+
+def last_update(collection):
+    query, update = collection.update_one.call_args.args
+    return query, update["$set"]
+
+
+def test_enqueue_inserts_a_queued_job(collection):
+    job_id = jobs.enqueue("export", "alice", {"a": 1}, download_name="x.zip")
+
+    doc = collection.insert_one.call_args.args[0]
+    assert doc["_id"] == job_id
+    assert (doc["kind"], doc["owner"], doc["params"]) == ("export", "alice", {"a": 1})
+    assert doc["state"] == jobs.STATE_QUEUED
+    assert doc["download_name"] == "x.zip"
+
+
+def test_claim_takes_the_oldest_queued_job(collection):
+    jobs.claim()
+
+    query, update = collection.find_one_and_update.call_args.args
+    assert query == {"state": jobs.STATE_QUEUED}
+    assert update["$set"]["state"] == jobs.STATE_RUNNING
+    assert collection.find_one_and_update.call_args.kwargs["sort"] == [("created_at", 1)]
+
+
+def test_run_job_records_progress_and_artifact(collection):
+    @jobs.handler("export")
+    def export(job):
+        with open(job.artifact_path(".zip"), "wb") as out:
+            out.write(b"PK")
+        job.progress(1, 1)
+
+    jobs.run_job({"_id": "j1", "kind": "export", "params": {}})
+
+    query, fields = last_update(collection)
+    assert query == {"_id": "j1"}
+    assert fields["state"] == jobs.STATE_DONE
+    assert open(fields["artifact"], "rb").read() == b"PK"
+    assert fields["expires_at"] == fields["finished_at"] + jobs.JOB_TTL_SECONDS
+
+
+def test_failed_job_keeps_no_artifact(collection):
+    @jobs.handler("export")
+    def export(job):
+        open(job.artifact_path(".zip"), "wb").close()
+        raise Exception("GitHub is down")
+
+    jobs.run_job({"_id": "j1", "kind": "export"})
+
+    _, fields = last_update(collection)
+    assert fields["state"] == jobs.STATE_FAILED
+    assert fields["error"] == "GitHub is down"
+    assert os.listdir(jobs.JOB_ARTIFACT_DIR) == []
+
+
+def test_unknown_kind_fails(collection):
+    jobs.run_job({"_id": "j1", "kind": "nope"})
+    assert last_update(collection)[1]["state"] == jobs.STATE_FAILED
+
+
+def test_cleanup_deletes_expired_jobs_and_files(collection, tmp_path):
+    path = tmp_path / "j1.zip"
+    path.write_bytes(b"PK")
+    collection.find.return_value = [{"_id": "j1", "artifact": str(path)}, {"_id": "j2"}]
+
+    assert jobs.cleanup_jobs(now=1000) == 2
+
+    assert not path.exists()
+    collection.delete_many.assert_called_once_with({"_id": {"$in": ["j1", "j2"]}})
+    # Jobs whose worker went away are failed so they expire too
+    stale_query = collection.update_many.call_args.args[0]
+    assert stale_query["updated_at"] == {"$lt": 1000 - jobs.JOB_STALE_SECONDS}
@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import patch
+
+import markdown_utils
+from markdown_utils import RenderCache, content_hash, render_markdown
+
+
+@pytest.fixture(autouse=True)
+def clear_render_cache():
+    markdown_utils.render_cache.clear()
+    yield
+    markdown_utils.render_cache.clear()
+
+
+class TestRenderMarkdown:
+    def test_render_basic(self):
+        html = render_markdown("# Title\n\n|a|b|\n|-|-|\n|1|2|")
+        assert "<h1>Title</h1>" in html
+        assert "<table>" in html
+
+    def test_render_highlights_code_with_pygments(self):
+        html = render_markdown("```python\nimport os\n```")
+        assert '<div class="codehilite">' in html
+        assert '<span class="kn">import</span>' in html
+
+    def test_render_empty(self):
+        assert render_markdown(None) == ""
+        assert render_markdown("") == ""
+
+    def test_render_uses_cache(self):
+        text = "# Cached"
+        first = render_markdown(text)
+
+        with patch.object(markdown_utils, "_get_renderer") as mock_renderer:
+            second = render_markdown(text)
+
+        mock_renderer.assert_not_called()
+        assert first == second
+        assert markdown_utils.render_cache.hits == 1
+
+    def test_breaks_turn_single_newlines_into_br(self):
+        text = "line one\nline two"
+        assert "<br />" not in render_markdown(text)
+        assert "line one<br />\nline two" in render_markdown(text, breaks=True)
+        # Both renderings are cached side by side
+        assert "<br />" not in render_markdown(text)
+
+    def test_renderer_is_reused_between_documents(self):
+        render_markdown("# One")
+        renderer = markdown_utils._get_renderer()
+        render_markdown("# Two")
+        assert markdown_utils._get_renderer() is renderer
+        assert "One" not in render_markdown("# Three")
+
+
+class TestRenderCache:
+    def test_lru_eviction_by_bytes(self):
+        cache = RenderCache(max_bytes=10, max_entry_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        # Touch "a" so "b" becomes least recently used
+        assert cache.get("a") == "aaaa"
+        cache.put("c", "cccc")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.get("c") == "cccc"
+        assert cache.size_bytes == 8
+
+    def test_oversized_entry_not_cached(self):
+        cache = RenderCache(max_bytes=100, max_entry_bytes=3)
+        cache.put("big", "xxxx")
+        assert cache.get("big") is None
+        assert len(cache) == 0
+
+    def test_replace_entry_updates_size(self):
+        cache = RenderCache(max_bytes=100, max_entry_bytes=100)
+        cache.put("k", "12345")
+        cache.put("k", "12")
+        assert cache.size_bytes == 2
+        assert len(cache) == 1
+
+    def test_content_hash_stable(self):
+        assert content_hash("abc") == content_hash("abc")
+        assert content_hash("abc") != content_hash("abd")
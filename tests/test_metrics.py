@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock
+
+pytest.importorskip("prometheus_client")
+
+import jobs
+import metrics
+
+
+def sample(name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "s3cret")
+    monkeypatch.setattr(jobs, "jobs_collection", MagicMock(**{"aggregate.return_value": []}))
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @app.route("/hello")
+    def hello():
+        return "OK"
+
+    return app
+
+
+def test_request_latency_by_endpoint(app):
+    labels = {"endpoint": "hello", "method": "GET", "status": "200"}
+    before = sample("darkspace_request_duration_seconds_count", **labels)
+    app.test_client().get("/hello")
+    assert sample("darkspace_request_duration_seconds_count", **labels) == before + 1
+
+
+def test_unknown_urls_share_one_label(app):
+    labels = {"endpoint": "unmatched", "method": "GET", "status": "404"}
+    before = sample("darkspace_request_duration_seconds_count", **labels)
+    app.test_client().get("/nope/1")
+    app.test_client().get("/nope/2")
+    assert sample("darkspace_request_duration_seconds_count", **labels) == before + 2
+
+
+def test_metrics_endpoint(app):
+    jobs.jobs_collection.aggregate.side_effect = [
+        [{"_id": {"kind": "bulk_mail", "state": "queued"}, "n": 2}],
+        [{"_id": None, "n": 57}],
+    ]
+    resp = app.test_client().get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain")
+    body = resp.get_data(as_text=True)
+    assert "darkspace_request_duration_seconds_bucket" in body
+    assert 'darkspace_jobs{kind="bulk_mail",state="queued"} 2.0' in body
+    assert "darkspace_mail_outbox_messages 57.0" in body
+
+
+def test_metrics_token(app, monkeypatch):
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    resp = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert resp.status_code == 401
+
+    # Without a configured token the endpoint stays closed
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", None)
+    resp = client.get("/metrics", headers={"Authorization": "Bearer "})
+    assert resp.status_code == 403
+
+
+def test_github_responses():
+    before = sample("darkspace_github_requests_total", status="403")
+    response = MagicMock(status_code=403, elapsed=timedelta(milliseconds=120))
+    metrics.observe_github("abcdef0123456789", response, 42)
+    assert sample("darkspace_github_requests_total", status="403") == before + 1
+    assert sample("darkspace_github_rate_limit_remaining", token="abcdef012345") == 42
+
+
+def test_markdown_cache_lookups(monkeypatch):
+    import markdown_utils
+
+    monkeypatch.setattr(markdown_utils, "render_cache", markdown_utils.RenderCache(4096, 4096))
+    miss = sample("darkspace_cache_lookups_total", cache="markdown", result="miss")
+    hit = sample("darkspace_cache_lookups_total", cache="markdown", result="hit")
+    markdown_utils.render_markdown("# Hello")
+    markdown_utils.render_markdown("# Hello")
+    assert sample("darkspace_cache_lookups_total", cache="markdown", result="miss") == miss + 1
+    assert sample("darkspace_cache_lookups_total", cache="markdown", result="hit") == hit + 1
+
+
+def test_cache_lookups():
+    before = sample("darkspace_cache_lookups_total", cache="repo", result="hit")
+    metrics.cache_lookup("repo", True)
+    assert sample("darkspace_cache_lookups_total", cache="repo", result="hit") == before + 1
+
+
+def test_scheduler_jobs_are_timed_even_when_they_fail():
+    @metrics.track_job("flaky")
+    def flaky():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flaky()
+    assert sample("darkspace_scheduler_job_duration_seconds_count", job="flaky") == 1
+
+
+def test_pool_listener_tracks_connections():
+    listener = metrics.PoolMetricsListener()
+    before = sample("darkspace_mongo_pool_checked_out")
+    listener.connection_checked_out(MagicMock(duration=0.002))
+    assert sample("darkspace_mongo_pool_checked_out") == before + 1
+    listener.connection_checked_in(MagicMock())
+    assert sample("darkspace_mongo_pool_checked_out") == before
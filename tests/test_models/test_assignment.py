@@ -41,6 +41,7 @@ class TestAssignmentModel:
         assert call_args["teacher_id"] == teacher_id
         assert call_args["title"] == title
         assert call_args["description"] == description
+        assert call_args["summary"] == description
         assert call_args["due_date"] == due_date
         assert call_args["github_repo_url"] == github_repo_url
         assert call_args["github_repo_path"] == github_repo_path
@@ -130,7 +131,8 @@ class TestAssignmentModel:
         # Verify
         assert result is True
         mock_collection.update_one.assert_called_once_with(
-            {"_id": ObjectId(assignment_id)}, {"$set": update_data}
+            {"_id": ObjectId(assignment_id)},
+            {"$set": dict(update_data, summary="Updated description")},
         )
 
     def test_update_assignment_no_changes(self, assignment_model, mock_collection):
@@ -173,3 +175,19 @@ class TestAssignmentModel:
         mock_collection.delete_one.assert_called_once_with(
             {"_id": ObjectId(assignment_id)}
         )
+
+    def test_get_assignments_page(self, assignment_model, mock_collection):
+        cursor = mock_collection.find.return_value.sort.return_value.limit.return_value
+        cursor.__iter__.return_value = iter([])
+
+        page = assignment_model.get_assignments_page()
+
+        assert page == {"items": [], "next": None, "prev": None}
+        query, projection = mock_collection.find.call_args[0]
+        assert query == {}
+        assert projection["title"] == 1 and projection["summary"] == 1
+        assert "description" not in projection
+
+    def test_ensure_indexes(self, assignment_model, mock_collection):
+        assignment_model.ensure_indexes()
+        mock_collection.create_index.assert_any_call([("created_at", -1), ("_id", -1)])
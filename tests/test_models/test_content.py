@@ -109,7 +109,8 @@ class TestContentModel:
         # Verify
         assert result is True
         mock_collection.update_one.assert_called_once_with(
-            {"_id": ObjectId(content_id)}, {"$set": update_data}
+            {"_id": ObjectId(content_id)},
+            {"$set": dict(update_data, summary="Updated description")},
         )
 
     def test_update_content_no_changes(self, content_model, mock_collection):
@@ -152,3 +153,19 @@ class TestContentModel:
         mock_collection.delete_one.assert_called_once_with(
             {"_id": ObjectId(content_id)}
         )
+
+    def test_get_content_page(self, content_model, mock_collection):
+        cursor = mock_collection.find.return_value.sort.return_value.limit.return_value
+        cursor.__iter__.return_value = iter([])
+
+        page = content_model.get_content_page()
+
+        assert page == {"items": [], "next": None, "prev": None}
+        query, projection = mock_collection.find.call_args[0]
+        assert query == {}
+        assert projection["title"] == 1 and projection["summary"] == 1
+        assert "description" not in projection
+
+    def test_ensure_indexes(self, content_model, mock_collection):
+        content_model.ensure_indexes()
+        mock_collection.create_index.assert_any_call([("created_at", -1), ("_id", -1)])
@@ -0,0 +1,44 @@
+import pytest
+from bson.objectid import ObjectId
+from unittest.mock import MagicMock
+from models.course import CourseModel
+
+
+class TestCourseModel:
+    @pytest.fixture
+    def mock_collection(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def course_model(self, mock_collection):
+        return CourseModel(mock_collection)
+
+    def test_create_course(self, course_model, mock_collection):
+        mock_collection.insert_one.return_value = MagicMock(
+            inserted_id=ObjectId("60d21b4667d0d8992e610c90")
+        )
+
+        result = course_model.create_course("t1", "Intro to CS", "001")
+
+        assert result == "60d21b4667d0d8992e610c90"
+        doc = mock_collection.insert_one.call_args[0][0]
+        assert doc["teacher_id"] == "t1"
+        assert doc["name"] == "Intro to CS"
+        assert doc["code"] == "001"
+        assert "created_at" in doc
+
+    def test_get_teacher_courses(self, course_model, mock_collection):
+        mock_collection.find.return_value.sort.return_value = [{"name": "A"}]
+
+        assert course_model.get_teacher_courses("t1") == [{"name": "A"}]
+        mock_collection.find.assert_called_once_with({"teacher_id": "t1"})
+
+    def test_get_courses(self, course_model, mock_collection):
+        course_id = "60d21b4667d0d8992e610c90"
+        mock_collection.find.return_value.sort.return_value = []
+
+        course_model.get_courses([course_id])
+
+        mock_collection.find.assert_called_once_with(
+            {"_id": {"$in": [ObjectId(course_id)]}}
+        )
@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import MagicMock
+from pymongo.errors import DuplicateKeyError
+from models.enrollment import EnrollmentModel
+
+
+class TestEnrollmentModel:
+    @pytest.fixture
+    def mock_collection(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def enrollment_model(self, mock_collection):
+        return EnrollmentModel(mock_collection)
+
+    def test_enroll(self, enrollment_model, mock_collection):
+        assert enrollment_model.enroll("c1", "s1") is True
+        doc = mock_collection.insert_one.call_args[0][0]
+        assert doc["course_id"] == "c1" and doc["student_id"] == "s1"
+
+    def test_enroll_twice(self, enrollment_model, mock_collection):
+        mock_collection.insert_one.side_effect = DuplicateKeyError("dup")
+        assert enrollment_model.enroll("c1", "s1") is False
+
+    def test_unenroll(self, enrollment_model, mock_collection):
+        mock_collection.delete_one.return_value = MagicMock(deleted_count=1)
+        assert enrollment_model.unenroll("c1", "s1") is True
+        mock_collection.delete_one.assert_called_once_with(
+            {"course_id": "c1", "student_id": "s1"}
+        )
+
+    def test_is_enrolled(self, enrollment_model, mock_collection):
+        mock_collection.find_one.return_value = {"_id": "e1"}
+        assert enrollment_model.is_enrolled("c1", "s1") is True
+        mock_collection.find_one.return_value = None
+        assert enrollment_model.is_enrolled("c1", "s2") is False
+
+    def test_get_student_course_ids(self, enrollment_model, mock_collection):
+        mock_collection.find.return_value = [{"course_id": "c1"}, {"course_id": "c2"}]
+        assert enrollment_model.get_student_course_ids("s1") == ["c1", "c2"]
+        mock_collection.find.assert_called_once_with(
+            {"student_id": "s1"}, {"course_id": 1, "_id": 0}
+        )
+
+    def test_get_course_student_ids(self, enrollment_model, mock_collection):
+        mock_collection.find.return_value = [{"student_id": "s1"}]
+        assert enrollment_model.get_course_student_ids("c1") == ["s1"]
+
+    def test_ensure_indexes(self, enrollment_model, mock_collection):
+        enrollment_model.ensure_indexes()
+        mock_collection.create_index.assert_any_call(
+            [("course_id", 1), ("student_id", 1)], unique=True
+        )
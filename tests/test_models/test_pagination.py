@@ -0,0 +1,106 @@
+import pytest
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from models.pagination import (
+    MAX_PAGE_SIZE,
+    SUMMARY_CHARS,
+    backfill_summaries,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    summary_projection,
+)
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+def docs(n):
+    # Newest first, like the index order
+    return [
+        {"_id": ObjectId(), "created_at": START - timedelta(hours=i), "title": f"T{i}"}
+        for i in range(n)
+    ]
+
+
+def collection(returned):
+    coll = MagicMock()
+    coll.find.return_value.sort.return_value.limit.return_value = returned
+    return coll
+
+
+class TestCursor:
+    def test_round_trip(self):
+        doc = docs(1)[0]
+        assert decode_cursor(encode_cursor(doc)) == (doc["created_at"], doc["_id"])
+
+    @pytest.mark.parametrize("token", [None, "", "not-base64!", "Zm9v"])
+    def test_invalid_tokens_start_from_the_top(self, token):
+        assert decode_cursor(token) is None
+
+
+class TestKeysetPage:
+    def test_first_page(self):
+        rows = docs(3)
+        coll = collection(rows)
+
+        page = keyset_page(coll, {}, {"title": 1}, limit=2)
+
+        coll.find.assert_called_once_with({}, {"title": 1})
+        coll.find.return_value.sort.assert_called_once_with(
+            [("created_at", -1), ("_id", -1)]
+        )
+        coll.find.return_value.sort.return_value.limit.assert_called_once_with(3)
+        assert page["items"] == rows[:2]
+        assert page["next"] == encode_cursor(rows[1])
+        assert page["prev"] is None
+
+    def test_older_page_continues_after_the_cursor(self):
+        rows = docs(2)
+        after = encode_cursor({"_id": ObjectId(), "created_at": START + timedelta(1)})
+        coll = collection(rows)
+
+        page = keyset_page(coll, {"teacher_id": "t"}, None, after=after, limit=5)
+
+        where = coll.find.call_args[0][0]
+        assert where["$and"][0] == {"teacher_id": "t"}
+        assert where["$and"][1]["$or"][0]["created_at"]["$lt"] == START + timedelta(1)
+        assert page["items"] == rows
+        assert page["next"] is None
+        assert page["prev"] == encode_cursor(rows[0])
+
+    def test_newer_page_is_read_upwards_and_reversed(self):
+        rows = docs(3)
+        before = encode_cursor(rows[2])
+        coll = collection([rows[1], rows[0]])
+
+        page = keyset_page(coll, {}, None, before=before, limit=2)
+
+        coll.find.return_value.sort.assert_called_once_with(
+            [("created_at", 1), ("_id", 1)]
+        )
+        assert page["items"] == [rows[0], rows[1]]
+        assert page["next"] == encode_cursor(rows[1])
+        assert page["prev"] is None
+
+    def test_limit_is_capped(self):
+        coll = collection([])
+        keyset_page(coll, {}, None, limit=10_000)
+        coll.find.return_value.sort.return_value.limit.assert_called_once_with(
+            MAX_PAGE_SIZE + 1
+        )
+
+
+def test_summary_projection_leaves_out_descriptions():
+    assert summary_projection(["title"]) == {"title": 1, "summary": 1}
+
+
+def test_backfill_summaries():
+    coll = MagicMock()
+    coll.find.return_value = [{"_id": 1, "description": "x" * 500}, {"_id": 2}]
+
+    assert backfill_summaries(coll) == 2
+    coll.find.assert_called_once_with({"summary": {"$exists": False}}, {"description": 1})
+    coll.update_one.assert_any_call({"_id": 1}, {"$set": {"summary": "x" * SUMMARY_CHARS}})
+    coll.update_one.assert_any_call({"_id": 2}, {"$set": {"summary": ""}})
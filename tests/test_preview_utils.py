@@ -0,0 +1,25 @@
+from preview_utils import decode_text, format_size, line_aligned, looks_binary
+
+
+class TestPreviewUtils:
+    def test_looks_binary(self):
+        assert looks_binary(b"\x00\x01\x02")
+        assert looks_binary(b"\xff\xfe\xfd plain")
+        assert not looks_binary("print('héllo')\n".encode("utf-8"))
+        # A multi-byte character cut off by the Range read is still text
+        assert not looks_binary("abc é".encode("utf-8")[:-1])
+
+    def test_line_aligned(self):
+        assert line_aligned(b"a\nb\npart", at_eof=False) == b"a\nb\n"
+        assert line_aligned(b"a\nb\nlast", at_eof=True) == b"a\nb\nlast"
+        # One huge line is returned whole so paging keeps moving
+        assert line_aligned(b"x" * 10, at_eof=False) == b"x" * 10
+
+    def test_decode_text_replaces_broken_bytes(self):
+        assert decode_text("é".encode("utf-8")[:1]) == "�"
+
+    def test_format_size(self):
+        assert format_size(None) == "unknown size"
+        assert format_size(512) == "512 B"
+        assert format_size(256 * 1024) == "256.0 KB"
+        assert format_size(3 * 1024 ** 3) == "3.0 GB"
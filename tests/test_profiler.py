@@ -0,0 +1,82 @@
+import os
+
+import pytest
+from flask import Flask, Response
+
+import profiler
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "pyinstrument", None)
+    app = Flask(__name__)
+    profiler.init_app(app)
+
+    @app.route("/page")
+    def page():
+        return "page body"
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def test_requests_without_the_token_are_untouched(app, tmp_path):
+    resp = app.test_client().get("/page", headers={"X-Profile": "wrong"})
+    assert resp.data == b"page body"
+    assert "X-Profile-Report" not in resp.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_disabled_without_a_configured_token(app, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_TOKEN", None)
+    resp = app.test_client().get("/page?_profile=1", headers={"X-Profile": "secret"})
+    assert resp.data == b"page body"
+
+
+def test_token_in_the_url_is_ignored(app):
+    resp = app.test_client().get("/page?_profile=secret")
+    assert resp.data == b"page body"
+
+
+def test_query_flag_returns_the_report(app):
+    resp = app.test_client().get("/page?_profile=1", headers={"X-Profile": "secret"})
+    assert resp.content_type.startswith("text/plain")
+    assert b"function calls" in resp.data
+    assert b"page body" not in resp.data
+
+
+def test_replaced_response_is_closed(app):
+    closed = []
+
+    @app.route("/stream")
+    def stream():
+        resp = Response(iter([b"upstream bytes"]))
+        resp.call_on_close(lambda: closed.append(True))
+        return resp
+
+    app.test_client().get("/stream?_profile=1", headers={"X-Profile": "secret"})
+    assert closed == [True]
+
+
+def test_header_saves_the_report(app, tmp_path, capsys):
+    resp = app.test_client().get("/page", headers={"X-Profile": "secret"})
+
+    assert resp.data == b"page body"
+    name = resp.headers["X-Profile-Report"]
+    assert "-page-" in name and name.endswith(".txt")
+    assert "function calls" in (tmp_path / name).read_text()
+    assert f"[profile] GET /page -> {name}" in capsys.readouterr().out
+
+
+def test_profiler_is_stopped_when_the_view_raises(app):
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    resp = app.test_client().get("/boom", headers={"X-Profile": "secret"})
+    assert resp.status_code == 500
+    # Profiling works again on the same thread
+    resp = app.test_client().get("/page?_profile=1", headers={"X-Profile": "secret"})
+    assert b"function calls" in resp.data
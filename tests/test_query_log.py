@@ -0,0 +1,149 @@
+import pytest
+from unittest.mock import MagicMock
+
+import query_log
+
+COLLSCAN_PLAN = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+INDEXED_PLAN = {
+    "queryPlanner": {
+        "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+    },
+    "executionStats": {"totalDocsExamined": 3},
+}
+
+
+@pytest.fixture(autouse=True)
+def log(monkeypatch):
+    log = MagicMock()
+    monkeypatch.setattr(query_log, "slow_queries", log)
+    monkeypatch.setattr(query_log, "_plans", {})
+    monkeypatch.setattr(query_log, "_indexed", True)
+    return log
+
+
+def collection(plan):
+    coll = MagicMock()
+    coll.name = "assignments"
+    coll.find.return_value.__iter__.return_value = iter([{"_id": 1}, {"_id": 2}])
+    coll.find.return_value.explain.return_value = plan
+    coll.find.return_value.limit.return_value.explain.return_value = plan
+    return coll
+
+
+def test_watch_is_a_no_op_unless_enabled(monkeypatch):
+    coll = MagicMock()
+    monkeypatch.setattr(query_log, "QUERY_DEBUG", False)
+    assert query_log.watch(coll) is coll
+    monkeypatch.setattr(query_log, "QUERY_DEBUG", True)
+    assert isinstance(query_log.watch(coll), query_log.WatchedCollection)
+
+
+def test_shape_blanks_values():
+    assert query_log.shape(
+        {"teacher_id": "t1", "$or": [{"a": 1}, {"a": 2}], "n": {"$in": [1, 2, 3]}}
+    ) == {"teacher_id": "?", "$or": [{"a": "?"}], "n": {"$in": ["?"]}}
+    assert query_log.shape_id("c", "find", {"x": 1}) == query_log.shape_id(
+        "c", "find", {"x": 2}
+    )
+
+
+def test_collection_scans_are_logged_with_their_plan(log, capsys):
+    coll = collection(COLLSCAN_PLAN)
+    watched = query_log.WatchedCollection(coll)
+
+    docs = list(watched.find({"teacher_id": "t1"}).sort("created_at", -1))
+
+    assert docs == [{"_id": 1}, {"_id": 2}]
+    coll.find.return_value.sort.assert_called_once_with("created_at", -1)
+    key, update = log.update_one.call_args[0][:2]
+    assert key == {"_id": query_log.shape_id("assignments", "find", {"teacher_id": "?"})}
+    assert update["$set"]["op"] == "find"
+    assert update["$set"]["shape"] == '{"teacher_id": "?"}'
+    assert "COLLSCAN" in update["$set"]["explain"]
+    assert update["$addToSet"]["reasons"]["$each"] == ["collscan"]
+    assert "[query] collscan find assignments" in capsys.readouterr().out
+
+
+def test_fast_indexed_queries_are_not_logged(log):
+    coll = collection(INDEXED_PLAN)
+    watched = query_log.WatchedCollection(coll)
+
+    watched.find_one({"_id": 1})
+    watched.find_one({"_id": 2})
+
+    log.update_one.assert_not_called()
+    # The plan of a known shape is not fetched again
+    assert coll.find.return_value.limit.return_value.explain.call_count == 1
+
+
+def test_slow_queries_are_logged_even_with_an_index(log, monkeypatch):
+    monkeypatch.setattr(query_log, "SLOW_QUERY_MS", 0)
+    watched = query_log.WatchedCollection(collection(INDEXED_PLAN))
+
+    watched.update_one({"_id": 1}, {"$set": {"grade": 90}})
+
+    update = log.update_one.call_args[0][1]
+    assert update["$addToSet"]["reasons"]["$each"] == ["slow"]
+    assert update["$set"]["docs_examined"] == 3
+
+
+def test_aggregate_is_explained_through_a_command(log):
+    coll = collection(None)
+    coll.aggregate.return_value = iter([{"_id": "bob"}])
+    coll.database.command.return_value = {
+        "stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}}]
+    }
+    watched = query_log.WatchedCollection(coll)
+
+    assert list(watched.aggregate([{"$match": {"sender": "a"}}])) == [{"_id": "bob"}]
+    coll.database.command.assert_called_once_with(
+        "aggregate", "assignments", pipeline=[{"$match": {"sender": "a"}}], explain=True
+    )
+    assert log.update_one.called
+
+
+def test_explain_failures_do_not_break_the_query(log):
+    coll = collection(None)
+    coll.find.return_value.limit.return_value.explain.side_effect = RuntimeError("no")
+    coll.find_one.return_value = {"_id": 1}
+
+    assert query_log.WatchedCollection(coll).find_one({"_id": 1}) == {"_id": 1}
+    log.update_one.assert_not_called()
+
+
+class TestSlowQueryPage:
+    @pytest.fixture
+    def client(self):
+        from flask import Flask
+        from routes.adminRoute import admin_bp
+
+        app = Flask(__name__, template_folder="../templates")
+        app.register_blueprint(admin_bp)
+        app.add_url_rule("/login", "login", lambda: "login")
+        app.secret_key = "test"
+        return app.test_client()
+
+    @pytest.fixture(autouse=True)
+    def admins(self, monkeypatch):
+        from routes import adminRoute
+
+        monkeypatch.setattr(adminRoute, "ADMIN_USERS", {"root"})
+
+    def test_anonymous_users_are_sent_to_login(self, client):
+        assert client.get("/admin/slow-queries").status_code == 302
+
+    def test_teachers_who_are_not_admins_are_refused(self, client, log):
+        with client.session_transaction() as sess:
+            sess["username"] = "t"
+            sess["identity"] = "teacher"
+        assert client.get("/admin/slow-queries").status_code == 403
+        assert client.post("/admin/slow-queries/clear").status_code == 403
+        log.delete_many.assert_not_called()
+
+    def test_admins_can_clear_the_log(self, client, log):
+        with client.session_transaction() as sess:
+            sess["username"] = "root"
+            sess["identity"] = "teacher"
+        resp = client.post("/admin/slow-queries/clear")
+        assert resp.status_code == 302
+        log.delete_many.assert_called_once_with({})
@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from repo_cache import (
+    KIND_COMMIT,
+    KIND_CONTENTS,
+    RepoCache,
+    changed_paths,
+    path_ancestors,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRepoCache:
+    def test_get_put_and_expiry(self):
+        clock = FakeClock()
+        cache = RepoCache(ttl=60, clock=clock)
+        cache.put(KIND_CONTENTS, "o/r", "hw1/", "tok", [{"path": "hw1/a.py"}])
+
+        assert cache.get(KIND_CONTENTS, "o/r", "hw1", "tok") == [{"path": "hw1/a.py"}]
+        assert cache.get(KIND_COMMIT, "o/r", "hw1", "tok") is None
+        clock.now += 61
+        assert cache.get(KIND_CONTENTS, "o/r", "hw1", "tok") is None
+
+    def test_entries_are_per_token(self):
+        cache = RepoCache()
+        cache.put(KIND_CONTENTS, "o/r", "", "teacher-token", ["secret"])
+        assert cache.get(KIND_CONTENTS, "o/r", "", "someone-else") is None
+
+    def test_cached_values_are_copies(self):
+        cache = RepoCache()
+        cache.put(KIND_CONTENTS, "o/r", "", "tok", [{"sha": "1"}])
+        cache.get(KIND_CONTENTS, "o/r", "", "tok")[0]["sha"] = "changed"
+        assert cache.get(KIND_CONTENTS, "o/r", "", "tok") == [{"sha": "1"}]
+
+    def test_invalidate_changed_paths_and_ancestors(self):
+        cache = RepoCache()
+        for path in ("", "hw1", "hw1/README.md", "hw2", "hw1/src"):
+            cache.put(KIND_CONTENTS, "o/r", path, "tok", path)
+        cache.put(KIND_COMMIT, "o/r", "hw1", "tok", "sha")
+        cache.put(KIND_CONTENTS, "o/other", "hw1", "tok", "x")
+
+        assert cache.invalidate("o/r", {"hw1/README.md"}) == 4
+        assert cache.get(KIND_CONTENTS, "o/r", "hw2", "tok") == "hw2"
+        assert cache.get(KIND_CONTENTS, "o/r", "hw1/src", "tok") == "hw1/src"
+        assert cache.get(KIND_CONTENTS, "o/r", "hw1", "tok") is None
+        assert cache.get(KIND_CONTENTS, "o/other", "hw1", "tok") == "x"
+
+        assert cache.invalidate("o/r") == 2
+        assert cache.get(KIND_CONTENTS, "o/r", "hw2", "tok") is None
+
+    def test_mongo_backed(self):
+        clock = FakeClock()
+        collection = MagicMock()
+        cache = RepoCache(collection, ttl=60, clock=clock)
+
+        cache.put(KIND_CONTENTS, "o/r", "hw1", "tok", ["x"])
+        (query, doc), kwargs = collection.replace_one.call_args
+        assert doc["repo"] == "o/r" and doc["path"] == "hw1"
+        assert kwargs == {"upsert": True}
+        collection.create_index.assert_any_call("expires_at", expireAfterSeconds=0)
+
+        # pymongo hands back naive UTC datetimes
+        collection.find_one.return_value = dict(
+            doc, expires_at=doc["expires_at"].astimezone(timezone.utc).replace(tzinfo=None)
+        )
+        assert cache.get(KIND_CONTENTS, "o/r", "hw1", "tok") == ["x"]
+        expired = datetime.fromtimestamp(clock.now - 1, timezone.utc).replace(tzinfo=None)
+        collection.find_one.return_value = dict(doc, expires_at=expired)
+        assert cache.get(KIND_CONTENTS, "o/r", "hw1", "tok") is None
+
+        collection.delete_many.return_value.deleted_count = 3
+        assert cache.invalidate("o/r", ["hw1/a.py"]) == 3
+        collection.delete_many.assert_called_once_with(
+            {"repo": "o/r", "path": {"$in": ["", "hw1", "hw1/a.py"]}}
+        )
+
+
+class TestPushPayloads:
+    def test_path_ancestors(self):
+        assert path_ancestors("a/b/c.md") == ["", "a", "a/b", "a/b/c.md"]
+        assert path_ancestors("") == [""]
+
+    def test_changed_paths(self):
+        push = {
+            "commits": [
+                {"added": ["a.py"], "removed": [], "modified": ["b/c.md"]},
+                {"added": [], "removed": ["d.txt"], "modified": ["a.py"]},
+            ]
+        }
+        assert changed_paths(push) == {"a.py", "b/c.md", "d.txt"}
+
+    def test_force_push_drops_everything(self):
+        assert changed_paths({"forced": True, "commits": [{"added": ["a"]}]}) is None
+        assert changed_paths({"commits": []}) is None
@@ -0,0 +1,203 @@
+import base64
+import io
+import os
+import subprocess
+import zipfile
+
+import pytest
+from unittest.mock import MagicMock
+
+from routes import githubRoute
+import archive_utils
+import github_async
+import repo_mirror
+from repo_mirror import MirrorError, RepoMirror
+
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """A local 'GitHub' with one repository, prof/cs101"""
+    work = tmp_path / "remote" / "prof" / "cs101"
+    work.mkdir(parents=True)
+    git(work, "init", "--quiet", "--initial-branch=main")
+    (work / "README.md").write_text("# CS101\n")
+    (work / "hw1").mkdir()
+    (work / "hw1" / "README.md").write_text("Homework 1\n")
+    (work / "hw1" / "data.txt").write_text("0123456789")
+    git(work, "add", ".")
+    git(work, "commit", "--quiet", "-m", "initial")
+    return work
+
+
+@pytest.fixture
+def mirror(tmp_path, upstream, monkeypatch):
+    template = "file://" + str(tmp_path / "remote") + "/{full_name}"
+    mirror = RepoMirror(str(tmp_path / "mirrors"), template)
+    mirror.fetch("prof/cs101", "tok")
+    monkeypatch.setattr(repo_mirror, "mirror", mirror)
+    return mirror
+
+
+def head(work):
+    return subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=work, capture_output=True, text=True
+    ).stdout.strip()
+
+
+class TestRepoMirror:
+    def test_serves_only_the_linking_token(self, mirror, tmp_path):
+        assert mirror.serves("prof/cs101", "tok")
+        assert not mirror.serves("prof/cs101", "other")
+        assert not mirror.serves("prof/unknown", "tok")
+        # Ownership survives a restart
+        fresh = RepoMirror(mirror.base_dir, mirror.url_template)
+        assert fresh.serves("prof/cs101", "tok")
+
+    def test_token_is_not_stored(self, mirror):
+        config = open(os.path.join(mirror.path("prof/cs101"), "config")).read()
+        assert "tok" not in config.replace("tokenkey", "")
+
+    def test_token_is_not_on_the_command_line(self, tmp_path, monkeypatch):
+        run = MagicMock(return_value=subprocess.CompletedProcess([], 0, b"", b""))
+        monkeypatch.setattr(repo_mirror.subprocess, "run", run)
+        https = RepoMirror(str(tmp_path), "https://github.com/{full_name}.git")
+        https.fetch("prof/cs101", "secret-token")
+
+        basic = base64.b64encode(b"x-access-token:secret-token").decode()
+        remote_calls = [c for c in run.call_args_list if c.kwargs["env"]]
+        assert len(remote_calls) == 2  # fetch and ls-remote
+        for call in run.call_args_list:
+            assert not any(basic in arg for arg in call.args[0])
+        for call in remote_calls:
+            assert call.kwargs["env"]["GIT_CONFIG_KEY_0"] == "http.extraHeader"
+            assert call.kwargs["env"]["GIT_CONFIG_VALUE_0"].endswith(basic)
+
+    def test_rejects_bad_names(self, mirror):
+        with pytest.raises(MirrorError):
+            mirror.path("../etc")
+        assert not mirror.serves("a/..", "tok")
+
+    def test_listing(self, mirror):
+        root = mirror.contents("prof/cs101")
+        assert [(i["name"], i["type"]) for i in root] == [
+            ("README.md", "file"),
+            ("hw1", "dir"),
+        ]
+        hw1 = mirror.contents("prof/cs101", "hw1/")
+        assert [i["path"] for i in hw1] == ["hw1/README.md", "hw1/data.txt"]
+        assert hw1[1]["size"] == 10
+
+    def test_file_has_content(self, mirror):
+        item = mirror.contents("prof/cs101", "hw1/README.md")
+        assert item["type"] == "file"
+        assert base64.b64decode(item["content"]) == b"Homework 1\n"
+
+    def test_missing_path(self, mirror):
+        with pytest.raises(MirrorError):
+            mirror.contents("prof/cs101", "hw2")
+        # A prefix of a real name isn't a match
+        with pytest.raises(MirrorError):
+            mirror.contents("prof/cs101", "hw")
+
+    def test_fetch_picks_up_new_commits(self, mirror, upstream):
+        first = mirror.commit_sha("prof/cs101")
+        (upstream / "hw2.md").write_text("new")
+        git(upstream, "add", ".")
+        git(upstream, "commit", "--quiet", "-m", "hw2")
+        mirror.fetch("prof/cs101", "tok")
+        assert mirror.commit_sha("prof/cs101") == head(upstream) != first
+        # hw1 didn't change in the new commit
+        assert mirror.commit_sha("prof/cs101", "hw1") == first
+
+    def test_read_range(self, mirror):
+        assert mirror.read_range("prof/cs101", "hw1/data.txt", 2, 4) == (b"2345", 10)
+        assert mirror.read_range("prof/cs101", "hw1/data.txt", 20, 4) == (b"", 10)
+
+    def test_open_blob_ranges(self, mirror):
+        full = mirror.open_blob("prof/cs101", "hw1/data.txt")
+        assert full.status_code == 200
+        assert full.headers["Content-Length"] == "10"
+        assert b"".join(full.iter_content()) == b"0123456789"
+
+        part = mirror.open_blob("prof/cs101", "hw1/data.txt", "bytes=3-5")
+        assert part.status_code == 206
+        assert part.headers["Content-Range"] == "bytes 3-5/10"
+        assert b"".join(part.iter_content()) == b"345"
+
+        suffix = mirror.open_blob("prof/cs101", "hw1/data.txt", "bytes=-2")
+        assert b"".join(suffix.iter_content()) == b"89"
+
+        past = mirror.open_blob("prof/cs101", "hw1/data.txt", "bytes=50-")
+        assert past.status_code == 416
+        assert past.headers["Content-Range"] == "bytes */10"
+
+    def test_folder_archive_layout(self, mirror):
+        out = io.BytesIO()
+        assert mirror.write_archive("prof/cs101", "hw1", out) is True
+        names = zipfile.ZipFile(out).namelist()
+        assert "hw1/README.md" in names and "hw1/data.txt" in names
+        assert "README.md" not in names
+
+    def test_tree(self, mirror, upstream):
+        tree = mirror.tree("prof/cs101")
+        assert tree["commit"] == head(upstream)
+        assert not tree["truncated"]
+        assert [(e["path"], e["type"]) for e in tree["entries"]] == [
+            ("README.md", "file"),
+            ("hw1", "dir"),
+            ("hw1/README.md", "file"),
+            ("hw1/data.txt", "file"),
+        ]
+
+    def test_file_archive(self, mirror):
+        out = io.BytesIO()
+        assert mirror.write_archive("prof/cs101", "hw1/data.txt", out) is False
+        assert out.getvalue() == b"0123456789"
+
+
+class TestMirrorIntegration:
+    def test_routes_read_from_mirror(self, mirror, monkeypatch):
+        get = MagicMock(side_effect=AssertionError("GitHub was called"))
+        monkeypatch.setattr(githubRoute, "github_get", get)
+
+        node = githubRoute.resolve_repo_path("prof", "cs101", "tok", "hw1/README.md")
+        assert node.content == b"Homework 1\n"
+        assert githubRoute.read_repo_file_range(
+            "prof", "cs101", "tok", "hw1/data.txt", 8, 100
+        ) == (b"89", 10)
+        assert githubRoute.get_path_commit_sha("prof", "cs101", "tok") == mirror.commit_sha("prof/cs101")
+
+    def test_other_tokens_use_github(self, mirror, monkeypatch):
+        response = MagicMock(status_code=200)
+        response.json.return_value = []
+        get = MagicMock(return_value=response)
+        monkeypatch.setattr(githubRoute, "github_get", get)
+
+        assert githubRoute.get_repo_contents("prof", "cs101", "other", "hw1") == []
+        get.assert_called_once()
+
+    def test_archive_built_locally(self, mirror, tmp_path, monkeypatch):
+        monkeypatch.setattr(archive_utils, "ARCHIVE_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(
+            github_async.client, "get", MagicMock(side_effect=AssertionError)
+        )
+        path = archive_utils.build_archive("prof", "cs101", "tok", "hw1", "sha")
+        assert path.endswith(archive_utils.ZIP_SUFFIX)
+        assert "hw1/data.txt" in zipfile.ZipFile(path).namelist()
+
+    def test_sync_mirrors(self, mirror):
+        accounts = [
+            {"repo": "prof/cs101", "access_token": "tok"},
+            {"repo": "prof/missing", "access_token": "tok"},
+            {"repo": None},
+        ]
+        assert repo_mirror.sync_mirrors(accounts) == 1
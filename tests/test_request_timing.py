@@ -0,0 +1,66 @@
+import pytest
+from flask import Flask, g
+from unittest.mock import MagicMock
+
+import request_timing
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    request_timing.init_app(app)
+
+    @app.route("/work")
+    def work():
+        request_timing.record("mongo", 0.002)
+        request_timing.record("mongo", 0.003)
+        with request_timing.timed("github"):
+            pass
+        return "OK"
+
+    @app.route("/idle")
+    def idle():
+        return "OK"
+
+    return app
+
+
+def test_server_timing_header(app):
+    resp = app.test_client().get("/work")
+
+    header = resp.headers["Server-Timing"]
+    assert 'mongo;dur=5.0;desc="2 commands"' in header
+    assert 'github;dur=' in header and 'desc="1 calls"' in header
+    assert "smtp" not in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_requests_without_calls_only_report_total(app):
+    resp = app.test_client().get("/idle")
+    assert resp.headers["Server-Timing"].startswith("total;dur=")
+
+
+def test_record_outside_a_request_is_ignored():
+    request_timing.record("mongo", 1.0)
+
+
+def test_mongo_listener_records_command_duration(app):
+    with app.test_request_context():
+        app.preprocess_request()
+        event = MagicMock(duration_micros=1500)
+        request_timing.MongoTimingListener().succeeded(event)
+        assert g.request_timings.calls["mongo"] == [1, 0.0015]
+
+
+def test_slow_requests_are_logged(app, monkeypatch, capsys):
+    monkeypatch.setattr(request_timing, "SLOW_REQUEST_MS", 0.001)
+    app.test_client().get("/work?x=1")
+    out = capsys.readouterr().out
+    assert "[slow] GET /work?x=1 200" in out
+    assert "mongo=2/5ms" in out
+
+
+def test_fast_requests_are_not_logged(app, monkeypatch, capsys):
+    monkeypatch.setattr(request_timing, "SLOW_REQUEST_MS", 60_000)
+    app.test_client().get("/work")
+    assert "[slow]" not in capsys.readouterr().out
@@ -77,7 +77,8 @@ class TestAssignmentRoutes:
             "username": "student",
             "identity": "student",
         }
-        mock_asgM.get_all_assignments.return_value = fake_asg
+        page = {"items": fake_asg, "next": None, "prev": None}
+        mock_asgM.get_assignments_page.return_value = page
         mock_subM.get_student_submissions.return_value = fake_subs
 
         with client.session_transaction() as sess:
@@ -93,6 +94,7 @@ class TestAssignmentRoutes:
         mock_render.assert_called_once_with(
             "student_assignments.html",
             assignments=fake_asg,
+            page=page,
             submissions=expected,
             username="student",
             identity="student",
@@ -102,10 +104,14 @@ class TestAssignmentRoutes:
 
     @patch("routes.assignmentRoute.redirect")
     @patch("routes.assignmentRoute.users")
+    @patch("routes.assignmentRoute.assignment_model")
     @patch("routes.assignmentRoute.submission_model")
-    def test_submit_assignment(self, mock_subM, mock_users, mock_redirect, client):
+    def test_submit_assignment(
+        self, mock_subM, mock_aM, mock_users, mock_redirect, client
+    ):
         # Arrange
         aid = str(ObjectId())
+        mock_aM.get_assignment.return_value = {"_id": ObjectId(aid), "course_id": None}
         mock_subM.get_student_assignment_submission.return_value = None
         mock_subM.create_submission.return_value = "subid"
         mock_users.find_one.return_value = {
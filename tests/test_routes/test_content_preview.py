@@ -1,9 +1,10 @@
 # tests/test_routes/test_content_preview.py
-import base64
 import pytest
 from bson.objectid import ObjectId
 from unittest.mock import patch, MagicMock
 
+from routes.githubRoute import RepoNode
+
 @pytest.fixture(autouse=True)
 def login(client):
     # 默认以 student 登录
@@ -11,10 +12,15 @@ def login(client):
         sess['username'] = 'stu'
         sess['identity'] = 'student'
 
+@pytest.fixture(autouse=True)
+def no_listing(monkeypatch):
+    # Without a listing entry the preview falls back to hashing the file head
+    monkeypatch.setattr('routes.contentRoute.get_file_entry', lambda *a: None)
+
 class TestContentPreview:
 
     @patch('routes.contentRoute.render_template')
-    @patch('routes.contentRoute.requests.get')
+    @patch('routes.contentRoute.read_file_head')
     @patch('routes.contentRoute.github_accounts')
     @patch('routes.contentRoute.users')
     @patch('routes.contentRoute.content_model')
@@ -31,13 +37,12 @@ class TestContentPreview:
         # 模拟 GitHub 账号
         mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
         # 模拟 GitHub API 返回
-        resp = MagicMock(status_code=200, content=b"# Hello")
-        mock_get.return_value = resp
+        mock_get.return_value = (b"# Hello", 7)
 
         client.get(f'/content/{cid}/preview/README.md')
         mock_render.assert_called_once_with(
             'preview_markdown.html',
-            content="# Hello",
+            content_html="<h1>Hello</h1>",
             file_name="README.md",
             item=mock_cm.get_content.return_value,
             item_type='content',
@@ -46,7 +51,7 @@ class TestContentPreview:
         )
 
     @patch('routes.contentRoute.render_template')
-    @patch('routes.contentRoute.requests.get')
+    @patch('routes.contentRoute.read_file_head')
     @patch('routes.contentRoute.github_accounts')
     @patch('routes.contentRoute.users')
     @patch('routes.contentRoute.content_model')
@@ -59,15 +64,20 @@ class TestContentPreview:
         }
         mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
         mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
-        resp = MagicMock(status_code=200, content=b'print("hi")')
-        mock_get.return_value = resp
+        mock_get.return_value = (b'print("hi")', 11)
 
         client.get(f'/content/{cid}/preview/script.py')
+        mock_get.assert_called_once_with("u", "r", "tok", "script.py", None)
         mock_render.assert_called_once_with(
             'preview_code.html',
             content='print("hi")',
             file_name='script.py',
             language='py',
+            truncated=False,
+            shown_size="11 B",
+            total_size="11 B",
+            next_offset=11,
+            chunk_url=f'/content/{cid}/chunk/script.py',
             item=mock_cm.get_content.return_value,
             item_type='content',
             username='stu',
@@ -75,7 +85,7 @@ class TestContentPreview:
         )
 
     @patch('routes.contentRoute.render_template')
-    @patch('routes.contentRoute.requests.get')
+    @patch('routes.contentRoute.read_file_head')
     @patch('routes.contentRoute.github_accounts')
     @patch('routes.contentRoute.users')
     @patch('routes.contentRoute.content_model')
@@ -88,19 +98,67 @@ class TestContentPreview:
         }
         mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
         mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
-        pdf_bytes = b"%PDF-1.4 data"
-        resp = MagicMock(status_code=200, content=pdf_bytes)
-        mock_get.return_value = resp
 
         client.get(f'/content/{cid}/preview/doc.pdf')
         args, kwargs = mock_render.call_args
         assert args[0] == 'preview_pdf.html'
-        # PDF data 应该以 data:application/pdf;base64, 开头
-        assert kwargs['pdf_data'].startswith('data:application/pdf;base64,')
+        # PDF 通过 raw 端点流式加载，预览页本身不再下载文件
+        assert kwargs['pdf_url'] == f'/content/{cid}/raw/doc.pdf'
         assert kwargs['file_name'] == 'doc.pdf'
         assert kwargs['item'] == mock_cm.get_content.return_value
+        mock_get.assert_not_called()
+
+    @patch('routes.contentRoute.stream_repo_file')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_raw_streams_with_range(self, mock_cm, mock_users, mock_acc, mock_stream, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": "slides"
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        upstream = MagicMock(
+            status_code=206,
+            headers={"Content-Length": "4", "Content-Range": "bytes 0-3/100"},
+        )
+        upstream.iter_content.return_value = [b"%PDF"]
+        mock_stream.return_value = upstream
+
+        r = client.get(f'/content/{cid}/raw/week1.pdf', headers={"Range": "bytes=0-3"})
+        assert r.status_code == 206
+        assert r.data == b"%PDF"
+        assert r.headers["Content-Type"] == "application/pdf"
+        assert r.headers["Content-Range"] == "bytes 0-3/100"
+        assert r.headers["Accept-Ranges"] == "bytes"
+        assert r.headers["Cache-Control"].startswith("private")
+        mock_stream.assert_called_once_with(
+            "u", "r", "tok", "slides/week1.pdf", range_header="bytes=0-3"
+        )
+        upstream.close.assert_called()
 
-    @patch('routes.contentRoute.requests.get')
+    @patch('routes.contentRoute.stream_repo_file')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_raw_upstream_error(self, mock_cm, mock_users, mock_acc, mock_stream, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": ""
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        mock_stream.return_value = MagicMock(status_code=404, headers={})
+
+        r = client.get(f'/content/{cid}/raw/missing.pdf')
+        assert r.status_code == 404
+
+    @patch('routes.contentRoute.stream_repo_file')
     @patch('routes.contentRoute.github_accounts')
     @patch('routes.contentRoute.users')
     @patch('routes.contentRoute.content_model')
@@ -113,13 +171,211 @@ class TestContentPreview:
         }
         mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
         mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
-        # 非 200 或非特定后缀，都返回 Response
-        resp = MagicMock(status_code=200, content=b"data")
+        # 非特定后缀，直接以附件形式流式返回
+        resp = MagicMock(status_code=200, headers={})
+        resp.iter_content.return_value = [b"da", b"ta"]
         mock_get.return_value = resp
 
         r = client.get(f'/content/{cid}/preview/file.unknown')
         # 应该直接返回二进制
         assert r.status_code == 200
         # Content-Disposition header 包含文件名
-        assert 'attachment; filename=file.unknown' in r.headers['Content-Disposition']
+        assert 'attachment; filename="file.unknown"' in r.headers['Content-Disposition']
         assert r.data == b"data"
+
+    @patch('routes.contentRoute.render_template', return_value="page")
+    @patch('routes.contentRoute.read_file_head')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_preview_not_modified(self, mock_cm, mock_users, mock_acc, mock_get, mock_render, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": ""
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        mock_get.return_value = (b'print("hi")', 11)
+
+        first = client.get(f'/content/{cid}/preview/script.py')
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "private, no-cache"
+        etag = first.headers["ETag"]
+
+        second = client.get(f'/content/{cid}/preview/script.py', headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert mock_render.call_count == 1
+
+        # 文件内容变化后 ETag 失效
+        mock_get.return_value = (b'print("bye")', 12)
+        third = client.get(f'/content/{cid}/preview/script.py', headers={"If-None-Match": etag})
+        assert third.status_code == 200
+        assert third.headers["ETag"] != etag
+
+    @patch('routes.contentRoute.render_template', return_value="page")
+    @patch('routes.contentRoute.get_file_entry')
+    @patch('routes.contentRoute.read_file_head')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_preview_not_modified_from_listing(self, mock_cm, mock_users, mock_acc, mock_get, mock_entry, mock_render, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": ""
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        mock_entry.return_value = {"path": "notes.md", "sha": "b1", "size": 7}
+        mock_get.return_value = (b"# Hello", 7)
+
+        etag = client.get(f'/content/{cid}/preview/notes.md').headers["ETag"]
+        mock_get.reset_mock()
+        r = client.get(f'/content/{cid}/preview/notes.md', headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        mock_get.assert_not_called()
+
+        # A new blob in the listing is a new page
+        mock_entry.return_value = {"path": "notes.md", "sha": "b2", "size": 7}
+        r = client.get(f'/content/{cid}/preview/notes.md', headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        mock_get.assert_called_once()
+
+    @patch('routes.contentRoute.render_template', return_value="page")
+    @patch('routes.contentRoute.resolve_repo_path')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_browse_not_modified(self, mock_cm, mock_users, mock_acc, mock_resolve, mock_render, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": "lectures"
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        listing = [
+            {"name": "a.md", "path": "lectures/a.md", "type": "file", "sha": "s1", "url": "u"},
+        ]
+        mock_resolve.return_value = RepoNode(path="lectures", type="dir", entries=listing)
+
+        etag = client.get(f'/content/{cid}/browse').headers["ETag"]
+        r = client.get(f'/content/{cid}/browse', headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert mock_render.call_count == 1
+
+        listing[0]["sha"] = "s2"
+        r = client.get(f'/content/{cid}/browse', headers={"If-None-Match": etag})
+        assert r.status_code == 200
+
+    @patch('routes.contentRoute.render_template', return_value="page")
+    @patch('routes.contentRoute.read_file_head')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_preview_large_file_truncated(self, mock_cm, mock_users, mock_acc, mock_read, mock_render, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": ""
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        # 20 MB 的大文件只取前面一段
+        mock_read.return_value = (b"line1\nline2\nparti", 20 * 1024 * 1024)
+
+        r = client.get(f'/content/{cid}/preview/notes.md')
+        assert r.status_code == 200
+        args, kwargs = mock_render.call_args
+        # 过大的 markdown 以纯文本方式截断显示
+        assert args[0] == 'preview_code.html'
+        assert kwargs['language'] == 'markdown'
+        assert kwargs['truncated'] is True
+        assert kwargs['content'] == "line1\nline2\n"
+        assert kwargs['next_offset'] == 12
+        assert kwargs['total_size'] == "20.0 MB"
+
+    @patch('routes.contentRoute.stream_repo_file')
+    @patch('routes.contentRoute.read_file_head')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_preview_refuses_binary(self, mock_cm, mock_users, mock_acc, mock_read, mock_stream, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": ""
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        mock_read.return_value = (b"\x00\x01\x02ELF", 1000)
+        upstream = MagicMock(status_code=200, headers={})
+        upstream.iter_content.return_value = [b"\x00\x01\x02ELF"]
+        mock_stream.return_value = upstream
+
+        r = client.get(f'/content/{cid}/preview/build.py')
+        assert 'attachment' in r.headers['Content-Disposition']
+
+    @patch('routes.contentRoute.PREVIEW_CHUNK_BYTES', 12)
+    @patch('routes.contentRoute.read_repo_file_range')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_chunk_endpoint(self, mock_cm, mock_users, mock_acc, mock_read, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": "data"
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        mock_read.return_value = (b"row3\nrow4\nro", 10 * 1024 * 1024)
+
+        r = client.get(f'/content/{cid}/chunk/log.py?offset=12')
+        assert r.status_code == 200
+        payload = r.get_json()
+        assert payload == {
+            "content": "row3\nrow4\n",
+            "next_offset": 22,
+            "eof": False,
+            "total_size": 10 * 1024 * 1024,
+        }
+        mock_read.assert_called_once_with("u", "r", "tok", "data/log.py", 12, 12)
+
+        # 最后一段：返回剩余全部内容并标记 eof
+        mock_read.return_value = (b"last", 26)
+        payload = client.get(f'/content/{cid}/chunk/log.py?offset=22').get_json()
+        assert payload["content"] == "last"
+        assert payload["eof"] is True
+
+        assert client.get(f'/content/{cid}/chunk/log.py?offset=-1').status_code == 400
+
+        mock_read.return_value = (b"\x00\x00", 100)
+        assert client.get(f'/content/{cid}/chunk/log.py?offset=0').status_code == 415
+
+    @patch('routes.contentRoute.resolve_repo_path')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_browse_file_redirects_after_one_request(self, mock_cm, mock_users, mock_acc, mock_resolve, client):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {
+            "_id": ObjectId(cid),
+            "teacher_id": str(ObjectId()),
+            "github_repo_path": ""
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        mock_resolve.return_value = RepoNode(path="notes/a.md", type="file")
+
+        r = client.get(f'/content/{cid}/browse?path=notes/a.md')
+        assert r.status_code == 302
+        assert r.headers["Location"].endswith(f'/content/{cid}/preview/notes/a.md')
+        mock_resolve.assert_called_once_with("u", "r", "tok", "notes/a.md")
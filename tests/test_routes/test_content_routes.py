@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, ANY
+from unittest.mock import patch, ANY, MagicMock
 from bson.objectid import ObjectId
 from routes.contentRoute import content_bp
 from flask import Flask
@@ -44,9 +44,12 @@ class TestContentRoutes:
 
     @patch("routes.contentRoute.render_template")
     @patch("routes.contentRoute.content_model")
-    def test_show_content_student(self, mock_cm, mock_render, client):
+    @patch("routes.contentRoute.users")
+    def test_show_content_student(self, mock_users, mock_cm, mock_render, client):
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "student"}
         items = [{"_id": ObjectId(), "title": "L1"}, {"_id": ObjectId(), "title": "L2"}]
-        mock_cm.get_all_content.return_value = items
+        page = {"items": items, "next": None, "prev": None}
+        mock_cm.get_content_page.return_value = page
 
         with client.session_transaction() as sess:
             sess["username"] = "student"
@@ -56,13 +59,16 @@ class TestContentRoutes:
         mock_render.assert_called_once_with(
             "student_content.html",
             content_items=items,
+            page=page,
             username="student",
             identity="student",
         )
 
     @patch("routes.contentRoute.render_template")
     @patch("routes.contentRoute.github_accounts")
-    def test_create_content_get(self, mock_github, mock_render, client):
+    @patch("routes.contentRoute.users")
+    def test_create_content_get(self, mock_users, mock_github, mock_render, client):
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "teacher"}
         mock_github.find_one.return_value = {
             "username": "teacher",
             "repo": "u/r",
@@ -76,6 +82,7 @@ class TestContentRoutes:
         mock_render.assert_called_once_with(
             "create_content.html",
             github_info=mock_github.find_one.return_value,
+            courses=[],
             username="teacher",
             identity="teacher",
         )
@@ -112,7 +119,61 @@ class TestContentRoutes:
             description="D",
             github_repo_url="https://github.com/u/r/tree/main/p",
             github_repo_path="p",
+            course_id=None,
         )
         # 至少被调用一次 redirect
         mock_redirect.assert_called_once_with(ANY)
         assert rv.get_data(as_text=True) == "REDIR"
+
+
+class TestContentCourseScope:
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(content_bp)
+        app.secret_key = "test_secret_key"
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["username"] = "stud"
+                sess["identity"] = "student"
+            yield client
+
+    @pytest.fixture
+    def enrolled(self, monkeypatch):
+        import course_utils
+
+        enrolled = MagicMock(return_value=False)
+        monkeypatch.setattr(course_utils.enrollment_model, "is_enrolled", enrolled)
+        return enrolled
+
+    @pytest.mark.parametrize(
+        "url",
+        ["", "/preview/notes.md", "/raw/slides.pdf", "/download", "/browse", "/tree"],
+    )
+    @patch("routes.contentRoute.stream_repo_file")
+    @patch("routes.contentRoute.users")
+    @patch("routes.contentRoute.content_model")
+    def test_not_enrolled_student_gets_404(
+        self, mock_cm, mock_users, mock_stream, client, enrolled, url
+    ):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {"_id": ObjectId(cid), "course_id": "c1"}
+        student_id = ObjectId()
+        mock_users.find_one.return_value = {"_id": student_id, "username": "stud"}
+
+        assert client.get(f"/content/{cid}{url}").status_code == 404
+        enrolled.assert_called_once_with("c1", str(student_id))
+        mock_stream.assert_not_called()
+
+    @patch("routes.contentRoute.render_template", return_value="OK")
+    @patch("routes.contentRoute.users")
+    @patch("routes.contentRoute.content_model")
+    def test_unscoped_content_stays_visible(
+        self, mock_cm, mock_users, mock_render, client, enrolled
+    ):
+        cid = str(ObjectId())
+        mock_cm.get_content.return_value = {"_id": ObjectId(cid), "course_id": None}
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "stud"}
+
+        assert client.get(f"/content/{cid}").status_code == 200
+        enrolled.assert_not_called()
@@ -32,10 +32,13 @@ class TestContentRoutesExtra:
 
     @patch('routes.contentRoute.render_template')
     @patch('routes.contentRoute.content_model')
-    def test_show_content_student(self, mock_cm, mock_render, client):
+    @patch('routes.contentRoute.users')
+    def test_show_content_student(self, mock_users, mock_cm, mock_render, client):
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "s"}
         # 模拟当前用户是 student
         fake_items = [{"_id": ObjectId(), "title": "C1"}]
-        mock_cm.get_all_content.return_value = fake_items
+        page = {"items": fake_items, "next": None, "prev": None}
+        mock_cm.get_content_page.return_value = page
 
         with client.session_transaction() as sess:
             sess['username'] = 's'
@@ -46,13 +49,16 @@ class TestContentRoutesExtra:
         mock_render.assert_called_once_with(
             "student_content.html",
             content_items=fake_items,
+            page=page,
             username="s",
             identity="student"
         )
 
     @patch('routes.contentRoute.render_template')
     @patch('routes.contentRoute.github_accounts')
-    def test_create_content_get_teacher(self, mock_accounts, mock_render, client):
+    @patch('routes.contentRoute.users')
+    def test_create_content_get_teacher(self, mock_users, mock_accounts, mock_render, client):
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
         # GET /content/create 教师分支
         github_info = {"repo": "u/r", "repo_url": "https://github.com/u/r"}
         mock_accounts.find_one.return_value = github_info
@@ -65,6 +71,7 @@ class TestContentRoutesExtra:
         mock_render.assert_called_once_with(
             "create_content.html",
             github_info=github_info,
+            courses=[],
             username="t",
             identity="teacher"
         )
@@ -93,6 +100,26 @@ class TestContentRoutesExtra:
         assert resp.status_code == 400
         assert b"Missing required fields" in resp.data
 
+    @patch('routes.contentRoute.schedule_item_warmup')
+    @patch('routes.contentRoute.github_accounts')
+    @patch('routes.contentRoute.users')
+    @patch('routes.contentRoute.content_model')
+    def test_create_content_post_warms_repo(self, mock_cm, mock_users, mock_accounts, mock_warmup, client):
+        # 创建内容后在后台预热仓库缓存
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        github_info = {"repo": "u/r", "access_token": "tok"}
+        mock_accounts.find_one.return_value = github_info
+
+        with client.session_transaction() as sess:
+            sess['username'] = 't'
+            sess['identity'] = 'teacher'
+
+        resp = client.post('/content/create', data={
+            "title": "T", "description": "D", "github_repo_path": "week1"
+        })
+        assert resp.status_code == 302
+        mock_warmup.assert_called_once_with(github_info, "week1")
+
     @patch('routes.contentRoute.redirect')
     @patch('routes.contentRoute.url_for')
     def test_view_content_not_logged_in(self, mock_url_for, mock_redirect, client):
@@ -0,0 +1,111 @@
+import pytest
+from bson.objectid import ObjectId
+from unittest.mock import MagicMock, patch
+from flask import Flask
+
+import course_utils
+from routes.courseRoute import course_bp
+
+TEACHER_ID = ObjectId()
+COURSE_ID = str(ObjectId())
+
+
+class TestCourseRoutes:
+    @pytest.fixture
+    def app(self):
+        app = Flask(__name__)
+        app.register_blueprint(course_bp)
+        app.add_url_rule("/", "home", lambda: "home")
+        app.secret_key = "test_secret_key"
+        app.config["TESTING"] = True
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["username"] = "teacher"
+            sess["identity"] = "teacher"
+        return client
+
+    @pytest.fixture(autouse=True)
+    def users(self):
+        with patch("routes.courseRoute.users") as users:
+            users.find_one.return_value = {"_id": TEACHER_ID, "username": "teacher"}
+            yield users
+
+    @pytest.fixture
+    def course(self, monkeypatch):
+        course = {"_id": ObjectId(COURSE_ID), "teacher_id": str(TEACHER_ID), "name": "CS"}
+        monkeypatch.setattr(
+            course_utils.course_model, "get_course", MagicMock(return_value=course)
+        )
+        return course
+
+    def test_students_are_redirected(self, client):
+        with client.session_transaction() as sess:
+            sess["identity"] = "student"
+        assert client.get("/courses/").status_code == 302
+
+    @patch("routes.courseRoute.course_model")
+    def test_create_course(self, mock_courses, client):
+        resp = client.post("/courses/", data={"name": " CS 101 ", "code": ""})
+        assert resp.status_code == 302
+        mock_courses.create_course.assert_called_once_with(str(TEACHER_ID), "CS 101", None)
+
+    def test_other_teachers_courses_are_hidden(self, client, course):
+        course["teacher_id"] = "someone else"
+        assert client.get(f"/courses/{COURSE_ID}").status_code == 404
+        assert client.get("/courses/not-an-id").status_code == 404
+
+    @patch("routes.courseRoute.enrollment_model")
+    def test_enroll_by_username(self, mock_enrollments, client, course, users):
+        student_id = ObjectId()
+        users.find.return_value = [{"_id": student_id, "username": "bob"}]
+
+        resp = client.post(
+            f"/courses/{COURSE_ID}/enroll", data={"usernames": "bob, nobody\nbob"}
+        )
+
+        assert resp.status_code == 302
+        query = users.find.call_args[0][0]
+        assert query == {"username": {"$in": ["bob", "nobody"]}, "identity": "student"}
+        mock_enrollments.enroll.assert_called_once_with(COURSE_ID, str(student_id))
+        with client.session_transaction() as sess:
+            flashes = [message for _, message in sess["_flashes"]]
+        assert "Enrolled 1 student(s)" in flashes
+        assert "No student named: nobody" in flashes
+
+    @patch("routes.courseRoute.enrollment_model")
+    def test_unenroll(self, mock_enrollments, client, course):
+        resp = client.post(f"/courses/{COURSE_ID}/unenroll/s1")
+        assert resp.status_code == 302
+        mock_enrollments.unenroll.assert_called_once_with(COURSE_ID, "s1")
+
+
+def test_course_scope_keeps_unscoped_items_visible():
+    assert course_utils.course_scope(["c1"]) == {"course_id": {"$in": ["c1", None]}}
+
+
+def test_visible_to_student(monkeypatch):
+    monkeypatch.setattr(
+        course_utils.enrollment_model,
+        "is_enrolled",
+        lambda course_id, student_id: (course_id, student_id) == ("c1", "s1"),
+    )
+    assert course_utils.visible_to_student({"course_id": None}, "s2")
+    assert course_utils.visible_to_student({}, "s2")
+    assert course_utils.visible_to_student({"course_id": "c1"}, "s1")
+    assert not course_utils.visible_to_student({"course_id": "c1"}, "s2")
+
+
+def test_student_filter_is_limited_to_the_course(monkeypatch):
+    student_id = ObjectId()
+    monkeypatch.setattr(
+        course_utils.enrollment_model,
+        "get_course_student_ids",
+        lambda course_id: [str(student_id)],
+    )
+    everyone = {"identity": "student", "email": {"$ne": None}}
+    assert course_utils.student_filter(None) == everyone
+    assert course_utils.student_filter("c1") == dict(everyone, _id={"$in": [student_id]})
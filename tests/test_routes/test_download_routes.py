@@ -0,0 +1,142 @@
+# tests/test_routes/test_download_routes.py
+import pytest
+from bson.objectid import ObjectId
+from unittest.mock import patch
+
+from github_utils import RateLimitExceeded
+
+
+@pytest.fixture(autouse=True)
+def login(client):
+    with client.session_transaction() as sess:
+        sess['username'] = 'stu'
+        sess['identity'] = 'student'
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "cached.zip"
+    path.write_bytes(b"0123456789")
+    return str(path)
+
+
+def setup_content(mock_cm, mock_users, mock_acc, cid):
+    mock_cm.get_content.return_value = {
+        "_id": ObjectId(cid),
+        "teacher_id": str(ObjectId()),
+        "title": "Week 1",
+        "github_repo_url": "https://github.com/u/r",
+        "github_repo_path": "lectures",
+    }
+    mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+    mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+
+
+@patch('routes.contentRoute.get_or_build_archive')
+@patch('routes.contentRoute.get_path_commit_sha', return_value="abc123")
+@patch('routes.contentRoute.github_accounts')
+@patch('routes.contentRoute.users')
+@patch('routes.contentRoute.content_model')
+class TestContentDownload:
+
+    def test_full_download(self, mock_cm, mock_users, mock_acc, mock_sha, mock_build, archive, client):
+        cid = str(ObjectId())
+        setup_content(mock_cm, mock_users, mock_acc, cid)
+        mock_build.return_value = archive
+
+        r = client.get(f'/content/{cid}/download')
+        assert r.status_code == 200
+        assert r.data == b"0123456789"
+        assert r.headers["Content-Type"] == "application/zip"
+        assert "Week_1.zip" in r.headers["Content-Disposition"]
+        assert r.headers["ETag"].startswith('"abc123-')
+        assert r.headers["Accept-Ranges"] == "bytes"
+        mock_build.assert_called_once_with("u", "r", "tok", "lectures", "abc123")
+        r.close()
+
+    def test_resume_with_range(self, mock_cm, mock_users, mock_acc, mock_sha, mock_build, archive, client):
+        cid = str(ObjectId())
+        setup_content(mock_cm, mock_users, mock_acc, cid)
+        mock_build.return_value = archive
+        etag = client.get(f'/content/{cid}/download').headers["ETag"]
+
+        r = client.get(
+            f'/content/{cid}/download',
+            headers={"Range": "bytes=6-", "If-Range": etag},
+        )
+        assert r.status_code == 206
+        assert r.data == b"6789"
+        assert r.headers["Content-Range"] == "bytes 6-9/10"
+        r.close()
+
+    def test_stale_if_range_sends_full_file(self, mock_cm, mock_users, mock_acc, mock_sha, mock_build, archive, client):
+        cid = str(ObjectId())
+        setup_content(mock_cm, mock_users, mock_acc, cid)
+        mock_build.return_value = archive
+
+        r = client.get(
+            f'/content/{cid}/download',
+            headers={"Range": "bytes=6-", "If-Range": '"oldsha-0000"'},
+        )
+        assert r.status_code == 200
+        assert r.data == b"0123456789"
+        r.close()
+
+    def test_revalidate_not_modified(self, mock_cm, mock_users, mock_acc, mock_sha, mock_build, archive, client):
+        cid = str(ObjectId())
+        setup_content(mock_cm, mock_users, mock_acc, cid)
+        mock_build.return_value = archive
+        etag = client.get(f'/content/{cid}/download').headers["ETag"]
+
+        r = client.get(f'/content/{cid}/download', headers={"If-None-Match": etag})
+        assert r.status_code == 304
+
+    def test_github_error(self, mock_cm, mock_users, mock_acc, mock_sha, mock_build, client):
+        cid = str(ObjectId())
+        setup_content(mock_cm, mock_users, mock_acc, cid)
+        mock_sha.side_effect = Exception("boom")
+
+        r = client.get(f'/content/{cid}/download')
+        assert r.status_code == 400
+        assert b"boom" in r.data
+        mock_build.assert_not_called()
+
+    def test_rate_limited(self, mock_cm, mock_users, mock_acc, mock_sha, mock_build, client):
+        cid = str(ObjectId())
+        setup_content(mock_cm, mock_users, mock_acc, cid)
+        mock_build.side_effect = RateLimitExceeded(90)
+
+        r = client.get(f'/content/{cid}/download')
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "90"
+        assert b"try again" in r.data
+
+
+@patch('routes.assignmentRoute.get_or_build_archive')
+@patch('routes.assignmentRoute.get_path_commit_sha', return_value="def456")
+@patch('routes.assignmentRoute.github_accounts')
+@patch('routes.assignmentRoute.users')
+@patch('routes.assignmentRoute.assignment_model')
+class TestAssignmentDownload:
+
+    def test_single_file_download(self, mock_am, mock_users, mock_acc, mock_sha, mock_build, tmp_path, client):
+        aid = str(ObjectId())
+        mock_am.get_assignment.return_value = {
+            "_id": ObjectId(aid),
+            "teacher_id": str(ObjectId()),
+            "title": "HW 1",
+            "github_repo_url": "https://github.com/u/r",
+            "github_repo_path": "hw1/spec.pdf",
+        }
+        mock_users.find_one.return_value = {"_id": ObjectId(), "username": "t"}
+        mock_acc.find_one.return_value = {"access_token": "tok", "repo": "u/r"}
+        cached = tmp_path / "abc.file"
+        cached.write_bytes(b"%PDF")
+        mock_build.return_value = str(cached)
+
+        r = client.get(f'/assignments/{aid}/download', headers={"Range": "bytes=0-1"})
+        assert r.status_code == 206
+        assert r.data == b"%P"
+        assert "spec.pdf" in r.headers["Content-Disposition"]
+        assert r.headers["Cache-Control"] == "private, no-cache"
+        r.close()
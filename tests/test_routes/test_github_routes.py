@@ -1,9 +1,12 @@
+import base64
 import pytest
 from flask import Flask, session
 from bson.objectid import ObjectId
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 import routes.githubRoute as githubRoute
+import github_async
 import requests
+from github_utils import RateLimitExceeded
 
 @pytest.fixture
 def app():
@@ -186,6 +189,7 @@ def test_repo_unlink_success(mock_accounts, client):
 def test_get_repo_contents_success(monkeypatch):
     class R:
         status_code = 200
+        headers = {}
         def json(self): return {'x':1}
     monkeypatch.setattr(requests, 'get', lambda *a, **k: R())
     assert githubRoute.get_repo_contents('o','r','t','p') == {'x':1}
@@ -193,21 +197,109 @@ def test_get_repo_contents_success(monkeypatch):
 def test_get_repo_contents_failure(monkeypatch):
     class R:
         status_code = 404
+        headers = {}
         text = 'err'
         def json(self): return {}
     monkeypatch.setattr(requests, 'get', lambda *a, **k: R())
     with pytest.raises(Exception):
         githubRoute.get_repo_contents('o','r','t','p')
 
+def test_get_path_commit_sha(monkeypatch):
+    calls = []
+    class R:
+        status_code = 200
+        headers = {}
+        def json(self): return [{'sha': 'abc'}]
+    def fake_get(url, headers=None, params=None):
+        calls.append((url, params))
+        return R()
+    monkeypatch.setattr(requests, 'get', fake_get)
+    assert githubRoute.get_path_commit_sha('o', 'r', 't', 'hw1') == 'abc'
+    assert calls[0] == ('https://api.github.com/repos/o/r/commits', {'per_page': 1, 'path': 'hw1'})
+
+def test_get_path_commit_sha_failure(monkeypatch):
+    class R:
+        status_code = 200
+        headers = {}
+        def json(self): return []
+    monkeypatch.setattr(requests, 'get', lambda *a, **k: R())
+    with pytest.raises(Exception):
+        githubRoute.get_path_commit_sha('o', 'r', 't')
+
+def test_read_repo_file_range_partial(monkeypatch):
+    resp = MagicMock(status_code=206, headers={'Content-Range': 'bytes 0-3/100'})
+    resp.iter_content.return_value = [b'ab', b'cd']
+    stream = MagicMock(return_value=resp)
+    monkeypatch.setattr(githubRoute, 'stream_repo_file', stream)
+    assert githubRoute.read_repo_file_range('o', 'r', 't', 'big.py', 0, 4) == (b'abcd', 100)
+    stream.assert_called_once_with('o', 'r', 't', 'big.py', 'bytes=0-3')
+    resp.close.assert_called_once()
+
+def test_read_repo_file_range_ignored_range(monkeypatch):
+    # Upstream ignored the Range header and sent the whole file
+    resp = MagicMock(status_code=200, headers={'Content-Length': '10'})
+    resp.iter_content.return_value = [b'0123', b'456789']
+    monkeypatch.setattr(githubRoute, 'stream_repo_file', lambda *a: resp)
+    assert githubRoute.read_repo_file_range('o', 'r', 't', 'f', 5, 3) == (b'567', 10)
+
+def test_read_repo_file_range_past_end(monkeypatch):
+    resp = MagicMock(status_code=416, headers={'Content-Range': 'bytes */10'})
+    monkeypatch.setattr(githubRoute, 'stream_repo_file', lambda *a: resp)
+    assert githubRoute.read_repo_file_range('o', 'r', 't', 'f', 20, 3) == (b'', 10)
+    resp.status_code = 404
+    with pytest.raises(Exception):
+        githubRoute.read_repo_file_range('o', 'r', 't', 'f', 0, 3)
+
+def test_resolve_repo_path_file(monkeypatch):
+    monkeypatch.setattr(githubRoute, 'get_repo_contents', lambda o, r, t, p: {
+        'type': 'file', 'name': 'a.md', 'path': 'docs/a.md', 'size': 3, 'sha': 'abc',
+        'download_url': 'u', 'encoding': 'base64',
+        'content': base64.b64encode(b'# A').decode(),
+    })
+    node = githubRoute.resolve_repo_path('o', 'r', 't', 'docs/a.md')
+    assert node.is_file and not node.is_dir
+    assert (node.name, node.size, node.sha, node.content) == ('a.md', 3, 'abc', b'# A')
+    # Inlined content is reused instead of a second request
+    monkeypatch.setattr(githubRoute, 'github_get', MagicMock(side_effect=AssertionError))
+    assert githubRoute.read_repo_file('o', 'r', 't', node) == b'# A'
+
+def test_resolve_repo_path_dir(monkeypatch):
+    listing = [{'type': 'file', 'path': 'docs/a.md'}]
+    monkeypatch.setattr(githubRoute, 'get_repo_contents', lambda o, r, t, p: listing)
+    node = githubRoute.resolve_repo_path('o', 'r', 't', 'docs')
+    assert node.is_dir
+    assert node.entries == listing
+
+def test_read_repo_file_large(monkeypatch):
+    # Files over 1 MB come back without inline content
+    node = githubRoute.RepoNode(path='big.md', type='file', size=2 << 20)
+    get = MagicMock(return_value=MagicMock(status_code=200, content=b'x'))
+    monkeypatch.setattr(githubRoute, 'github_get', get)
+    assert githubRoute.read_repo_file('o', 'r', 't', node) == b'x'
+    assert get.call_args.args[0].endswith('/repos/o/r/contents/big.md')
+
+def test_get_file_entry_reads_the_parent_listing(monkeypatch):
+    listing = [
+        {'type': 'dir', 'path': 'docs/img'},
+        {'type': 'file', 'path': 'docs/a.md', 'sha': 'b1', 'size': 3},
+    ]
+    contents = MagicMock(return_value=listing)
+    monkeypatch.setattr(githubRoute, 'get_repo_contents', contents)
+    assert githubRoute.get_file_entry('o', 'r', 't', 'docs/a.md')['sha'] == 'b1'
+    assert contents.call_args.args == ('o', 'r', 't', 'docs')
+    assert githubRoute.get_file_entry('o', 'r', 't', 'docs/img') is None
+    contents.side_effect = Exception('boom')
+    assert githubRoute.get_file_entry('o', 'r', 't', 'docs/a.md') is None
+
 def test_list_repo_files_recursive(monkeypatch):
-    def fake_contents(o, r, t, path):
+    def fake_contents(o, r, t, path, ref=None):
         if path == '':
             return [
                 {'type':'dir','path':'d'},
                 {'type':'file','name':'f','path':'f','download_url':'u'}
             ]
         return {'type':'file','name':'g','path':'d/g','download_url':'u2'}
-    monkeypatch.setattr(githubRoute, 'get_repo_contents', fake_contents)
+    monkeypatch.setattr(github_async.client, 'get_repo_contents', AsyncMock(side_effect=fake_contents))
     files = githubRoute.list_repo_files_recursive('o','r','t','')
     names = {f['name'] for f in files}
     assert names == {'f','g'}
@@ -262,3 +354,21 @@ def test_github_repo_files(mock_rt, mock_list, mock_acc, client):
     resp = client.get('/github/repo/files')
     mock_rt.assert_called_once()
     assert resp.status_code == 200
+
+@patch('routes.githubRoute.get_repo_contents')
+@patch('routes.githubRoute.github_accounts')
+def test_get_repository_contents_rate_limited(mock_acc, mock_contents, client):
+    with client.session_transaction() as sess:
+        sess['username'] = 'u'
+    mock_acc.find_one.return_value = {'access_token': 't', 'repo': 'o/r'}
+    mock_contents.side_effect = RateLimitExceeded(42)
+    resp = client.get('/github/repo/contents')
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After'] == '42'
+    assert resp.get_json()['retry_after'] == 42
+
+@patch('routes.githubRoute.get_repo_contents')
+def test_is_repo_path_file_propagates_rate_limit(mock_contents):
+    mock_contents.side_effect = RateLimitExceeded(5)
+    with pytest.raises(RateLimitExceeded):
+        githubRoute.is_repo_path_file('o', 'r', 't', 'p')
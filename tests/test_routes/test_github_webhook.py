@@ -0,0 +1,155 @@
+# tests/test_routes/test_github_webhook.py
+import hashlib
+import hmac
+import json
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pytest
+from flask import Flask
+from unittest.mock import patch
+
+import repo_cache
+import routes.githubRoute as githubRoute
+from repo_cache import KIND_COMMIT, KIND_CONTENTS
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "github"
+SECRET = "webhook-test-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(repo_cache, "GITHUB_WEBHOOK_SECRET", SECRET)
+    app = Flask(__name__)
+    app.register_blueprint(githubRoute.github_bp)
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def load_payload(name):
+    return (FIXTURES / name).read_bytes()
+
+
+def deliver(client, event, body, secret=SECRET):
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post(
+        "/github/webhook",
+        data=body,
+        content_type="application/json",
+        headers={"X-GitHub-Event": event, "X-Hub-Signature-256": signature},
+    )
+
+
+@patch("routes.githubRoute.github_accounts")
+def test_push_invalidates_changed_paths(mock_acc, client, github_cache):
+    mock_acc.find_one.return_value = {"repo": "prof-alice/cs101"}
+    for path in ("", "hw1", "hw1/README.md", "hw2"):
+        github_cache.put(KIND_CONTENTS, "prof-alice/cs101", path, "tok", ["cached"])
+    github_cache.put(KIND_COMMIT, "prof-alice/cs101", "hw1", "tok", "oldsha")
+
+    resp = deliver(client, "push", load_payload("push_event.json"))
+    assert resp.status_code == 200
+    assert resp.get_json()["paths"] == ["hw1/README.md", "hw1/tests/test_starter.py"]
+    assert resp.get_json()["invalidated"] == 4
+
+    assert github_cache.get(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok") is None
+    assert github_cache.get(KIND_COMMIT, "prof-alice/cs101", "hw1", "tok") is None
+    # Untouched folders keep their entries
+    assert github_cache.get(KIND_CONTENTS, "prof-alice/cs101", "hw2", "tok") == ["cached"]
+    mock_acc.find_one.assert_called_once_with({"repo": "prof-alice/cs101"})
+
+
+@patch("routes.githubRoute.github_accounts")
+def test_form_encoded_payload(mock_acc, client, github_cache):
+    mock_acc.find_one.return_value = {"repo": "prof-alice/cs101"}
+    github_cache.put(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok", ["cached"])
+    body = urlencode({"payload": load_payload("push_event.json").decode()}).encode()
+    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    resp = client.post(
+        "/github/webhook",
+        data=body,
+        content_type="application/x-www-form-urlencoded",
+        headers={"X-GitHub-Event": "push", "X-Hub-Signature-256": signature},
+    )
+    assert resp.status_code == 200
+    assert github_cache.get(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok") is None
+
+
+def test_bad_signature_rejected(client, github_cache):
+    github_cache.put(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok", ["cached"])
+    resp = deliver(client, "push", load_payload("push_event.json"), secret="wrong")
+    assert resp.status_code == 403
+
+    resp = client.post(
+        "/github/webhook",
+        data=load_payload("push_event.json"),
+        headers={"X-GitHub-Event": "push"},
+    )
+    assert resp.status_code == 403
+    assert github_cache.get(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok") == ["cached"]
+
+
+def test_ping(client):
+    resp = deliver(client, "ping", load_payload("ping_event.json"))
+    assert resp.status_code == 200
+    assert resp.get_json() == {"ok": True}
+
+
+@patch("routes.githubRoute.github_accounts")
+def test_other_branch_and_unlinked_repo_ignored(mock_acc, client, github_cache):
+    github_cache.put(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok", ["cached"])
+    payload = json.loads(load_payload("push_event.json"))
+
+    payload["ref"] = "refs/heads/feature"
+    resp = deliver(client, "push", json.dumps(payload).encode())
+    assert resp.status_code == 202
+
+    payload["ref"] = "refs/heads/main"
+    mock_acc.find_one.return_value = None
+    resp = deliver(client, "push", json.dumps(payload).encode())
+    assert resp.status_code == 202
+    assert github_cache.get(KIND_CONTENTS, "prof-alice/cs101", "hw1", "tok") == ["cached"]
+
+
+@patch("routes.githubRoute.github_accounts")
+def test_force_push_drops_whole_repo(mock_acc, client, github_cache):
+    mock_acc.find_one.return_value = {"repo": "prof-alice/cs101"}
+    github_cache.put(KIND_CONTENTS, "prof-alice/cs101", "hw2/x", "tok", ["cached"])
+    payload = json.loads(load_payload("push_event.json"))
+    payload["forced"] = True
+
+    resp = deliver(client, "push", json.dumps(payload).encode())
+    assert resp.get_json()["paths"] is None
+    assert github_cache.get(KIND_CONTENTS, "prof-alice/cs101", "hw2/x", "tok") is None
+
+
+def test_not_configured(client, monkeypatch):
+    monkeypatch.setattr(repo_cache, "GITHUB_WEBHOOK_SECRET", None)
+    resp = deliver(client, "push", load_payload("push_event.json"))
+    assert resp.status_code == 404
+
+
+def test_contents_served_from_cache(monkeypatch, github_cache):
+    calls = []
+
+    class R:
+        status_code = 200
+        headers = {}
+
+        def json(self):
+            return [{"path": "hw1/a.py"}]
+
+    def fake_get(*a, **k):
+        calls.append(a)
+        return R()
+
+    monkeypatch.setattr(githubRoute.requests, "get", fake_get)
+    first = githubRoute.get_repo_contents("o", "r", "tok", "hw1")
+    second = githubRoute.get_repo_contents("o", "r", "tok", "hw1")
+    assert first == second == [{"path": "hw1/a.py"}]
+    assert len(calls) == 1
+
+    github_cache.invalidate("o/r", ["hw1/a.py"])
+    githubRoute.get_repo_contents("o", "r", "tok", "hw1")
+    assert len(calls) == 2
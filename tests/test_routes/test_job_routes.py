@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import patch
+from flask import Flask
+
+from routes.jobRoute import job_bp
+
+
+class TestJobRoutes:
+    @pytest.fixture
+    def app(self):
+        app = Flask(__name__)
+        app.register_blueprint(job_bp)
+        app.secret_key = "test_secret_key"
+        app.config["TESTING"] = True
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["username"] = "alice"
+            sess["identity"] = "teacher"
+        return client
+
+    def job(self, **fields):
+        job = {
+            "_id": "job1",
+            "kind": "submission_export",
+            "owner": "alice",
+            "state": "running",
+            "done": 1,
+            "total": 3,
+            "error": None,
+            "artifact": None,
+            "download_name": "HW-submissions.zip",
+        }
+        job.update(fields)
+        return job
+
+    @patch("routes.jobRoute.jobs.get_job")
+    def test_status_of_running_job(self, mock_get, client):
+        mock_get.return_value = self.job()
+        resp = client.get("/jobs/job1")
+        assert resp.status_code == 200
+        assert resp.get_json() == {
+            "id": "job1",
+            "kind": "submission_export",
+            "state": "running",
+            "done": 1,
+            "total": 3,
+            "error": None,
+        }
+        assert client.get("/jobs/job1/download").status_code == 409
+
+    @patch("routes.jobRoute.jobs.get_job")
+    def test_finished_job_download(self, mock_get, client, tmp_path):
+        path = tmp_path / "job1.zip"
+        path.write_bytes(b"PK")
+        mock_get.return_value = self.job(state="done", done=3, artifact=str(path))
+
+        status = client.get("/jobs/job1").get_json()
+        assert status["download_url"] == "/jobs/job1/download"
+
+        resp = client.get("/jobs/job1/download")
+        assert resp.status_code == 200
+        assert resp.data == b"PK"
+        assert "HW-submissions.zip" in resp.headers["Content-Disposition"]
+
+    @patch("routes.jobRoute.jobs.get_job")
+    def test_expired_artifact(self, mock_get, client, tmp_path):
+        mock_get.return_value = self.job(state="done", artifact=str(tmp_path / "gone"))
+        assert client.get("/jobs/job1/download").status_code == 410
+
+    @patch("routes.jobRoute.jobs.get_job")
+    def test_other_users_cannot_see_job(self, mock_get, client):
+        mock_get.return_value = self.job(owner="bob")
+        assert client.get("/jobs/job1").status_code == 404
+        assert client.get("/jobs/job1/download").status_code == 404
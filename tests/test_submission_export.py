@@ -0,0 +1,136 @@
+import io
+import json
+import zipfile
+
+import pytest
+from unittest.mock import MagicMock
+
+import submission_export
+
+STUDENTS = [
+    {"_id": "507f1f77bcf86cd799439011", "username": "bob"},
+    {"_id": "507f1f77bcf86cd799439012", "username": "carol"},
+]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b""):
+        self.status_code = status_code
+        self.body = body
+
+    def iter_content(self, size):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def collections(monkeypatch):
+    from bson.objectid import ObjectId
+
+    users = MagicMock()
+    users.find.return_value = [
+        {"_id": ObjectId(s["_id"]), "username": s["username"]} for s in STUDENTS
+    ]
+    accounts = MagicMock()
+    accounts.find.return_value = [
+        {"username": "bob", "repo": "bob/hw", "access_token": "T1"},
+        {"username": "carol", "repo": "carol/hw", "access_token": "T2"},
+    ]
+    submissions = MagicMock()
+    submissions.get_assignment_submissions.return_value = [
+        {
+            "student_id": STUDENTS[0]["_id"],
+            "readme_content": "# Bob",
+            "commit_sha": "abc",
+            "status": "graded",
+            "grade": 90,
+        },
+        {"student_id": STUDENTS[1]["_id"], "readme_content": "# Carol"},
+    ]
+    monkeypatch.setattr(submission_export, "users", users)
+    monkeypatch.setattr(submission_export, "github_accounts", accounts)
+    monkeypatch.setattr(submission_export, "submission_model", submissions)
+
+
+def test_zip_has_a_folder_per_student():
+    out = io.BytesIO()
+    progress = MagicMock()
+    total = submission_export.build_submissions_zip("a1", out, progress=progress)
+
+    assert total == 2
+    with zipfile.ZipFile(out) as zf:
+        assert sorted(zf.namelist()) == [
+            "bob/README.md",
+            "bob/submission.json",
+            "carol/README.md",
+            "carol/submission.json",
+        ]
+        assert zf.read("bob/README.md") == b"# Bob"
+        manifest = json.loads(zf.read("bob/submission.json"))
+        assert manifest["grade"] == 90
+        assert manifest["commit_sha"] == "abc"
+    progress.assert_called_with(2, 2)
+
+
+def test_repos_are_fetched_at_the_submitted_commit(monkeypatch):
+    def fake_get(url, token, **kwargs):
+        if "carol" in url:
+            return FakeResponse(404)
+        return FakeResponse(200, b"PKrepo")
+
+    get = MagicMock(side_effect=fake_get)
+    monkeypatch.setattr(submission_export, "github_get", get)
+
+    out = io.BytesIO()
+    submission_export.build_submissions_zip("a1", out, include_repos=True)
+
+    urls = sorted(call.args[0] for call in get.call_args_list)
+    assert urls == [
+        "https://api.github.com/repos/bob/hw/zipball/abc",
+        "https://api.github.com/repos/carol/hw/zipball/HEAD",
+    ]
+    with zipfile.ZipFile(out) as zf:
+        assert zf.read("bob/repo.zip") == b"PKrepo"
+        assert "carol/repo.zip" not in zf.namelist()
+        # A repo that can't be fetched is noted rather than failing the export
+        assert "404" in json.loads(zf.read("carol/submission.json"))["repo_error"]
+
+
+def test_duplicate_folder_names_are_kept_apart(monkeypatch):
+    submission_export.users.find.return_value = []
+    submission_export.submission_model.get_assignment_submissions.return_value = [
+        {"student_id": "x/y"},
+        {"student_id": "x y"},
+    ]
+    out = io.BytesIO()
+    submission_export.build_submissions_zip("a1", out)
+    with zipfile.ZipFile(out) as zf:
+        assert {name.split("/")[0] for name in zf.namelist()} == {"x_y", "x_y_"}
+        # The manifest names the student, not the de-duplicated folder
+        assert json.loads(zf.read("x_y_/submission.json"))["student"] == "x y"
+
+
+def test_start_export_queues_a_job(monkeypatch):
+    enqueue = MagicMock(return_value="job1")
+    monkeypatch.setattr(submission_export.jobs, "enqueue", enqueue)
+
+    assert submission_export.start_export("a1", "alice", True, "HW 1") == "job1"
+    enqueue.assert_called_once_with(
+        "submission_export",
+        "alice",
+        {"assignment_id": "a1", "include_repos": True},
+        download_name="HW_1-submissions.zip",
+    )
+
+
+def test_export_job_writes_its_artifact(tmp_path):
+    job = MagicMock(params={"assignment_id": "a1"})
+    job.artifact_path.return_value = str(tmp_path / "job1.zip")
+
+    submission_export._run_export(job)
+
+    job.artifact_path.assert_called_once_with(".zip")
+    job.progress.assert_called_with(2, 2)
+    assert zipfile.is_zipfile(tmp_path / "job1.zip")
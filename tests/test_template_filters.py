@@ -15,8 +15,9 @@ class TestTemplateFilters:
 
         # Test with code blocks
         result = app.markdown_filter("```python\ndef hello():\n    print('Hello')\n```")
-        assert '<pre><code class="language-python">' in result
-        assert "def hello():" in result
+        assert '<div class="codehilite">' in result
+        assert '<span class="k">def</span>' in result
+        assert "hello" in result
 
         # Test with None
         result = app.markdown_filter(None)
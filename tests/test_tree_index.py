@@ -0,0 +1,138 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock
+
+from routes import githubRoute
+from tree_index import TreeIndexCache, encode_tree_index, tree_index_response
+
+TREE = {
+    "commit": "c1",
+    "sha": "t1",
+    "truncated": False,
+    "entries": [
+        {"path": "hw1/README.md", "type": "file", "size": 12, "sha": "b2"},
+        {"path": "hw1", "type": "dir", "size": 0, "sha": "t2"},
+        {"path": "README.md", "type": "file", "size": 5, "sha": "b1"},
+    ],
+}
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    cache = TreeIndexCache()
+    monkeypatch.setattr(githubRoute, "tree_indexes", cache)
+    return cache
+
+
+def decode(data):
+    return json.loads(gzip.decompress(data))
+
+
+class TestEncode:
+    def test_compact_rows_sorted_by_path(self):
+        index = decode(encode_tree_index(TREE))
+        assert index == {
+            "sha": "t1",
+            "truncated": False,
+            "entries": [
+                ["README.md", "f", 5, "b1"],
+                ["hw1", "d", 0, "t2"],
+                ["hw1/README.md", "f", 12, "b2"],
+            ],
+        }
+
+    def test_deterministic(self):
+        assert encode_tree_index(TREE) == encode_tree_index(dict(TREE))
+
+
+class TestTreeIndexCache:
+    def test_lookup_by_commit(self):
+        cache = TreeIndexCache()
+        assert cache.lookup("c1") is None
+        cache.put("c1", "t1", b"data")
+        assert cache.lookup("c1") == ("t1", b"data")
+        assert cache.get("t1") == b"data"
+
+    def test_evicts_least_recently_used(self):
+        cache = TreeIndexCache(max_entries=2)
+        cache.put("c1", "t1", b"1")
+        cache.put("c2", "t2", b"2")
+        cache.get("t1")
+        cache.put("c3", "t3", b"3")
+        assert cache.get("t2") is None
+        assert cache.lookup("c1") == ("t1", b"1")
+
+
+class TestResponse:
+    def test_gzip_with_etag(self, app):
+        data = encode_tree_index(TREE)
+        with app.test_request_context(headers={"Accept-Encoding": "gzip, br"}):
+            response = tree_index_response("t1", data)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.get_data() == data
+        assert response.get_etag()[0] == "t1-gz"
+
+    def test_plain_json_without_gzip(self, app):
+        with app.test_request_context():
+            response = tree_index_response("t1", encode_tree_index(TREE))
+        assert "Content-Encoding" not in response.headers
+        assert json.loads(response.get_data())["sha"] == "t1"
+
+    def test_not_modified(self, app):
+        headers = {"Accept-Encoding": "gzip", "If-None-Match": '"t1-gz"'}
+        with app.test_request_context(headers=headers):
+            response = tree_index_response("t1", b"ignored")
+        assert response.status_code == 304
+        assert response.get_data() == b""
+
+
+class TestGetTreeIndex:
+    @pytest.fixture
+    def github(self, monkeypatch):
+        monkeypatch.setattr(githubRoute, "get_path_commit_sha", lambda o, r, t, p="": "c1")
+        response = MagicMock(status_code=200)
+        response.json.return_value = {
+            "sha": "t1",
+            "truncated": False,
+            "tree": [
+                {"path": "a", "mode": "040000", "type": "tree", "sha": "t2"},
+                {"path": "a/b.py", "mode": "100644", "type": "blob", "sha": "b1", "size": 3},
+                {"path": "link", "mode": "120000", "type": "blob", "sha": "b2", "size": 1},
+                {"path": "lib", "mode": "160000", "type": "commit", "sha": "c9"},
+            ],
+        }
+        get = MagicMock(return_value=response)
+        monkeypatch.setattr(githubRoute, "github_get", get)
+        return get
+
+    def test_repo_tree_from_trees_api(self, github):
+        tree = githubRoute.get_repo_tree("o", "r", "tok")
+        assert github.call_args.args[0].endswith("/repos/o/r/git/trees/c1")
+        assert github.call_args.kwargs["params"] == {"recursive": 1}
+        assert [(e["path"], e["type"]) for e in tree["entries"]] == [
+            ("a", "dir"),
+            ("a/b.py", "file"),
+            ("link", "symlink"),
+            ("lib", "submodule"),
+        ]
+
+    def test_index_built_once_per_commit(self, github):
+        sha, data = githubRoute.get_tree_index("o", "r", "tok")
+        assert sha == "t1"
+        assert decode(data)["entries"][1] == ["a/b.py", "f", 3, "b1"]
+        assert githubRoute.get_tree_index("o", "r", "tok") == (sha, data)
+        assert github.call_count == 1
+
+    def test_api_error(self, github):
+        github.return_value = MagicMock(status_code=404, text="Not Found")
+        with pytest.raises(Exception):
+            githubRoute.get_tree_index("o", "r", "tok")
@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import archive_utils
+import github_async
+import github_utils
+import warmup
+from routes import githubRoute
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", True)
+
+
+@pytest.fixture
+def fake_repo(monkeypatch):
+    sha = MagicMock(return_value="abc123")
+    build = MagicMock(return_value="/tmp/cached.zip")
+    monkeypatch.setattr(githubRoute, "get_path_commit_sha", sha)
+    monkeypatch.setattr(archive_utils, "get_or_build_archive", build)
+    monkeypatch.setattr(warmup, "warm_previews", MagicMock(return_value=0))
+    return sha, build
+
+
+class TestWarmup:
+    def test_warm_repo_path(self, fake_repo):
+        sha, build = fake_repo
+        assert warmup.warm_repo_path("o", "r", "tok", "hw1") == "/tmp/cached.zip"
+        sha.assert_called_once_with("o", "r", "tok", "hw1")
+        build.assert_called_once_with("o", "r", "tok", "hw1", "abc123")
+        warmup.warm_previews.assert_called_once_with("o", "r", "tok", "hw1")
+
+    def test_disabled(self, fake_repo):
+        assert warmup.schedule_warmup("o", "r", "tok", "hw1") is None
+        fake_repo[0].assert_not_called()
+
+    def test_runs_in_background_at_low_priority(self, enabled, fake_repo):
+        seen = []
+        fake_repo[1].side_effect = lambda *a: seen.append(github_utils._priority.get()) or "zip"
+
+        future = warmup.schedule_warmup("o", "r", "tok", "hw1")
+        assert future.result(timeout=5) == "zip"
+        assert seen == [github_utils.PRIORITY_LOW]
+
+    def test_same_path_is_warmed_once(self, enabled, fake_repo):
+        release = threading.Event()
+        fake_repo[1].side_effect = lambda *a: release.wait(5)
+
+        first = warmup.schedule_warmup("o", "r", "tok", "hw1")
+        assert warmup.schedule_warmup("o", "r", "tok", "hw1") is None
+        release.set()
+        first.result(timeout=5)
+        # Once finished the path can be warmed again
+        assert warmup.schedule_warmup("o", "r", "tok", "hw1").result(timeout=5)
+
+    def test_failures_are_logged_not_raised(self, enabled, fake_repo):
+        fake_repo[0].side_effect = Exception("boom")
+        assert warmup.schedule_warmup("o", "r", "tok", "").result(timeout=5) is None
+
+    def test_schedule_item_warmup(self, enabled, fake_repo):
+        assert warmup.schedule_item_warmup(None, "hw1") is None
+        assert warmup.schedule_item_warmup({"repo": "o/r"}, "hw1") is None
+
+        future = warmup.schedule_item_warmup({"repo": "o/r", "access_token": "tok"}, None)
+        future.result(timeout=5)
+        fake_repo[0].assert_called_once_with("o", "r", "tok", "")
+
+
+class TestWarmPreviews:
+    @pytest.fixture
+    def listing(self, monkeypatch):
+        items = [
+            {"path": "hw1", "type": "dir"},
+            {"path": "hw1/README.md", "type": "file", "sha": "s1", "size": 9},
+            {"path": "hw1/main.py", "type": "file", "sha": "s2", "size": 5},
+            {"path": "hw1/slides.pdf", "type": "file", "sha": "s3", "size": 99},
+        ]
+        monkeypatch.setattr(github_async.client, "walk", AsyncMock(return_value=items))
+        read = MagicMock(side_effect=lambda o, r, t, path, start, length: (b"x", 1))
+        monkeypatch.setattr(githubRoute, "read_repo_file_range", read)
+        return items, read
+
+    def test_previews_are_served_from_the_cache(self, listing):
+        items, read = listing
+        assert warmup.warm_previews("o", "r", "tok", "hw1") == 2
+        assert sorted(call.args[3] for call in read.call_args_list) == [
+            "hw1/README.md",
+            "hw1/main.py",
+        ]
+
+        # The preview page reads the head through the same helper
+        read.reset_mock()
+        head = githubRoute.read_file_head("o", "r", "tok", "hw1/main.py", items[2])
+        assert head == (b"x", 1)
+        read.assert_not_called()
+
+    def test_changed_file_is_read_again(self, listing):
+        items, read = listing
+        warmup.warm_previews("o", "r", "tok", "hw1")
+        read.reset_mock()
+        entry = dict(items[2], sha="s2-new")
+        githubRoute.read_file_head("o", "r", "tok", "hw1/main.py", entry)
+        read.assert_called_once()
+
+    def test_capped(self, listing, monkeypatch):
+        monkeypatch.setattr(warmup, "WARMUP_PREVIEW_FILES", 1)
+        assert warmup.warm_previews("o", "r", "tok", "hw1") == 1
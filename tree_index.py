@@ -0,0 +1,101 @@
+# tree_index.py
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+import metrics
+from http_utils import PAGE_CACHE_CONTROL
+
+# Indexes kept per worker; each is a few KB to a few hundred KB gzipped
+TREE_INDEX_CACHE_SIZE = int(os.getenv("TREE_INDEX_CACHE_SIZE", 64))
+
+TYPE_CODES = {"dir": "d", "file": "f", "symlink": "l", "submodule": "s"}
+
+
+def encode_tree_index(tree: dict) -> bytes:
+    """Gzipped compact JSON for a tree from githubRoute.get_repo_tree.
+
+    Entries are [path, type code, size, sha] rows sorted by path; the output
+    is deterministic so identical trees give identical bytes.
+    """
+    rows = [
+        [
+            entry["path"],
+            TYPE_CODES.get(entry["type"], "f"),
+            entry.get("size") or 0,
+            entry.get("sha", ""),
+        ]
+        for entry in sorted(tree["entries"], key=lambda entry: entry["path"])
+    ]
+    body = json.dumps(
+        {"sha": tree["sha"], "truncated": bool(tree.get("truncated")), "entries": rows},
+        separators=(",", ":"),
+    )
+    return gzip.compress(body.encode("utf-8"), mtime=0)
+
+
+class TreeIndexCache:
+    """LRU of gzipped indexes by tree SHA, plus which tree each commit has."""
+
+    def __init__(self, max_entries=TREE_INDEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        self._trees = OrderedDict()
+
+    def lookup(self, commit_sha):
+        """(tree SHA, index) already built for a commit, or None."""
+        with self._lock:
+            tree_sha = self._trees.get(commit_sha)
+            data = self._indexes.get(tree_sha) if tree_sha else None
+            metrics.cache_lookup("tree_index", data is not None)
+            if data is None:
+                return None
+            self._indexes.move_to_end(tree_sha)
+            return tree_sha, data
+
+    def get(self, tree_sha):
+        with self._lock:
+            data = self._indexes.get(tree_sha)
+            if data is not None:
+                self._indexes.move_to_end(tree_sha)
+            return data
+
+    def put(self, commit_sha, tree_sha, data):
+        with self._lock:
+            self._trees[commit_sha] = tree_sha
+            self._trees.move_to_end(commit_sha)
+            self._indexes[tree_sha] = data
+            self._indexes.move_to_end(tree_sha)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+            # Commit SHAs are tiny, but keep the map bounded too
+            while len(self._trees) > self.max_entries * 4:
+                self._trees.popitem(last=False)
+
+
+tree_indexes = TreeIndexCache()
+
+
+def tree_index_response(tree_sha: str, data: bytes) -> Response:
+    """Serve a gzipped index, revalidated by tree SHA.
+
+    Clients that don't accept gzip get the JSON decompressed.
+    """
+    gzipped = "gzip" in request.accept_encodings
+    etag = f"{tree_sha}-gz" if gzipped else tree_sha
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(data if gzipped else gzip.decompress(data))
+        response.headers["Content-Type"] = "application/json"
+        if gzipped:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
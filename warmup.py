@@ -0,0 +1,112 @@
+# warmup.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import archive_utils
+import github_async
+import repo_mirror
+from github_utils import PRIORITY_LOW, RateLimitExceeded, github_priority
+from preview_utils import CODE_EXTENSIONS, MARKDOWN_EXTENSIONS
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") != "0"
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", 2))
+# Most text files per path whose preview is prefetched
+WARMUP_PREVIEW_FILES = int(os.getenv("WARMUP_PREVIEW_FILES", 50))
+
+_executor = ThreadPoolExecutor(
+    max_workers=WARMUP_WORKERS, thread_name_prefix="warmup"
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def warm_repo_path(owner: str, repo: str, token: str, path: str = "") -> str:
+    """Prefetch what students ask for first when an item is published.
+
+    Fills the repo cache with the path's commit SHA, its listings and the
+    preview heads of its text files, read through the same helpers the
+    browse and preview pages use, and builds the download into the archive
+    cache. Raw file streaming (PDFs, the raw endpoint) is not cached and
+    still goes to GitHub. In mirror mode the repo is fetched first and
+    everything is then served from the local clone. Returns the cached
+    archive path.
+    """
+    mirrored = False
+    if repo_mirror.mirror is not None:
+        try:
+            repo_mirror.mirror.fetch(f"{owner}/{repo}", token)
+            mirrored = True
+        except Exception as e:
+            # Fall back to warming the API cache
+            print(f"[warmup] mirror fetch of {owner}/{repo} failed: {e}")
+    # Imported here: the route modules import this one to schedule warmups
+    from routes import githubRoute
+
+    sha = githubRoute.get_path_commit_sha(owner, repo, token, path)
+    archive = archive_utils.get_or_build_archive(owner, repo, token, path, sha)
+    if not mirrored:
+        warm_previews(owner, repo, token, path)
+    return archive
+
+
+def warm_previews(owner: str, repo: str, token: str, path: str = "") -> int:
+    """Cache the listings under a path and the preview heads of its text files.
+
+    Returns how many heads were read (at most WARMUP_PREVIEW_FILES).
+    """
+    from routes import githubRoute
+
+    items = github_async.run(github_async.client.walk(owner, repo, token, path))
+    previewable = tuple(MARKDOWN_EXTENSIONS + CODE_EXTENSIONS)
+    files = [
+        item
+        for item in items
+        if item["type"] == "file" and item["path"].lower().endswith(previewable)
+    ][:WARMUP_PREVIEW_FILES]
+    for item in files:
+        try:
+            githubRoute.read_file_head(owner, repo, token, item["path"], item)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"[warmup] preview of {owner}/{repo}:{item['path']} failed: {e}")
+    return len(files)
+
+
+def schedule_warmup(owner: str, repo: str, token: str, path: str = ""):
+    """Warm a repo path in the background.
+
+    Returns the future, or None when warmup is disabled or the same path is
+    already being warmed.
+    """
+    if not WARMUP_ENABLED:
+        return None
+
+    key = (owner, repo, path or "")
+    with _pending_lock:
+        if key in _pending:
+            return None
+        _pending.add(key)
+
+    def run():
+        try:
+            # Never compete with students for the token's quota
+            with github_priority(PRIORITY_LOW):
+                return warm_repo_path(owner, repo, token, path or "")
+        except Exception as e:
+            print(f"[warmup] {owner}/{repo}:{path or '/'} failed: {e}")
+            return None
+        finally:
+            with _pending_lock:
+                _pending.discard(key)
+
+    return _executor.submit(run)
+
+
+def schedule_item_warmup(github_info, github_repo_path):
+    """Warm the repo path of a newly created assignment or content item."""
+    if not github_info or not github_info.get("repo") or not github_info.get("access_token"):
+        return None
+    owner, repo = github_info["repo"].split("/")
+    return schedule_warmup(owner, repo, github_info["access_token"], github_repo_path or "")